@@ -1,22 +1,74 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, List
 import uvicorn
 from ..multimodel.retrieval_mode.supervisor_graph import SupervisorService
+from ..multimodel.retrieval_mode.retrieval import RetrievalFilters, RetrievalService
+from ..multimodel.retrieval_mode.async_runtime import run_blocking
+from ..multimodel.resource_registry import readiness, warm_up
+
+# Load the embedding model, vector store and graphs in the background on
+# startup; /health/ready turns 200 once they are loaded
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "true").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARM_UP_ON_STARTUP:
+        app.state.warm_up = asyncio.create_task(run_blocking(warm_up))
+    yield
+
 
 app = FastAPI(
     title="Enterprise RAG MCP Server",
     description="MCP-compatible tool server for enterprise RAG",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Cheap: heavy resources load lazily (see resource_registry.py)
 supervisor = SupervisorService()
 
+
+# ---------------- HEALTH ----------------
+@app.get("/health/live")
+async def live():
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+async def ready():
+    """Per-resource load state and load time; 503 until every required resource is loaded."""
+    status = readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.post("/health/warm-up")
+async def trigger_warm_up():
+    """Loads whatever is not loaded yet (e.g. after WARM_UP_ON_STARTUP=false)."""
+    status = await run_blocking(warm_up)
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/stats")
+async def stats():
+    """Query cache and reranker counters of this worker process."""
+    return RetrievalService.stats()
+
 # ---------------- MCP TOOL ----------------
 class QueryPDFRequest(BaseModel):
     query: str
     top_k: int = 5
     user_email: Optional[str] = None
+    # Scopes the search, e.g. {"category": ["bank"], "type": ["table"]}
+    filters: Optional[RetrievalFilters] = None
 
 
 class QueryPDFResponse(BaseModel):
@@ -25,17 +77,19 @@ class QueryPDFResponse(BaseModel):
     documents: List[str]
 
 
+# Endpoints are async: retrieval, MLflow and SMTP are awaited off the event
+# loop (see async_runtime.py), so one worker serves many in-flight requests
 @app.post("/tools/query_enterprise_pdf", response_model=QueryPDFResponse)
-def query_enterprise_pdf(request: QueryPDFRequest):
-    state = supervisor.run(
+async def query_enterprise_pdf(request: QueryPDFRequest):
+    state = await supervisor.arun(
         query=request.query,
         top_k=request.top_k,
-        user_email=request.user_email
+        user_email=request.user_email,
+        filters=request.filters
     )
 
     documents = state.get("documents", [])
-    print('----------------------------------------------------------------------------')
-    print(documents)
+    logger.debug("query_enterprise_pdf: %d documents", len(documents))
 
     if not documents:
         return QueryPDFResponse(
@@ -78,7 +132,7 @@ class ChatCompletionRequest(BaseModel):
     stream: Optional[bool] = False
 
 @app.get("/v1/models")
-def list_models():
+async def list_models():
     return {
         "object": "list",
         "data": [
@@ -92,14 +146,14 @@ def list_models():
 
 
 @app.post("/v1/chat/completions")
-def chat_completions(request: ChatCompletionRequest):
+async def chat_completions(request: ChatCompletionRequest):
     user_query = ""
     for msg in reversed(request.messages):
         if msg.role == "user":
             user_query = msg.content
             break
 
-    state = supervisor.run(query=user_query, top_k=5)
+    state = await supervisor.arun(query=user_query, top_k=5)
 
     docs = state.get("documents", [])
     important = state.get("important_info_detected", False)
@@ -0,0 +1,178 @@
+"""
+bm25_index.py
+
+BM25 inverted-index sidecar for the vector collection.
+
+Maintained incrementally by the ingestion EmbeddingWriter (same ordered
+writer thread as the vector index upserts) and queried by retrieval's hybrid
+mode. Stored in SQLite with integer document keys and a clustered
+(term, doc) postings table, so the on-disk index stays compact and
+updates are per chunk.
+"""
+
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Keeps identifiers such as invoice numbers ("inv-2024/001") as one term
+TOKEN_PATTERN = re.compile(r"\w+(?:[-/.]\w+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from give has have in info is it its me of on or "
+    "show tell that the this to was what when where which who why with about please".split()
+)
+
+
+# Ranked chunk ids are resolved (and checked by `accept`) this many times top_k at a time
+ACCEPT_PAGE_FACTOR = 4
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.casefold()) if t not in STOPWORDS]
+
+
+class LexicalHit(NamedTuple):
+    chunk_id: str
+    score: float
+    # Share of the query's IDF weight matched by the chunk (0..1): one common
+    # shared word scores low, all of the query's distinctive terms score 1
+    coverage: float
+
+
+class BM25Index:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        conn = self._conn()
+        conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS docs (
+                doc INTEGER PRIMARY KEY,
+                chunk_id TEXT UNIQUE NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc);
+            """
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread: retrieval queries run on worker threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            self._local.conn = conn
+        return conn
+
+    # ---------------- Writes ----------------
+    def _delete(self, conn, chunk_ids):
+        for chunk_id in chunk_ids:
+            row = conn.execute("SELECT doc FROM docs WHERE chunk_id = ?", (chunk_id,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM postings WHERE doc = ?", row)
+                conn.execute("DELETE FROM docs WHERE doc = ?", row)
+
+    def add(self, chunks: list[dict]):
+        """Indexes (or re-indexes) chunks: [{"id": ..., "document": ...}]."""
+        with self._write_lock:
+            conn = self._conn()
+            self._delete(conn, [c["id"] for c in chunks])
+            for chunk in chunks:
+                terms = Counter(tokenize(chunk["document"] or ""))
+                cursor = conn.execute(
+                    "INSERT INTO docs (chunk_id, length) VALUES (?, ?)",
+                    (chunk["id"], sum(terms.values()))
+                )
+                conn.executemany(
+                    "INSERT INTO postings (term, doc, tf) VALUES (?, ?, ?)",
+                    [(term, cursor.lastrowid, tf) for term, tf in terms.items()]
+                )
+            conn.commit()
+
+    def delete(self, chunk_ids: list[str]):
+        with self._write_lock:
+            conn = self._conn()
+            self._delete(conn, chunk_ids)
+            conn.commit()
+
+    # ---------------- Search ----------------
+    def search(self, query: str, top_k: int, accept=None) -> list[LexicalHit]:
+        """
+        Returns up to top_k LexicalHits, best first. accept(chunk_ids)
+        returns the subset of ids to keep (e.g. a metadata filter); it is
+        applied while walking the full ranking, so a selective filter
+        still yields top_k matching chunks when they exist.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        conn = self._conn()
+        doc_count, total_length = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs"
+        ).fetchone()
+        if not doc_count:
+            return []
+        avg_length = total_length / doc_count
+
+        scores = Counter()
+        matched_idf = Counter()
+        # Terms missing from the corpus count too: a query about something
+        # not in the collection should not look covered
+        total_idf = 0.0
+        for term in terms:
+            postings = conn.execute(
+                "SELECT p.doc, p.tf, d.length FROM postings p JOIN docs d ON d.doc = p.doc WHERE p.term = ?",
+                (term,)
+            ).fetchall()
+
+            df = len(postings)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            total_idf += idf
+            for doc, tf, length in postings:
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                scores[doc] += idf * tf * (BM25_K1 + 1) / norm
+                matched_idf[doc] += idf
+
+        ranked = scores.most_common()
+        page = top_k if accept is None else top_k * ACCEPT_PAGE_FACTOR
+        hits = []
+        for start in range(0, len(ranked), page):
+            chunk = ranked[start:start + page]
+            placeholders = ",".join("?" * len(chunk))
+            ids = dict(conn.execute(
+                f"SELECT doc, chunk_id FROM docs WHERE doc IN ({placeholders})",
+                [doc for doc, _ in chunk]
+            ).fetchall())
+            kept = set(accept([ids[doc] for doc, _ in chunk])) if accept is not None else None
+            for doc, score in chunk:
+                if kept is None or ids[doc] in kept:
+                    hits.append(LexicalHit(ids[doc], score, matched_idf[doc] / total_idf))
+            if len(hits) >= top_k:
+                break
+        return hits[:top_k]
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[tuple[str, float]]:
+    """Merges ranked id lists: score(id) = sum(1 / (k + rank))."""
+    scores = Counter()
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] += 1.0 / (k + rank)
+    return scores.most_common()
@@ -0,0 +1,54 @@
+"""
+collection_version.py
+
+Monotonic version stamp for the vector collection, shared by ingestion
+(which bumps it on every write / delete) and retrieval (which keys its
+result cache on it, so cached results never outlive an ingestion run).
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+VERSION_FILE_NAME = "collection.version"
+# Retrieval re-reads the stamp at most this often
+VERSION_CHECK_INTERVAL = 1.0
+
+_lock = threading.Lock()
+_cached: dict[str, tuple[float, str]] = {}
+
+
+def version_file(vector_db_dir) -> Path:
+    return Path(vector_db_dir) / VERSION_FILE_NAME
+
+
+def bump_collection_version(vector_db_dir) -> str:
+    path = version_file(vector_db_dir)
+    version = str(time.time_ns())
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(version, encoding="utf-8")
+    os.replace(tmp_path, path)
+    with _lock:
+        _cached.pop(str(path), None)
+    return version
+
+
+def collection_version(vector_db_dir) -> str:
+    path = version_file(vector_db_dir)
+    key = str(path)
+    now = time.monotonic()
+
+    with _lock:
+        cached = _cached.get(key)
+        if cached and now - cached[0] < VERSION_CHECK_INTERVAL:
+            return cached[1]
+
+    try:
+        version = path.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        version = "0"
+
+    with _lock:
+        _cached[key] = (now, version)
+    return version
@@ -0,0 +1,149 @@
+"""
+embedding_registry.py
+
+Process-wide, lazily initialised embedding model shared by ingestion
+and retrieval. It is the "embedding_model" resource of
+resource_registry.py, so warm_up() and readiness() cover it.
+
+Backends (EMBEDDING_BACKEND):
+- "torch"     : HuggingFaceEmbeddings / sentence-transformers (default)
+- "onnx"      : ONNX Runtime on CPU, fp32
+- "onnx-int8" : ONNX Runtime on CPU, dynamically quantized int8 weights
+
+EMBEDDING_THREADS sets intra-op threads for either runtime (0 = library default).
+"""
+
+import os
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+from .resource_registry import lazy_resource
+
+
+# ---------------- Configuration ----------------
+EMBEDDING_MODEL_PATH = os.getenv("EMBEDDING_MODEL_PATH", "./all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+# Matches max_seq_length of all-MiniLM-L6-v2
+ONNX_MAX_LENGTH = 256
+ONNX_BATCH_SIZE = 32
+
+
+# ---------------- ONNX Runtime Backend ----------------
+def quantized_onnx_model(onnx_file: Path) -> Path:
+    """Dynamic int8 quantization, done once and cached next to the fp32 model."""
+    int8_file = onnx_file.with_name("model_int8.onnx")
+    if not int8_file.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(onnx_file), str(int8_file), weight_type=QuantType.QInt8)
+    return int8_file
+
+
+class OnnxSentenceEmbeddings(Embeddings):
+    """
+    Mean-pooled, L2-normalised sentence embeddings from an ONNX export of
+    a sentence-transformers model (expects <model>/onnx/model.onnx and
+    <model>/tokenizer.json). Produces the same vectors as the torch path.
+    """
+
+    def __init__(self, model_path: str, quantize: bool = False, intra_op_threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_path)
+        onnx_file = model_dir / "onnx" / "model.onnx"
+        if quantize:
+            onnx_file = quantized_onnx_model(onnx_file)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.session = ort.InferenceSession(
+            str(onnx_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(ONNX_MAX_LENGTH)
+        self.tokenizer.enable_padding()
+
+    def _embed(self, texts: list[str]) -> list[list[float]]:
+        import numpy as np
+
+        vectors = []
+        for start in range(0, len(texts), ONNX_BATCH_SIZE):
+            encodings = self.tokenizer.encode_batch(texts[start:start + ONNX_BATCH_SIZE])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+            hidden = self.session.run(None, feeds)[0]
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            vectors.extend(pooled.tolist())
+
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed(list(texts))
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed([text])[0]
+
+
+# ---------------- Torch Backend ----------------
+def _load_torch_model(model_path: str, intra_op_threads: int) -> Embeddings:
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    if intra_op_threads:
+        import torch
+        torch.set_num_threads(intra_op_threads)
+
+    return HuggingFaceEmbeddings(
+        model_name=model_path,
+        model_kwargs={"device": "cpu"}
+    )
+
+
+# ---------------- Registry ----------------
+def load_embedding_model() -> Embeddings:
+    """Builds the embedding model for EMBEDDING_BACKEND (not cached; see embedding_model)."""
+    if EMBEDDING_BACKEND == "torch":
+        return _load_torch_model(EMBEDDING_MODEL_PATH, EMBEDDING_THREADS)
+    if EMBEDDING_BACKEND in ("onnx", "onnx-int8"):
+        return OnnxSentenceEmbeddings(
+            EMBEDDING_MODEL_PATH,
+            quantize=EMBEDDING_BACKEND == "onnx-int8",
+            intra_op_threads=EMBEDDING_THREADS
+        )
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {EMBEDDING_BACKEND}")
+
+
+# The single shared instance. Loaded on first use or by warm_up(), and
+# installed with embedding_model.set() by benchmarks and tests.
+embedding_model = lazy_resource("embedding_model", load_embedding_model)
+
+
+def get_embedding_model() -> Embeddings:
+    """
+    Returns the shared embedding model, loading it on first use.
+    Thread-safe; the load cost is paid once per process.
+    """
+    return embedding_model.get()
+
+
+def embedding_model_info() -> dict:
+    return {
+        "model_path": EMBEDDING_MODEL_PATH,
+        "backend": EMBEDDING_BACKEND,
+        "threads": EMBEDDING_THREADS,
+        "loaded": embedding_model.loaded,
+        "load_seconds": embedding_model.load_seconds,
+    }
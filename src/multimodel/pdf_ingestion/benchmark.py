@@ -0,0 +1,201 @@
+"""
+benchmark.py
+
+Offline, CPU-only ingestion benchmark.
+
+Generates a synthetic corpus (text / scanned / table / image PDFs), runs
+each ingestion stage in isolation and the whole pipeline end to end, and
+prints machine-readable JSON: seconds, pages/sec, chunks/sec and peak
+RSS per stage.
+
+All artifacts, the vector store and the OCR cache live in a throwaway
+workspace, so the real processed_pdfs / vector_store are never touched.
+
+Usage (from the repository root):
+    python -m src.multimodel.pdf_ingestion.benchmark --pages 20 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from ..benchmark_utils import PeakRSS, process_peak_rss_mb
+from ..pdf_ingestion import ingestion_pipeline as pipeline
+from ..pdf_ingestion.synthetic_pdfs import PDF_KINDS, generate_corpus
+from ..pdf_ingestion.vision import image_artifacts, ocr_cache
+from ..vector_index import vector_index_dir
+
+ISOLATED_STAGES = (
+    "extract_text",
+    "extract_tables",
+    "extract_images",
+    "process_pdf",
+    "build_chunks",
+    "store_chunks_in_chroma",
+)
+
+
+# ---------------- Measurement ----------------
+def measure(fn, pages: int):
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - started
+
+    metrics = {
+        "seconds": round(seconds, 4),
+        "pages_per_sec": round(pages / seconds, 2) if seconds else None,
+        "peak_rss_mb": rss.peak_mb,
+    }
+    return result, metrics
+
+
+# ---------------- Workspace ----------------
+def configure_workspace(root: Path):
+    """Points every pipeline directory (and the OCR / image artifact caches) into root."""
+    processed = root / "processed_pdfs"
+    pipeline.PROCESSED_DIR = processed
+    pipeline.TEXT_DIR = processed / "text"
+    pipeline.TABLE_DIR = processed / "tables"
+    pipeline.CHUNK_DIR = processed / "chunks"
+    pipeline.IMAGE_DIR = processed / "images"
+    pipeline.IMAGE_INDEX_DIR = processed / "image_index"
+    pipeline.METADATA_DIR = root / "metadata"
+    pipeline.RAW_PDF_DIR = root / "raw_pdfs"
+    pipeline.CATALOG_FILE = pipeline.METADATA_DIR / "pdf_catalog.json"
+    pipeline.MANIFEST_FILE = pipeline.METADATA_DIR / "ingestion_manifest.json"
+    pipeline.VECTOR_DB_DIR = vector_index_dir(root / "vector_store", pipeline.COLLECTION_NAME)
+    pipeline.BM25_INDEX_FILE = root / "vector_store" / "bm25.sqlite"
+
+    for d in [pipeline.TEXT_DIR, pipeline.TABLE_DIR, pipeline.CHUNK_DIR, pipeline.IMAGE_DIR,
+              pipeline.IMAGE_INDEX_DIR, pipeline.METADATA_DIR, pipeline.RAW_PDF_DIR, pipeline.VECTOR_DB_DIR]:
+        d.mkdir(parents=True, exist_ok=True)
+
+    # Fresh cache per workspace so OCR cost is measured cold
+    ocr_cache.OCR_CACHE_PATH = root / "metadata" / "ocr_cache.sqlite"
+    ocr_cache._conn = None
+    image_artifacts.IMAGE_ARTIFACTS_PATH = root / "metadata" / "image_artifacts.sqlite"
+    image_artifacts._conn = None
+
+
+def _record(path: str, content_hash: str) -> dict:
+    return {
+        "pdf_name": Path(path).name,
+        "category": "benchmark",
+        "path": path,
+        "content_hash": content_hash,
+    }
+
+
+# ---------------- Benchmark ----------------
+def benchmark_document(doc: dict, stages) -> dict:
+    path, pages = doc["path"], doc["pages"]
+    pdf_name = Path(path).stem
+    record = _record(path, content_hash=f"bench-{pdf_name}")
+    result = {"kind": doc["kind"], "pages": pages, "stages": {}}
+    chunks = None
+
+    for stage in stages:
+        if stage == "extract_text":
+            _, metrics = measure(lambda: pipeline.extract_text(path), pages)
+        elif stage == "extract_tables":
+            _, metrics = measure(lambda: pipeline.extract_tables(path), pages)
+        elif stage == "extract_images":
+            _, metrics = measure(lambda: pipeline.extract_images(path, pdf_name), pages)
+        elif stage == "process_pdf":
+            _, metrics = measure(lambda: pipeline.process_pdf(record), pages)
+        elif stage == "build_chunks":
+            chunks, metrics = measure(lambda: pipeline.build_chunks(pdf_name, record["content_hash"]), pages)
+        elif stage == "store_chunks_in_chroma":
+            if chunks is None:
+                chunks = pipeline.build_chunks(pdf_name, record["content_hash"])
+            _, metrics = measure(lambda: pipeline.store_chunks_in_chroma(chunks), pages)
+        else:
+            raise ValueError(f"Unknown stage: {stage}")
+
+        if stage in ("build_chunks", "store_chunks_in_chroma") and chunks is not None:
+            metrics["chunks"] = len(chunks)
+            metrics["chunks_per_sec"] = round(len(chunks) / metrics["seconds"], 2) if metrics["seconds"] else None
+        result["stages"][stage] = metrics
+
+    return result
+
+
+def benchmark_end_to_end(corpus: list, workers: int) -> dict:
+    """Full run_pipeline() over the corpus copied into raw_pdfs."""
+    category_dir = pipeline.RAW_PDF_DIR / "benchmark"
+    category_dir.mkdir(parents=True, exist_ok=True)
+    for doc in corpus:
+        target = category_dir / Path(doc["path"]).name
+        target.write_bytes(Path(doc["path"]).read_bytes())
+
+    total_pages = sum(doc["pages"] for doc in corpus)
+    _, metrics = measure(lambda: pipeline.run_pipeline(workers=workers), total_pages)
+
+    with open(pipeline.MANIFEST_FILE, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    total_chunks = sum(len(entry.get("vector_ids", [])) for entry in manifest.values())
+    metrics["chunks"] = total_chunks
+    metrics["chunks_per_sec"] = round(total_chunks / metrics["seconds"], 2) if metrics["seconds"] else None
+    metrics["workers"] = workers
+    return metrics
+
+
+def run_benchmark(pages: int = 10, seed: int = 0, kinds=PDF_KINDS, stages=ISOLATED_STAGES,
+                  end_to_end: bool = True, workers: int = 1, workdir: Path | None = None) -> dict:
+    with tempfile.TemporaryDirectory(prefix="ingestion-bench-") as tmp:
+        root = Path(workdir or tmp)
+        corpus = generate_corpus(root / "corpus", pages=pages, seed=seed, kinds=kinds)
+
+        report = {
+            "config": {
+                "pages": pages,
+                "seed": seed,
+                "kinds": list(kinds),
+                "stages": list(stages),
+                "workers": workers,
+                "cpu_count": os.cpu_count(),
+            },
+            "documents": [],
+        }
+
+        configure_workspace(root / "isolated")
+        for doc in corpus:
+            report["documents"].append(benchmark_document(doc, stages))
+
+        if end_to_end:
+            configure_workspace(root / "end_to_end")
+            report["end_to_end"] = benchmark_end_to_end(corpus, workers)
+
+        report["process_peak_rss_mb"] = process_peak_rss_mb()
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline ingestion benchmark")
+    parser.add_argument("--pages", type=int, default=10, help="pages per synthetic PDF")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--kinds", nargs="+", default=list(PDF_KINDS), choices=PDF_KINDS)
+    parser.add_argument("--stages", nargs="+", default=list(ISOLATED_STAGES), choices=ISOLATED_STAGES)
+    parser.add_argument("--workers", type=int, default=1, help="workers for the end-to-end run")
+    parser.add_argument("--no-end-to-end", action="store_true")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        pages=args.pages,
+        seed=args.seed,
+        kinds=args.kinds,
+        stages=args.stages,
+        end_to_end=not args.no_end_to_end,
+        workers=args.workers,
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    else:
+        print(output)
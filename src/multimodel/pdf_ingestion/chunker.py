@@ -0,0 +1,128 @@
+"""
+chunker.py
+
+Boundary-aware, cross-page token chunker for build_chunks().
+
+- All pages of a document are tokenized in one encode_batch call
+- Windows run over the document's token stream, so short pages are
+  packed together; each chunk records the pages it came from
+- A window is cut at the last sentence / paragraph boundary inside it,
+  as long as the chunk stays at least MIN_FILL full
+- Chunk text is sliced from the source bytes using token byte offsets,
+  so no chunk is ever decoded from tokens; token ends are snapped to
+  UTF-8 character boundaries first, since byte-level tokens can split
+  a multi-byte character
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_OVERLAP = 50
+# A boundary cut is only taken if the chunk keeps at least this share of chunk_size
+MIN_FILL = 0.5
+# End of sentence (punctuation followed by whitespace) or a blank line
+BOUNDARY_PATTERN = re.compile(rb"[.!?;:](?=\s)|\n\s*\n")
+PAGE_SEPARATOR = "\n\n"
+
+
+def _snap_to_characters(data: bytes, ends: list[int]) -> list[int]:
+    """
+    Moves each token end past any UTF-8 continuation bytes, so a character
+    split across tokens belongs wholly to the token it starts in.
+    """
+    snapped = []
+    for end in ends:
+        while end < len(data) and data[end] & 0xC0 == 0x80:
+            end += 1
+        snapped.append(end)
+    return snapped
+
+
+class _TokenStream:
+    """Token byte offsets of every page, laid end to end."""
+
+    def __init__(self, pages: list[dict], tokenizer):
+        texts = [page.get("text") or "" for page in pages]
+        token_lists = tokenizer.encode_batch(texts)
+
+        self.page_numbers = [page.get("page") for page in pages]
+        self.page_bytes = []
+        self.page_ends = []
+        self.page_first_token = []
+        self.boundaries = []
+        self.total = 0
+
+        for text, tokens in zip(texts, token_lists):
+            data = text.encode("utf-8")
+            # Cumulative byte length of tokens = byte end offset of each token
+            ends = _snap_to_characters(data, list(accumulate(map(len, tokenizer.decode_tokens_bytes(tokens)))))
+
+            self.page_bytes.append(data)
+            self.page_ends.append(ends)
+            self.page_first_token.append(self.total)
+
+            if ends:
+                cuts = set()
+                for match in BOUNDARY_PATTERN.finditer(data):
+                    k = bisect_left(ends, match.end())
+                    if k < len(ends):
+                        cuts.add(self.total + k + 1)
+                # A page end is always a paragraph boundary
+                cuts.add(self.total + len(ends))
+                self.boundaries.extend(sorted(cuts))
+
+            self.total += len(ends)
+
+    def slice(self, start: int, end: int) -> tuple[str, list]:
+        """Text and page numbers for global token range [start, end)."""
+        pieces, pages = [], []
+        p = max(bisect_right(self.page_first_token, start) - 1, 0)
+
+        while p < len(self.page_ends) and self.page_first_token[p] < end:
+            ends = self.page_ends[p]
+            first = self.page_first_token[p]
+            local_start = max(start - first, 0)
+            local_end = min(end - first, len(ends))
+
+            if local_end > local_start:
+                byte_start = ends[local_start - 1] if local_start else 0
+                byte_end = ends[local_end - 1]
+                piece = self.page_bytes[p][byte_start:byte_end].decode("utf-8").strip()
+                if piece:
+                    pieces.append(piece)
+                    pages.append(self.page_numbers[p])
+            p += 1
+
+        return PAGE_SEPARATOR.join(pieces), pages
+
+
+def chunk_pages(pages: list[dict], tokenizer, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                overlap: int = DEFAULT_OVERLAP) -> list[dict]:
+    """
+    pages: [{"page": 1, "text": "..."}, ...]
+    returns: [{"text": "...", "pages": [1, 2], "tokens": 480}, ...]
+    """
+    stream = _TokenStream(pages, tokenizer)
+    min_cut = int(chunk_size * MIN_FILL)
+
+    chunks = []
+    start = 0
+    while start < stream.total:
+        end = min(start + chunk_size, stream.total)
+
+        if end < stream.total:
+            i = bisect_right(stream.boundaries, end) - 1
+            if i >= 0 and stream.boundaries[i] >= start + min_cut:
+                end = stream.boundaries[i]
+
+        text, page_refs = stream.slice(start, end)
+        if text:
+            chunks.append({"text": text, "pages": page_refs, "tokens": end - start})
+
+        if end >= stream.total:
+            break
+        start = max(end - overlap, start + 1)
+
+    return chunks
@@ -0,0 +1,169 @@
+"""
+embedding_writer.py
+
+Batched, pipelined embedding stage for the ingestion pipeline.
+
+- Chunks from many PDFs are accumulated into fixed-size batches
+- One batch is embedded + upserted on a background thread while the
+  caller keeps extracting / chunking the next PDF
+- A single writer thread keeps vector index writes ordered
+- Writes are upserts keyed by the chunk id, so re-runs never duplicate
+"""
+
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..collection_version import bump_collection_version
+
+DEFAULT_BATCH_SIZE = 256
+
+
+# ---------------- Deterministic Chunk IDs ----------------
+def make_chunk_id(content_hash: str, chunk_type: str, page, index) -> str:
+    """
+    Stable id derived from (pdf hash, chunk type, page, chunk index).
+    Re-ingesting an unchanged PDF produces the same ids.
+    """
+    raw = f"{content_hash}:{chunk_type}:{page}:{index}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+# ---------------- Writer ----------------
+class EmbeddingWriter:
+    """
+    Usage:
+        with EmbeddingWriter(index, embedding) as writer:
+            writer.add(tag, chunks)
+            for tag in writer.completed():
+                ...
+
+    `tag` identifies a group of chunks (e.g. one PDF stage); completed()
+    returns the tags whose chunks have all been written.
+    """
+
+    def __init__(self, index, embedding, batch_size: int = DEFAULT_BATCH_SIZE,
+                 version_dir=None, lexical_index=None):
+        # VectorIndex the batches are upserted into
+        self.index = index
+        self.embedding = embedding
+        self.batch_size = batch_size
+        # Vector store directory whose collection version is bumped per write
+        self.version_dir = version_dir
+        # Optional BM25Index kept in sync with the collection, batch by batch
+        self.lexical_index = lexical_index
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-writer")
+        self._buffer = []
+        self._in_flight = None
+        self._remaining = {}
+        self._done = []
+
+        self.chunks_written = 0
+        self.batches_written = 0
+        self.embed_seconds = 0.0
+        self.write_seconds = 0.0
+        self._started = time.perf_counter()
+
+    # ---------- Public API ----------
+    def add(self, tag, chunks: list) -> list:
+        """Queues chunks for embedding and returns their ids."""
+        self._remaining[tag] = self._remaining.get(tag, 0) + len(chunks)
+        if not chunks:
+            self._settle({tag: 0})
+
+        self._buffer.extend((tag, chunk) for chunk in chunks)
+        while len(self._buffer) >= self.batch_size:
+            batch = self._buffer[:self.batch_size]
+            self._buffer = self._buffer[self.batch_size:]
+            self._submit(batch)
+
+        return [chunk["id"] for chunk in chunks]
+
+    def flush(self):
+        """Writes the partial batch and waits until everything is stored."""
+        if self._buffer:
+            batch, self._buffer = self._buffer, []
+            self._submit(batch)
+        self._wait()
+
+    def completed(self) -> list:
+        """Tags fully written since the last call."""
+        done, self._done = self._done, []
+        return done
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
+        self.index.persist()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self._started
+        capacity = self.batches_written * self.batch_size
+        return {
+            "chunks_written": self.chunks_written,
+            "batches_written": self.batches_written,
+            "batch_size": self.batch_size,
+            "batch_fill_ratio": round(self.chunks_written / capacity, 4) if capacity else 0.0,
+            "embed_seconds": round(self.embed_seconds, 3),
+            "write_seconds": round(self.write_seconds, 3),
+            "chunks_per_sec": round(self.chunks_written / elapsed, 2) if elapsed else 0.0,
+        }
+
+    # ---------- Internals ----------
+    def _submit(self, batch):
+        # Double buffering: at most one batch is being embedded while the
+        # caller fills the next one, which bounds memory and keeps order
+        self._wait()
+        self._in_flight = (self._executor.submit(self._write_batch, batch), batch)
+
+    def _wait(self):
+        if self._in_flight is None:
+            return
+        future, batch = self._in_flight
+        self._in_flight = None
+        future.result()
+
+        counts = {}
+        for tag, _ in batch:
+            counts[tag] = counts.get(tag, 0) + 1
+        self._settle(counts)
+
+    def _settle(self, counts: dict):
+        for tag, count in counts.items():
+            self._remaining[tag] -= count
+            if self._remaining[tag] == 0:
+                del self._remaining[tag]
+                self._done.append(tag)
+
+    def _write_batch(self, batch):
+        chunks = [chunk for _, chunk in batch]
+        texts = [c["document"] for c in chunks]
+
+        t0 = time.perf_counter()
+        vectors = self.embedding.embed_documents(texts)
+        t1 = time.perf_counter()
+
+        # chunk_id in metadata lets retrieval join vector hits with lexical hits
+        self.index.upsert(
+            ids=[c["id"] for c in chunks],
+            embeddings=vectors,
+            documents=texts,
+            metadatas=[{**c["metadata"], "chunk_id": c["id"]} for c in chunks],
+        )
+        if self.lexical_index is not None:
+            self.lexical_index.add(chunks)
+        if self.version_dir is not None:
+            bump_collection_version(self.version_dir)
+        t2 = time.perf_counter()
+
+        self.embed_seconds += t1 - t0
+        self.write_seconds += t2 - t1
+        self.chunks_written += len(chunks)
+        self.batches_written += 1
@@ -0,0 +1,145 @@
+"""
+ingestion_manifest.py
+
+Persistent ingestion manifest for incremental PDF ingestion.
+
+For every PDF under raw_pdfs the manifest remembers:
+- content hash (sha256), size and mtime of the file
+- which pipeline stages completed (extract / chunk / embed / images)
+- the vector ids written to the vector index, so a changed or removed PDF
+  can have its old chunks replaced instead of duplicated
+- the artifact name its processed files are stored under
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+STAGES = ("extract", "chunk", "embed", "images")
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+# ---------------- File Fingerprint ----------------
+def hash_file(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path, previous: dict | None = None) -> dict:
+    """
+    Size + mtime + sha256 of a file.
+    The hash is reused from the previous entry when size and mtime
+    are unchanged, so unchanged PDFs are never re-read.
+    """
+    stat = os.stat(path)
+    fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    if (
+        previous
+        and previous.get("size") == stat.st_size
+        and previous.get("mtime") == stat.st_mtime
+        and previous.get("content_hash")
+    ):
+        fingerprint["content_hash"] = previous["content_hash"]
+    else:
+        fingerprint["content_hash"] = hash_file(path)
+
+    return fingerprint
+
+
+# ---------------- Artifact Names ----------------
+def artifact_name(key: str) -> str:
+    """
+    File stem for the processed text / table / chunk records, image index
+    and images of the PDF at manifest key `key`. Includes a hash of the
+    key, so bank/report.pdf and hr/report.pdf never share files.
+    """
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+    return f"{Path(key).stem}-{digest}"
+
+
+def entry_artifact(entry: dict) -> str:
+    """Artifact name of a manifest entry; older entries used the bare PDF stem."""
+    return entry.get("artifact") or Path(entry["pdf_name"]).stem
+
+
+# ---------------- Manifest ----------------
+class IngestionManifest:
+    """
+    JSON-backed manifest keyed by the PDF path relative to raw_pdfs
+    (e.g. "bank/report.pdf").
+    """
+
+    def __init__(self, manifest_file: Path):
+        self.manifest_file = Path(manifest_file)
+        self.entries: dict[str, dict] = {}
+        if self.manifest_file.exists():
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, key: str) -> dict | None:
+        return self.entries.get(key)
+
+    def keys(self):
+        return list(self.entries.keys())
+
+    def is_unchanged(self, key: str, fingerprint: dict) -> bool:
+        entry = self.entries.get(key)
+        return bool(entry) and entry.get("content_hash") == fingerprint["content_hash"]
+
+    def is_complete(self, key: str) -> bool:
+        entry = self.entries.get(key)
+        if not entry:
+            return False
+        stages = entry.get("stages", {})
+        return all(stages.get(stage) for stage in STAGES)
+
+    def stage_done(self, key: str, stage: str) -> bool:
+        entry = self.entries.get(key) or {}
+        return bool(entry.get("stages", {}).get(stage))
+
+    def start(self, key: str, record: dict, fingerprint: dict):
+        """Registers a new or changed PDF with all stages reset."""
+        self.entries[key] = {
+            "pdf_name": record["pdf_name"],
+            "category": record["category"],
+            "path": record["path"],
+            "artifact": artifact_name(key),
+            **fingerprint,
+            "stages": {stage: False for stage in STAGES},
+            "vector_ids": [],
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def touch(self, key: str, fingerprint: dict):
+        """Refreshes size/mtime of an unchanged PDF (e.g. after a copy)."""
+        self.entries[key].update(fingerprint)
+
+    def mark_stage(self, key: str, stage: str):
+        entry = self.entries[key]
+        entry["stages"][stage] = True
+        entry["updated_at"] = datetime.now(timezone.utc).isoformat()
+
+    def update_stats(self, key: str, stats: dict):
+        self.entries[key].setdefault("stats", {}).update(stats)
+
+    def add_vector_ids(self, key: str, ids: list):
+        vector_ids = self.entries[key].setdefault("vector_ids", [])
+        known = set(vector_ids)
+        vector_ids.extend(i for i in ids if i not in known)
+
+    def remove(self, key: str) -> dict | None:
+        return self.entries.pop(key, None)
+
+    def save(self):
+        # Write-then-rename so an interrupted run never corrupts the manifest
+        tmp_file = self.manifest_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=4)
+        os.replace(tmp_file, self.manifest_file)
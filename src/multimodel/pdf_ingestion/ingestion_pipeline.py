@@ -3,28 +3,43 @@ ingestion.py
 
 Enterprise-grade PDF ingestion pipeline for Multimodal RAG platform.
 Steps:
-1. Catalog PDFs
+1. Catalog PDFs (incremental: unchanged PDFs are skipped via the ingestion manifest)
 2. Extract text, tables, images (with OCR fallback)
 3. Chunk text/tables
-4. Store chunks in Chroma vector store
+4. Store chunks in the vector index (Chroma or native, see vector_index.py)
+
+Run from the repository root:
+    python -m src.multimodel.pdf_ingestion.ingestion_pipeline
 """
 
+import hashlib
 import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import fitz  # PyMuPDF
-import pdfplumber
 from PIL import Image
-import pytesseract
-import uuid
 import tiktoken
 
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from ..embedding_registry import get_embedding_model
+from ..resource_registry import lazy_resource
+from ..collection_version import bump_collection_version
+from ..bm25_index import BM25Index
+from ..vector_index import open_vector_index, vector_index_dir
+from ..pdf_ingestion.vision.image_embedder import build_image_documents
+from ..pdf_ingestion.vision.vision_agent import vision_agent_enrich
+from ..pdf_ingestion.vision.ocr_cache import cached_image_to_string
+from ..retrieval_mode.importance_agent import tag_importance
+from ..pdf_ingestion.ingestion_manifest import IngestionManifest, entry_artifact, file_fingerprint
+from ..pdf_ingestion.record_store import RecordWriter, iter_artifact, RECORD_SUFFIX
+from ..pdf_ingestion.chunker import chunk_pages, DEFAULT_CHUNK_SIZE, DEFAULT_OVERLAP
+from ..pdf_ingestion.embedding_writer import EmbeddingWriter, make_chunk_id, DEFAULT_BATCH_SIZE
+
 
-from vision.image_embedder import build_image_documents
-from vision.vision_agent import vision_agent_enrich
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+logger = logging.getLogger(__name__)
 
 
 # ---------------- Directories ----------------
@@ -39,216 +54,641 @@ CHUNK_DIR = PROCESSED_DIR / "chunks"
 TEXT_DIR = PROCESSED_DIR / "text"
 TABLE_DIR = PROCESSED_DIR / "tables"
 IMAGE_DIR = PROCESSED_DIR / "images"
-VECTOR_DB_DIR = BASE_DIR1 / "vector_store" / "chroma"
+IMAGE_INDEX_DIR = PROCESSED_DIR / "image_index"
+COLLECTION_NAME = "enterprise_rag_documents"
+# Directory of the active VECTOR_BACKEND's collection
+VECTOR_DB_DIR = vector_index_dir(BASE_DIR1 / "vector_store", COLLECTION_NAME)
+BM25_INDEX_FILE = BASE_DIR1 / "vector_store" / "bm25.sqlite"
 CATALOG_FILE = METADATA_DIR / "pdf_catalog.json"
-
-for d in [RAW_PDF_DIR, PROCESSED_DIR, METADATA_DIR, CHUNK_DIR, TEXT_DIR, TABLE_DIR, IMAGE_DIR, VECTOR_DB_DIR]:
+MANIFEST_FILE = METADATA_DIR / "ingestion_manifest.json"
+
+# ---------------- Parallelism ----------------
+# Worker processes for extraction (1 = serial, in-process)
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "1"))
+# Documents longer than this are split into page ranges across workers
+PAGE_SPLIT_THRESHOLD = 100
+PAGE_RANGE_SIZE = 50
+
+# ---------------- Image Filtering ----------------
+# Images failing these checks are treated as decorative (bullets, rules,
+# spacers, repeated logos) and are never captioned or embedded
+IMAGE_FILTER = {
+    "min_width": 48,
+    "min_height": 48,
+    "min_bytes": 2048,
+    "max_aspect_ratio": 15,
+    # Images repeated on more pages than this are headers/logos (0 disables)
+    "max_page_repeats": 10,
+}
+# Formats Pillow / tesseract read directly; anything else (jpx, jbig2, ...) is re-encoded as PNG
+PASSTHROUGH_IMAGE_FORMATS = {"png", "jpeg", "jpg", "bmp", "tiff", "gif"}
+
+for d in [RAW_PDF_DIR, PROCESSED_DIR, METADATA_DIR, CHUNK_DIR, TEXT_DIR, TABLE_DIR, IMAGE_DIR, IMAGE_INDEX_DIR, VECTOR_DB_DIR]:
     d.mkdir(parents=True, exist_ok=True)
 
 # ---------------- Embeddings & Tokenizer ----------------
-embedding = HuggingFaceEmbeddings(
-    model_name="./all-MiniLM-L6-v2",
-    model_kwargs={"device": "cpu"}
-)
-tokenizer = tiktoken.get_encoding("cl100k_base")
+# The embedding model comes from the shared registry and is only loaded
+# when something is embedded (extraction workers never pay for it).
+# The tokenizer is likewise loaded on first chunking (tiktoken may have
+# to download the encoding), so importing this module stays offline.
+tokenizer = lazy_resource("tokenizer", lambda: tiktoken.get_encoding("cl100k_base"), required=False)
+
+def get_vector_index():
+    return open_vector_index(VECTOR_DB_DIR, COLLECTION_NAME)
+
+def get_lexical_index():
+    return BM25Index(BM25_INDEX_FILE)
+
+def rebuild_lexical_index(page_size: int = 1000):
+    """Backfills the BM25 sidecar from an existing vector collection."""
+    index = get_lexical_index()
+    count = 0
+    for batch in get_vector_index().iter_batches(page_size):
+        index.add([{"id": i, "document": d} for i, d in zip(batch["ids"], batch["documents"])])
+        count += len(batch["ids"])
+    bump_collection_version(VECTOR_DB_DIR)
+    logger.debug("BM25 index rebuilt from %d chunks", count)
+
+def get_embedding_writer(batch_size: int = DEFAULT_BATCH_SIZE):
+    return EmbeddingWriter(
+        get_vector_index(),
+        get_embedding_model(),
+        batch_size,
+        version_dir=VECTOR_DB_DIR,
+        lexical_index=get_lexical_index()
+    )
 
 # ---------------- Step 1: Build PDF Catalog ----------------
-def build_pdf_catalog():
+def build_pdf_catalog(manifest: IngestionManifest):
+    """
+    Scans raw_pdfs and classifies every PDF against the manifest:
+    - COMPLETED: content hash unchanged and all stages done -> skipped
+    - CHANGED:   content hash differs -> old chunks are replaced
+    - PENDING:   new PDF, or an earlier run stopped part-way
+    """
     records = []
     for category in RAW_PDF_DIR.iterdir():
         if not category.is_dir():
             continue
         for pdf in category.glob("*.pdf"):
-            records.append({
+            key = f"{category.name}/{pdf.name}"
+            previous = manifest.get(key)
+            fingerprint = file_fingerprint(pdf, previous)
+
+            if manifest.is_unchanged(key, fingerprint):
+                status = "COMPLETED" if manifest.is_complete(key) else "PENDING"
+            elif previous:
+                status = "CHANGED"
+            else:
+                status = "PENDING"
+
+            record = {
                 "pdf_name": pdf.name,
                 "category": category.name,
                 "path": str(pdf.resolve()),
-                "ingestion_status": "PENDING"
-            })
+                "manifest_key": key,
+                **fingerprint,
+                "ingestion_status": status
+            }
+            if status == "COMPLETED":
+                record.update(previous.get("stats", {}))
+            records.append(record)
+
     with open(CATALOG_FILE, "w", encoding="utf-8") as f:
         json.dump(records, f, indent=4)
     return records
 
-# ---------------- Step 2: Extraction Functions ----------------
-def extract_text(pdf_path):
-    doc = fitz.open(pdf_path)
-    pages = []
-    for page_num, page in enumerate(doc):
-        text = page.get_text().strip()
-        if not text:
-            pix = page.get_pixmap()
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            text = pytesseract.image_to_string(img)
-        pages.append({"page": page_num + 1, "text": text})
-    return pages
+def remove_pdf_artifacts(entry: dict):
+    """
+    Drops everything a previous ingestion of this PDF produced:
+    vectors in the vector index plus processed text/table/chunk/image files.
+    """
+    if not entry:
+        return
 
-def extract_tables(pdf_path):
+    vector_ids = entry.get("vector_ids", [])
+    if vector_ids:
+        get_vector_index().delete(vector_ids)
+        get_lexical_index().delete(vector_ids)
+        bump_collection_version(VECTOR_DB_DIR)
+
+    artifact = entry_artifact(entry)
+    for directory in [TEXT_DIR, TABLE_DIR, CHUNK_DIR]:
+        for suffix in [RECORD_SUFFIX, ".json"]:
+            (directory / f"{artifact}{suffix}").unlink(missing_ok=True)
+    (IMAGE_INDEX_DIR / f"{artifact}.json").unlink(missing_ok=True)
+    for image_path in IMAGE_DIR.glob(f"{artifact}_img_*"):
+        image_path.unlink(missing_ok=True)
+
+    logger.debug("Removed %d stale vectors for %s", len(vector_ids), entry["pdf_name"])
+
+# ---------------- Step 2: Per-page Extraction ----------------
+# Pages between MuPDF cache flushes while streaming large documents
+STORE_SHRINK_EVERY = 50
+
+def extract_page_text(page):
+    text = page.get_text().strip()
+    if not text:
+        pix = page.get_pixmap()
+        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        text = cached_image_to_string(img)
+    return text
+
+def extract_page_tables(page, page_num):
+    # PyMuPDF's table finder is a port of pdfplumber's, so the PDF is
+    # parsed by one library instead of being reopened with pdfplumber
     tables = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            extracted = page.extract_tables()
-            for idx, table in enumerate(extracted):
-                tables.append({
-                    "page": page_num + 1,
-                    "table_id": f"table_{page_num+1}_{idx}",
-                    "rows": table
-                })
+    for idx, table in enumerate(page.find_tables().tables):
+        tables.append({
+            "page": page_num,
+            "table_id": f"table_{page_num}_{idx}",
+            "rows": table.extract()
+        })
     return tables
 
-def extract_images(pdf_path, pdf_name):
-    images = []
-    doc = fitz.open(pdf_path)
-    for page_index, page in enumerate(doc):
-        for img_index, img in enumerate(page.get_images(full=True)):
-            xref = img[0]
+def is_small_image(width, height, image_filter=IMAGE_FILTER):
+    if width < image_filter["min_width"] or height < image_filter["min_height"]:
+        return True
+    aspect = max(width, height) / max(min(width, height), 1)
+    return aspect > image_filter["max_aspect_ratio"]
+
+def new_image_seen():
+    """Per-document dedup state: xref -> image_id, image_id -> image info."""
+    return {"xref": {}, "hash": {}}
+
+def extract_page_images(doc, page, page_num, artifact, seen, image_filter=IMAGE_FILTER):
+    """
+    Returns one reference per image occurrence on the page. Each unique
+    image (by xref, then by content hash) is written to disk only once,
+    named after the PDF's artifact name and its content hash, with its
+    real file extension.
+    """
+    refs = []
+    for img in page.get_images(full=True):
+        xref, width, height = img[0], img[2], img[3]
+
+        if xref not in seen["xref"]:
+            seen["xref"][xref] = None
+            if is_small_image(width, height, image_filter):
+                continue
+
             base_image = doc.extract_image(xref)
             image_bytes = base_image["image"]
-            image_name = f"{pdf_name}_p{page_index+1}_{img_index}.png"
-            image_path = IMAGE_DIR / image_name
-            with open(image_path, "wb") as f:
-                f.write(image_bytes)
-            images.append({
-                "page": page_index + 1,
-                "image_name": image_name,
-                "path": str(image_path)
-            })
-    return images
-
-def ingest_image_embeddings(pdf_name: str):
+            if len(image_bytes) < image_filter["min_bytes"]:
+                continue
+
+            image_id = hashlib.sha256(image_bytes).hexdigest()[:16]
+            seen["xref"][xref] = image_id
+
+            if image_id not in seen["hash"]:
+                ext = base_image["ext"].lower()
+                if ext not in PASSTHROUGH_IMAGE_FORMATS:
+                    pix = fitz.Pixmap(doc, xref)
+                    if pix.n - pix.alpha >= 4:
+                        pix = fitz.Pixmap(fitz.csRGB, pix)
+                    image_bytes, ext = pix.tobytes("png"), "png"
+
+                image_name = f"{artifact}_img_{image_id}.{ext}"
+                image_path = IMAGE_DIR / image_name
+                # Another worker may already have written the same image
+                if not image_path.exists():
+                    with open(image_path, "wb") as f:
+                        f.write(image_bytes)
+
+                seen["hash"][image_id] = {
+                    "image_id": image_id,
+                    "image_name": image_name,
+                    "path": str(image_path),
+                    "format": ext,
+                    "width": width,
+                    "height": height
+                }
+
+        image_id = seen["xref"][xref]
+        if image_id is not None:
+            refs.append({**seen["hash"][image_id], "page": page_num})
+    return refs
+
+def collect_image_refs(index: dict, refs: list):
+    """Merges page-level image references into image_id -> image (with all pages)."""
+    for ref in refs:
+        entry = index.get(ref["image_id"])
+        if entry is None:
+            entry = {k: v for k, v in ref.items() if k != "page"}
+            entry["pages"] = []
+            index[ref["image_id"]] = entry
+        if ref["page"] not in entry["pages"]:
+            entry["pages"].append(ref["page"])
+
+def write_image_index(artifact, index: dict, image_filter=IMAGE_FILTER):
     """
-    One-time image understanding + embedding into Chroma.
-    Called during ingestion only.
+    Persists the unique images of a PDF with back-references to every
+    page they appear on. Returns the number of non-decorative images.
     """
-    image_dir = IMAGE_DIR
+    max_repeats = image_filter["max_page_repeats"]
+    images = []
+    for entry in index.values():
+        entry["pages"].sort()
+        entry["decorative"] = bool(max_repeats) and len(entry["pages"]) > max_repeats
+        images.append(entry)
 
-    embedding = HuggingFaceEmbeddings(
-        model_name="./all-MiniLM-L6-v2"
-    )
+    with open(IMAGE_INDEX_DIR / f"{artifact}.json", "w", encoding="utf-8") as f:
+        json.dump(images, f)
 
-    vectordb = Chroma(
-        persist_directory=str(BASE_DIR / "vector_store" / "chroma"),
-        collection_name="enterprise_rag_documents",
-        embedding_function=embedding
-    )
+    return sum(1 for image in images if not image["decorative"])
+
+def load_image_index(artifact):
+    index_file = IMAGE_INDEX_DIR / f"{artifact}.json"
+    if not index_file.exists():
+        return []
+    with open(index_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def iter_pdf_pages(pdf_path, artifact, text=True, tables=True, images=True, page_range=None):
+    """
+    Opens the PDF once and yields text, tables and images page by page.
+    Only one page is alive at a time, so memory stays flat regardless
+    of document length. Images are written under the artifact name
+    (see ingestion_manifest.artifact_name). page_range=(start, end)
+    limits the walk to 0-based pages [start, end).
+    """
+    with fitz.open(pdf_path) as doc:
+        seen = new_image_seen()
+        start, end = page_range or (0, doc.page_count)
+        for page_index in range(start, min(end, doc.page_count)):
+            page = doc.load_page(page_index)
+            page_num = page_index + 1
+
+            yield {
+                "page": page_num,
+                "text": extract_page_text(page) if text else None,
+                "tables": extract_page_tables(page, page_num) if tables else [],
+                "images": extract_page_images(doc, page, page_num, artifact, seen) if images else []
+            }
+
+            del page
+            if page_num % STORE_SHRINK_EVERY == 0:
+                fitz.TOOLS.store_shrink(100)
+
+# ---------------- Step 2A: Stage-level Extraction ----------------
+def extract_text(pdf_path):
+    return [
+        {"page": page["page"], "text": page["text"]}
+        for page in iter_pdf_pages(pdf_path, None, tables=False, images=False)
+    ]
+
+def extract_tables(pdf_path):
+    tables = []
+    for page in iter_pdf_pages(pdf_path, None, text=False, images=False):
+        tables.extend(page["tables"])
+    return tables
+
+def extract_images(pdf_path, artifact):
+    index = {}
+    for page in iter_pdf_pages(pdf_path, artifact, text=False, tables=False):
+        collect_image_refs(index, page["images"])
+    write_image_index(artifact, index)
+    return list(index.values())
 
-    # Build image documents
-    image_docs = build_image_documents(image_dir, pdf_name)
+def build_image_chunks(pdf_name: str, content_hash: str | None = None, category: str | None = None,
+                       artifact: str | None = None):
+    """
+    One-time image understanding (OCR / captions) for a PDF's images,
+    returned as chunk records ready for the embedding writer. The image
+    index is read from `artifact` (default: pdf_name).
+    """
+    # Build image documents: one per unique, non-decorative image
+    images = [image for image in load_image_index(artifact or pdf_name) if not image["decorative"]]
+    image_docs = build_image_documents(images, pdf_name)
 
     if not image_docs:
-        return
+        return []
 
-    # Enrich with OCR / captions
+    # Enrich with OCR / captions; stored per image_id so queries never re-OCR
     enriched_docs = vision_agent_enrich(image_docs)
 
-    vectordb.add_documents(enriched_docs)
-    vectordb.persist()
-    print('images also ingected')
+    return tag_importance([
+        {
+            "id": make_chunk_id(content_hash or pdf_name, "image", 0, doc.metadata["image_id"]),
+            "document": doc.page_content,
+            "metadata": dict(doc.metadata)
+        }
+        for doc in enriched_docs
+    ], category)
+
+def ingest_image_embeddings(pdf_name: str, content_hash: str | None = None):
+    """
+    One-time image understanding + embedding into the vector index.
+    Called during ingestion only.
+    """
+    ids = store_chunks_in_chroma(build_image_chunks(pdf_name, content_hash))
+    return ids
 
 
 # ---------------- Step 2B: Process Single PDF ----------------
+def record_artifact(record) -> str:
+    """Artifact name of a catalog record (set by run_pipeline; standalone callers get the PDF stem)."""
+    return record.get("artifact") or Path(record["path"]).stem
+
 def process_pdf(record):
     pdf_path = record["path"]
-    pdf_name = Path(pdf_path).stem
+    artifact = record_artifact(record)
+    image_index = {}
 
-    text_pages = extract_text(pdf_path)
-    tables = extract_tables(pdf_path)
-    images = extract_images(pdf_path, pdf_name)
+    # Single pass: each page is extracted and written out before the next is loaded
+    with RecordWriter(TEXT_DIR / f"{artifact}{RECORD_SUFFIX}") as text_out, \
+            RecordWriter(TABLE_DIR / f"{artifact}{RECORD_SUFFIX}") as table_out:
+        for page in iter_pdf_pages(pdf_path, artifact):
+            text_out.write({"page": page["page"], "text": page["text"]})
+            for table in page["tables"]:
+                table_out.write(table)
+            collect_image_refs(image_index, page["images"])
 
-    # Save processed data
-    with open(TEXT_DIR / f"{pdf_name}.json", "w", encoding="utf-8") as f:
-        json.dump(text_pages, f, indent=4)
-    with open(TABLE_DIR / f"{pdf_name}.json", "w", encoding="utf-8") as f:
-        json.dump(tables, f, indent=4)
+    image_count = write_image_index(artifact, image_index)
 
     record.update({
         "ingestion_status": "COMPLETED",
-        "pages": len(text_pages),
-        "tables": len(tables),
-        "images": len(images)
+        "pages": text_out.count,
+        "tables": table_out.count,
+        "images": image_count
     })
 
-# ---------------- Step 3: Chunking ----------------
-def chunk_text(text, chunk_size=500, overlap=50):
-    tokens = tokenizer.encode(text)
-    chunks = []
-    start = 0
-    while start < len(tokens):
-        end = start + chunk_size
-        chunk_tokens = tokens[start:end]
-        chunks.append(tokenizer.decode(chunk_tokens))
-        start += chunk_size - overlap
-    return chunks
-
-def build_chunks(pdf_name):
-    chunk_records = []
+# ---------------- Step 2C: Parallel Extraction ----------------
+def plan_page_ranges(pdf_path):
+    """Splits large documents into page ranges so one PDF can use several workers."""
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+    if page_count <= PAGE_SPLIT_THRESHOLD:
+        return [(0, page_count)]
+    return [
+        (start, min(start + PAGE_RANGE_SIZE, page_count))
+        for start in range(0, page_count, PAGE_RANGE_SIZE)
+    ]
+
+def extract_page_range(pdf_path, artifact, start, end):
+    """Worker entry point: OCR + table + image extraction for one page range."""
+    text_pages, tables, image_refs = [], [], []
+    for page in iter_pdf_pages(pdf_path, artifact, page_range=(start, end)):
+        text_pages.append({"page": page["page"], "text": page["text"]})
+        tables.extend(page["tables"])
+        image_refs.extend(page["images"])
+    return text_pages, tables, image_refs
+
+def write_extraction(record, range_results):
+    """Writes worker results for one PDF in page order (single writer)."""
+    artifact = record_artifact(record)
+    image_index = {}
+
+    with RecordWriter(TEXT_DIR / f"{artifact}{RECORD_SUFFIX}") as text_out, \
+            RecordWriter(TABLE_DIR / f"{artifact}{RECORD_SUFFIX}") as table_out:
+        for text_pages, tables, image_refs in range_results:
+            for page in text_pages:
+                text_out.write(page)
+            for table in tables:
+                table_out.write(table)
+            # Workers dedup within their page range; content-hash ids merge across ranges
+            collect_image_refs(image_index, image_refs)
+
+    image_count = write_image_index(artifact, image_index)
+
+    record.update({
+        "ingestion_status": "COMPLETED",
+        "pages": text_out.count,
+        "tables": table_out.count,
+        "images": image_count
+    })
 
-    # Text chunks
-    with open(TEXT_DIR / f"{pdf_name}.json", "r", encoding="utf-8") as f:
-        pages = json.load(f)
+def iter_parallel_extractions(records, workers):
+    """
+    Fans page ranges of all records out to a process pool and yields
+    (record, range_results) in catalog order. At most workers * 4 ranges
+    are in flight, so finished results never pile up in memory while
+    the caller is embedding.
+    """
+    tasks = iter([
+        (record, start, end)
+        for record in records
+        for start, end in plan_page_ranges(record["path"])
+    ])
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+
+        def submit_next():
+            task = next(tasks, None)
+            if task is not None:
+                record, start, end = task
+                future = executor.submit(
+                    extract_page_range, record["path"], record_artifact(record), start, end
+                )
+                in_flight.append((record, future))
+
+        for _ in range(workers * 4):
+            submit_next()
+
+        current, results = None, []
+        while in_flight:
+            record, future = in_flight.popleft()
+            submit_next()
+            if current is not None and record is not current:
+                yield current, results
+                results = []
+            current = record
+            results.append(future.result())
+
+        if current is not None:
+            yield current, results
 
-    for page in pages:
-        for chunk in chunk_text(page["text"]):
-            chunk_records.append({
-                "id": str(uuid.uuid4()),
-                "document": chunk,
-                "metadata": {"pdf_name": pdf_name, "type": "text", "page": page["page"]}
-            })
+# ---------------- Step 3: Chunking ----------------
+def chunk_text(text, chunk_size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_OVERLAP):
+    return [
+        chunk["text"]
+        for chunk in chunk_pages([{"page": None, "text": text}], tokenizer.get(), chunk_size, overlap)
+    ]
+
+def build_chunks(pdf_name, content_hash: str | None = None, category: str | None = None,
+                 artifact: str | None = None):
+    """
+    Chunk ids are derived from (pdf content hash, type, page, index) so
+    re-ingesting the same PDF upserts the same vectors. Every chunk is
+    tagged with the important terms it mentions (category keyword set).
+    Records are read from and written under `artifact` (default: pdf_name).
+    """
+    chunk_records = []
+    id_seed = content_hash or pdf_name
+    artifact = artifact or pdf_name
+
+    # Text chunks (only the page text is kept in memory, records are streamed)
+    pages = [{"page": page["page"], "text": page["text"]} for page in iter_artifact(TEXT_DIR, artifact)]
+
+    # Whole document in one tokenizer batch; chunks may span short pages
+    for idx, chunk in enumerate(chunk_pages(pages, tokenizer.get())):
+        first_page = chunk["pages"][0]
+        chunk_records.append({
+            "id": make_chunk_id(id_seed, "text", first_page, idx),
+            "document": chunk["text"],
+            "metadata": {
+                "pdf_name": pdf_name,
+                "type": "text",
+                "page": first_page,
+                "pages": ",".join(str(p) for p in chunk["pages"])
+            }
+        })
 
     # Table chunks
-    table_file = TABLE_DIR / f"{pdf_name}.json"
-    if table_file.exists():
-        with open(table_file, "r", encoding="utf-8") as f:
-            tables = json.load(f)
-        for table in tables:
-            table_text = "\n".join([
-                " | ".join([str(cell).strip() if cell else "" for cell in row])
-                for row in table["rows"] if row and any(cell is not None for cell in row)
-            ])
-            chunk_records.append({
-                "id": str(uuid.uuid4()),
-                "document": table_text,
-                "metadata": {"pdf_name": pdf_name, "type": "table", "page": table["page"]}
-            })
+    for table in iter_artifact(TABLE_DIR, artifact):
+        table_text = "\n".join([
+            " | ".join([str(cell).strip() if cell else "" for cell in row])
+            for row in table["rows"] if row and any(cell is not None for cell in row)
+        ])
+        chunk_records.append({
+            "id": make_chunk_id(id_seed, "table", table["page"], table["table_id"]),
+            "document": table_text,
+            "metadata": {"pdf_name": pdf_name, "type": "table", "page": table["page"]}
+        })
+
+    tag_importance(chunk_records, category)
 
     # Save chunk file
-    with open(CHUNK_DIR / f"{pdf_name}.json", "w", encoding="utf-8") as f:
-        json.dump(chunk_records, f, indent=4)
+    with RecordWriter(CHUNK_DIR / f"{artifact}{RECORD_SUFFIX}") as chunk_out:
+        for chunk in chunk_records:
+            chunk_out.write(chunk)
 
-    print(f"[DEBUG] {len(chunk_records)} chunks built for {pdf_name}")
+    logger.debug("%d chunks built for %s", len(chunk_records), pdf_name)
     return chunk_records
 
-# ---------------- Step 4: Store in Chroma ----------------
-def store_chunks_in_chroma(chunks):
+# ---------------- Step 4: Store in the Vector Index ----------------
+def store_chunks_in_chroma(chunks, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Standalone upsert of a list of chunks. run_pipeline() instead keeps a
+    single EmbeddingWriter open across PDFs so batches span documents.
+    """
     if not chunks:
-        print("[WARNING] No chunks to store")
-        return
-
-    texts = [c["document"] for c in chunks]
-    metadatas = [c["metadata"] for c in chunks]
+        logger.warning("No chunks to store")
+        return []
 
-    vectordb = Chroma.from_texts(
-        texts=texts,
-        embedding=embedding,
-        metadatas=metadatas,
-        persist_directory=str(VECTOR_DB_DIR),
-        collection_name="enterprise_rag_documents"
-    )
+    with get_embedding_writer(batch_size) as writer:
+        ids = writer.add(None, chunks)
 
-    vectordb.persist()
-    print(f"[DEBUG] {len(chunks)} chunks stored in Chroma.")
+    logger.debug("%d chunks stored in the vector index", len(chunks))
+    return ids
 
 # ---------------- Pipeline Orchestrator ----------------
-def run_pipeline():
-    records = build_pdf_catalog()
-    for record in records:
-        if record["ingestion_status"] == "PENDING":
+def load_chunks(artifact):
+    return list(iter_artifact(CHUNK_DIR, artifact))
+
+def catalog_metadata(record) -> dict:
+    """Catalog fields stamped on every chunk of a PDF so retrieval can filter on them."""
+    return {"category": record["category"], "ingested_at": int(time.time())}
+
+def with_metadata(chunks: list, metadata: dict) -> list:
+    return [{**chunk, "metadata": {**chunk["metadata"], **metadata}} for chunk in chunks]
+
+def ingest_record(record, manifest: IngestionManifest, writer: EmbeddingWriter, range_results=None):
+    """
+    Runs the stages of a single PDF that are not yet recorded as done,
+    saving the manifest after every stage so an interrupted run resumes.
+    range_results carries extraction already done by worker processes.
+    Embedding is queued on the writer; the embed/images stages are marked
+    once the writer reports their chunks as stored (see mark_written).
+    """
+    key = record["manifest_key"]
+    pdf_name = Path(record["pdf_name"]).stem
+    artifact = record["artifact"]
+    content_hash = record["content_hash"]
+
+    if not manifest.stage_done(key, "extract"):
+        if range_results is not None:
+            write_extraction(record, range_results)
+        else:
             process_pdf(record)
-            pdf_name = Path(record["pdf_name"]).stem
-            chunks = build_chunks(pdf_name)
-            store_chunks_in_chroma(chunks)
-            ingest_image_embeddings(pdf_name)
-            record["chunks"] = len(chunks)
-            record["ingestion_status"] = "COMPLETED"
+        manifest.update_stats(key, {k: record[k] for k in ("pages", "tables", "images")})
+        manifest.mark_stage(key, "extract")
+        manifest.save()
+
+    if manifest.stage_done(key, "chunk"):
+        chunks = load_chunks(artifact)
+    else:
+        chunks = build_chunks(pdf_name, content_hash, record.get("category"), artifact)
+        manifest.mark_stage(key, "chunk")
+        manifest.save()
+
+    common = catalog_metadata(record)
+    if not manifest.stage_done(key, "embed"):
+        manifest.add_vector_ids(key, writer.add((key, "embed"), with_metadata(chunks, common)))
+
+    if not manifest.stage_done(key, "images"):
+        image_chunks = with_metadata(build_image_chunks(pdf_name, content_hash, record.get("category"), artifact), common)
+        manifest.add_vector_ids(key, writer.add((key, "images"), image_chunks))
+
+    manifest.update_stats(key, {"chunks": len(chunks)})
+    mark_written(writer, manifest)
+
+    record.update(manifest.get(key).get("stats", {}))
+    record["ingestion_status"] = "COMPLETED"
+
+def mark_written(writer: EmbeddingWriter, manifest: IngestionManifest):
+    for key, stage in writer.completed():
+        manifest.mark_stage(key, stage)
+    manifest.save()
+
+def run_pipeline(workers: int = INGESTION_WORKERS, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    workers > 1 fans extraction (OCR, tables, images) out to a process
+    pool by PDF and page range; chunking and the vector index write stay in
+    this process as a single ordered writer.
+    """
+    manifest = IngestionManifest(MANIFEST_FILE)
+    records = build_pdf_catalog(manifest)
+
+    # PDFs deleted from raw_pdfs: drop their vectors and artifacts
+    present = {record["manifest_key"] for record in records}
+    for key in manifest.keys():
+        if key not in present:
+            remove_pdf_artifacts(manifest.remove(key))
+    manifest.save()
+
+    pending = []
+    for record in records:
+        key = record["manifest_key"]
+        fingerprint = {k: record[k] for k in ("content_hash", "size", "mtime")}
+
+        if record["ingestion_status"] == "COMPLETED":
+            manifest.touch(key, fingerprint)
+            continue
+
+        if record["ingestion_status"] == "CHANGED":
+            remove_pdf_artifacts(manifest.get(key))
+            manifest.start(key, record, fingerprint)
+        elif manifest.get(key) is None:
+            manifest.start(key, record, fingerprint)
+        else:
+            manifest.touch(key, fingerprint)
+
+        record["artifact"] = entry_artifact(manifest.get(key))
+        pending.append(record)
+
+    # One writer for the whole run: batches span PDFs and embedding
+    # overlaps with extraction of the next document
+    writer = get_embedding_writer(batch_size)
+    try:
+        if workers > 1:
+            to_extract = [r for r in pending if not manifest.stage_done(r["manifest_key"], "extract")]
+            for record, range_results in iter_parallel_extractions(to_extract, workers):
+                ingest_record(record, manifest, writer, range_results)
+            extracted = {r["manifest_key"] for r in to_extract}
+            for record in pending:
+                if record["manifest_key"] not in extracted:
+                    ingest_record(record, manifest, writer)
+        else:
+            for record in pending:
+                ingest_record(record, manifest, writer)
+    finally:
+        writer.close()
+        mark_written(writer, manifest)
+
+    logger.debug("Embedding stats: %s", writer.stats())
+    logger.debug("%d PDFs ingested, %d unchanged PDFs skipped", len(pending), len(records) - len(pending))
 
     # Update catalog
     with open(CATALOG_FILE, "w", encoding="utf-8") as f:
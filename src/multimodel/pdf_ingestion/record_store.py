@@ -0,0 +1,132 @@
+"""
+record_store.py
+
+Compact intermediate storage for processed_pdfs (text pages, tables, chunks).
+
+File layout (.mpk):
+    MAGIC | (uint32 little-endian length | msgpack record)*
+
+- RecordWriter streams records to disk one at a time (atomic rename on close)
+- iter_records() memory-maps the file and decodes one record at a time,
+  so re-chunking / re-embedding jobs never load a whole file
+- convert_json_dir() is the one-time converter for legacy indented JSON
+
+One-time conversion of existing artifacts (from the repository root):
+    python -m src.multimodel.pdf_ingestion.record_store
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+import msgpack
+
+MAGIC = b"MRAGREC1"
+RECORD_SUFFIX = ".mpk"
+_LENGTH = struct.Struct("<I")
+
+
+# ---------------- Writer ----------------
+class RecordWriter:
+    """
+    Streams records to <path>; the file only appears under its final
+    name once the writer closes without an error.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        self.count = 0
+        self._packer = msgpack.Packer(use_bin_type=True)
+
+    def __enter__(self):
+        self.f = open(self.tmp_path, "wb")
+        self.f.write(MAGIC)
+        return self
+
+    def write(self, record):
+        payload = self._packer.pack(record)
+        self.f.write(_LENGTH.pack(len(payload)))
+        self.f.write(payload)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self.f.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        else:
+            self.tmp_path.unlink(missing_ok=True)
+
+
+def write_records(path, records) -> int:
+    with RecordWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+# ---------------- Reader ----------------
+def iter_records(path):
+    """Yields records one by one from a memory-mapped .mpk file."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < len(MAGIC):
+            raise ValueError(f"Not a record file: {path}")
+        if size == len(MAGIC):
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"Not a record file: {path}")
+
+            pos = len(MAGIC)
+            while pos < size:
+                (length,) = _LENGTH.unpack_from(mm, pos)
+                pos += _LENGTH.size
+                yield msgpack.unpackb(mm[pos:pos + length], raw=False)
+                pos += length
+
+
+def iter_artifact(directory: Path, name: str):
+    """
+    Records of processed artifact <name> in <directory>, read from the
+    compact file or, for artifacts not yet converted, from legacy JSON.
+    """
+    record_file = Path(directory) / f"{name}{RECORD_SUFFIX}"
+    if record_file.exists():
+        yield from iter_records(record_file)
+        return
+
+    json_file = Path(directory) / f"{name}.json"
+    if json_file.exists():
+        with open(json_file, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+
+
+# ---------------- Legacy Conversion ----------------
+def convert_json_dir(directory: Path, remove_json: bool = True) -> int:
+    """Converts every <name>.json array in directory to <name>.mpk."""
+    converted = 0
+    for json_file in sorted(Path(directory).glob("*.json")):
+        with open(json_file, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        write_records(json_file.with_suffix(RECORD_SUFFIX), records)
+        if remove_json:
+            json_file.unlink()
+        converted += 1
+    return converted
+
+
+if __name__ == "__main__":
+    processed_dir = Path(__file__).parent / "processed_pdfs"
+    directories = [Path(d) for d in sys.argv[1:]] or [
+        processed_dir / "text",
+        processed_dir / "tables",
+        processed_dir / "chunks",
+    ]
+    for directory in directories:
+        if directory.exists():
+            print(f"Converted {convert_json_dir(directory)} JSON files in {directory}")
@@ -0,0 +1,139 @@
+"""
+synthetic_pdfs.py
+
+Reproducible synthetic PDF corpus for ingestion benchmarks.
+
+Kinds:
+- text    : born-digital text pages
+- scanned : pages rendered to images only (forces the OCR fallback)
+- table   : ruled tables with text cells (picked up by find_tables)
+- image   : several raster images per page plus a repeated logo
+
+Same (kind, pages, seed) always produces the same document.
+"""
+
+import random
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+PDF_KINDS = ("text", "scanned", "table", "image")
+
+VOCABULARY = (
+    "revenue operating profit interest tax liability compliance risk payment "
+    "deadline penalty termination contract invoice quarter annual report board "
+    "directors capital assets liabilities provision audit statement customer "
+    "loan deposit branch credit margin growth segment review policy"
+).split()
+
+PAGE_RECT = fitz.paper_rect("a4")
+MARGIN = 50
+
+
+# ---------------- Content Helpers ----------------
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    out = []
+    for _ in range(sentences):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(8, 18))]
+        out.append(" ".join(words).capitalize() + ".")
+    return " ".join(out)
+
+
+def _page_text(rng: random.Random) -> str:
+    return "\n\n".join(_paragraph(rng, rng.randint(3, 6)) for _ in range(4))
+
+
+def _text_area():
+    return fitz.Rect(MARGIN, MARGIN, PAGE_RECT.width - MARGIN, PAGE_RECT.height - MARGIN)
+
+
+def _random_pixmap(rng: random.Random, width: int, height: int):
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), False)
+    pix.clear_with(255)
+    block = max(width, height) // 8
+    for _ in range(24):
+        x, y = rng.randrange(0, width), rng.randrange(0, height)
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        pix.set_rect(fitz.IRect(x, y, min(x + block, width), min(y + block, height)), color)
+    return pix
+
+
+# ---------------- Page Builders ----------------
+def _add_text_page(doc, rng):
+    page = doc.new_page(width=PAGE_RECT.width, height=PAGE_RECT.height)
+    page.insert_textbox(_text_area(), _page_text(rng), fontsize=9)
+
+
+def _add_scanned_page(doc, rng):
+    scratch = fitz.open()
+    _add_text_page(scratch, rng)
+    pix = scratch[0].get_pixmap(dpi=150)
+    scratch.close()
+
+    page = doc.new_page(width=PAGE_RECT.width, height=PAGE_RECT.height)
+    page.insert_image(page.rect, pixmap=pix)
+
+
+def _add_table_page(doc, rng, rows=12, cols=5):
+    page = doc.new_page(width=PAGE_RECT.width, height=PAGE_RECT.height)
+    for t in range(2):
+        top = MARGIN + t * 360
+        cell_w = (PAGE_RECT.width - 2 * MARGIN) / cols
+        cell_h = 24
+        for r in range(rows + 1):
+            y = top + r * cell_h
+            page.draw_line((MARGIN, y), (PAGE_RECT.width - MARGIN, y))
+        for c in range(cols + 1):
+            x = MARGIN + c * cell_w
+            page.draw_line((x, top), (x, top + rows * cell_h))
+        for r in range(rows):
+            for c in range(cols):
+                value = rng.choice(VOCABULARY) if r == 0 or c == 0 else f"{rng.uniform(0, 99999):.2f}"
+                page.insert_text((MARGIN + c * cell_w + 4, top + r * cell_h + 16), value, fontsize=8)
+
+
+def _add_image_page(doc, rng, logo):
+    page = doc.new_page(width=PAGE_RECT.width, height=PAGE_RECT.height)
+    # Repeated header logo: exercises image dedup / decorative filtering
+    page.insert_image(fitz.Rect(MARGIN, 10, MARGIN + 60, 40), pixmap=logo)
+    for i in range(4):
+        top = MARGIN + i * 180
+        pix = _random_pixmap(rng, rng.randint(200, 400), rng.randint(150, 300))
+        page.insert_image(fitz.Rect(MARGIN, top, MARGIN + 240, top + 160), pixmap=pix)
+    page.insert_textbox(fitz.Rect(320, MARGIN, PAGE_RECT.width - MARGIN, 400), _paragraph(rng, 4), fontsize=9)
+
+
+# ---------------- Corpus ----------------
+def generate_pdf(path: Path, kind: str, pages: int, seed: int = 0) -> Path:
+    if kind not in PDF_KINDS:
+        raise ValueError(f"Unknown PDF kind: {kind}")
+
+    rng = random.Random(f"{kind}:{pages}:{seed}")
+    logo = _random_pixmap(random.Random(seed), 120, 60)
+
+    doc = fitz.open()
+    for _ in range(pages):
+        if kind == "text":
+            _add_text_page(doc, rng)
+        elif kind == "scanned":
+            _add_scanned_page(doc, rng)
+        elif kind == "table":
+            _add_table_page(doc, rng)
+        else:
+            _add_image_page(doc, rng, logo)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Fixed metadata keeps the output byte-for-byte reproducible
+    doc.set_metadata({"producer": "synthetic_pdfs", "creationDate": "", "modDate": ""})
+    doc.save(str(path), garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+    return path
+
+
+def generate_corpus(out_dir: Path, pages: int = 10, seed: int = 0, kinds=PDF_KINDS) -> list[dict]:
+    corpus = []
+    for kind in kinds:
+        path = generate_pdf(Path(out_dir) / f"synthetic_{kind}_{pages}p.pdf", kind, pages, seed)
+        corpus.append({"kind": kind, "pages": pages, "path": str(path)})
+    return corpus
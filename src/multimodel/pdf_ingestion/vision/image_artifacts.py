@@ -0,0 +1,93 @@
+"""
+image_artifacts.py
+
+Per-image understanding results, produced once at ingestion and read by
+the query path instead of re-running OCR.
+
+Key   = image_id (content hash of the image bytes, see extract_page_images)
+Value = caption, OCR text and basic image features
+
+Stored in SQLite next to the OCR cache (safe across threads and
+ingestion worker processes). Entries are content-addressed, so an image
+shared by several PDFs is processed once and never goes stale.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+IMAGE_ARTIFACTS_PATH = Path(os.getenv(
+    "IMAGE_ARTIFACTS_PATH",
+    str(Path(__file__).resolve().parent.parent / "metadata" / "image_artifacts.sqlite")
+))
+# SQLite bound-parameter limit is 999 on older builds
+LOOKUP_BATCH = 500
+
+_lock = threading.Lock()
+_conn: sqlite3.Connection | None = None
+_conn_pid: int | None = None
+
+stats = {"hits": 0, "misses": 0}
+
+
+# ---------------- Storage ----------------
+def _connection() -> sqlite3.Connection:
+    global _conn, _conn_pid
+    # Connections must not cross a fork into ingestion worker processes
+    if _conn is None or _conn_pid != os.getpid():
+        IMAGE_ARTIFACTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(str(IMAGE_ARTIFACTS_PATH), timeout=30, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS image_artifacts ("
+            " image_id TEXT PRIMARY KEY,"
+            " caption TEXT NOT NULL,"
+            " ocr_text TEXT NOT NULL,"
+            " features TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        _conn.commit()
+        _conn_pid = os.getpid()
+    return _conn
+
+
+# ---------------- Public API ----------------
+def get_artifacts(image_ids: list[str]) -> dict[str, dict]:
+    """image_id -> {"caption", "ocr_text", "features"} for every stored image among image_ids."""
+    wanted = list(dict.fromkeys(i for i in image_ids if i))
+    found = {}
+    with _lock:
+        conn = _connection()
+        for start in range(0, len(wanted), LOOKUP_BATCH):
+            batch = wanted[start:start + LOOKUP_BATCH]
+            rows = conn.execute(
+                "SELECT image_id, caption, ocr_text, features FROM image_artifacts"
+                f" WHERE image_id IN ({','.join('?' * len(batch))})",
+                batch
+            ).fetchall()
+            for image_id, caption, ocr_text, features in rows:
+                found[image_id] = {"caption": caption, "ocr_text": ocr_text, "features": json.loads(features)}
+        stats["hits"] += len(found)
+        stats["misses"] += len(wanted) - len(found)
+    return found
+
+
+def put_artifacts(artifacts: dict[str, dict]):
+    """Stores image_id -> {"caption", "ocr_text", "features"}."""
+    if not artifacts:
+        return
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        conn.executemany(
+            "INSERT OR REPLACE INTO image_artifacts (image_id, caption, ocr_text, features, created_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [
+                (image_id, a["caption"], a["ocr_text"], json.dumps(a["features"]), now)
+                for image_id, a in artifacts.items()
+            ]
+        )
+        conn.commit()
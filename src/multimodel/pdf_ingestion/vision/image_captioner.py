@@ -1,20 +1,40 @@
+import os
+
 from PIL import Image
-import pytesseract
 
-def generate_image_caption(image_path: str) -> str:
+from ..vision.ocr_cache import cached_image_to_string
+
+def describe_image(image_path: str) -> dict:
     """
-    Enterprise-safe vision extraction:
-    OCR-first + semantic fallback placeholder
-    (LLM/Vision models can replace later)
+    Caption, OCR text and basic features of one image
+    (the record stored per image_id in image_artifacts).
     """
     try:
         image = Image.open(image_path)
-        ocr_text = pytesseract.image_to_string(image).strip()
+        features = {
+            "width": image.width,
+            "height": image.height,
+            "mode": image.mode,
+            "format": image.format,
+            "bytes": os.path.getsize(image_path),
+        }
+        ocr_text = cached_image_to_string(image).strip()
 
         if ocr_text:
-            return f"OCR Extracted Content: {ocr_text}"
+            caption = f"OCR Extracted Content: {ocr_text}"
+        else:
+            caption = "Image contains non-textual visual information (diagram/chart)."
 
-        return "Image contains non-textual visual information (diagram/chart)."
+        return {"caption": caption, "ocr_text": ocr_text, "features": features}
 
     except Exception as e:
-        return f"Image processing error: {str(e)}"
+        return {"caption": f"Image processing error: {str(e)}", "ocr_text": "", "features": {}, "error": True}
+
+
+def generate_image_caption(image_path: str) -> str:
+    """
+    Enterprise-safe vision extraction:
+    OCR-first + semantic fallback placeholder
+    (LLM/Vision models can replace later)
+    """
+    return describe_image(image_path)["caption"]
@@ -1,18 +1,24 @@
-import uuid
-from pathlib import Path
 from langchain_core.documents import Document
 
-def build_image_documents(image_dir: Path, pdf_name: str):
+def build_image_documents(images: list[dict], pdf_name: str):
+    """
+    One document per unique image from the PDF's image index.
+    `pages` keeps back-references to every page the image appears on
+    (comma-separated, since Chroma metadata values must be scalars).
+    """
     image_docs = []
 
-    for img_path in image_dir.glob(f"{pdf_name}_*.png"):
+    for image in images:
         image_docs.append(
             Document(
                 page_content="",  # filled by captioner
                 metadata={
                     "pdf_name": pdf_name,
                     "type": "image",
-                    "image_path": str(img_path)
+                    "image_id": image["image_id"],
+                    "image_path": image["path"],
+                    "page": image["pages"][0],
+                    "pages": ",".join(str(p) for p in image["pages"])
                 }
             )
         )
@@ -0,0 +1,139 @@
+"""
+ocr_cache.py
+
+Persistent, content-addressed OCR cache shared by ingestion and the
+query path.
+
+Key  = sha256(rendered pixels + image mode/size + OCR config + tesseract version)
+Value = OCR text
+
+Stored in SQLite (safe across threads and ingestion worker processes),
+bounded by OCR_CACHE_MAX_BYTES with least-recently-used eviction.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pytesseract
+
+OCR_CACHE_PATH = Path(os.getenv(
+    "OCR_CACHE_PATH",
+    str(Path(__file__).resolve().parent.parent / "metadata" / "ocr_cache.sqlite")
+))
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Size check / eviction runs every N inserts instead of on every write
+EVICT_CHECK_EVERY = 100
+
+_lock = threading.Lock()
+_conn: sqlite3.Connection | None = None
+_conn_pid: int | None = None
+_inserts = 0
+_tesseract_version: str | None = None
+
+stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+# ---------------- Storage ----------------
+def _connection() -> sqlite3.Connection:
+    global _conn, _conn_pid
+    # Connections must not cross a fork into ingestion worker processes
+    if _conn is None or _conn_pid != os.getpid():
+        OCR_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(str(OCR_CACHE_PATH), timeout=30, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_cache ("
+            " key TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_lru ON ocr_cache(last_access)")
+        _conn.commit()
+        _conn_pid = os.getpid()
+    return _conn
+
+
+def _evict(conn: sqlite3.Connection):
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+    if total <= OCR_CACHE_MAX_BYTES:
+        return
+
+    # Drop least-recently-used entries until the cache is back under 90% of the bound
+    target = int(OCR_CACHE_MAX_BYTES * 0.9)
+    rows = conn.execute("SELECT key, size FROM ocr_cache ORDER BY last_access").fetchall()
+    victims = []
+    for key, size in rows:
+        if total <= target:
+            break
+        victims.append((key,))
+        total -= size
+
+    conn.executemany("DELETE FROM ocr_cache WHERE key = ?", victims)
+    stats["evictions"] += len(victims)
+
+
+# ---------------- Keys ----------------
+def _ocr_engine_version() -> str:
+    global _tesseract_version
+    if _tesseract_version is None:
+        try:
+            _tesseract_version = str(pytesseract.get_tesseract_version())
+        except Exception:
+            _tesseract_version = "unknown"
+    return _tesseract_version
+
+
+def image_cache_key(image, lang: str | None = None, config: str = "") -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{image.mode}|{image.size}|{lang}|{config}|{_ocr_engine_version()}".encode("utf-8"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+# ---------------- Public API ----------------
+def get_cached_text(key: str) -> str | None:
+    with _lock:
+        conn = _connection()
+        row = conn.execute("SELECT text FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            stats["misses"] += 1
+            return None
+        conn.execute("UPDATE ocr_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+        conn.commit()
+        stats["hits"] += 1
+        return row[0]
+
+
+def put_cached_text(key: str, text: str):
+    global _inserts
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO ocr_cache (key, text, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, text, len(text.encode("utf-8")), time.time())
+        )
+        _inserts += 1
+        if _inserts % EVICT_CHECK_EVERY == 0:
+            _evict(conn)
+        conn.commit()
+
+
+def cached_image_to_string(image, lang: str | None = None, config: str = "") -> str:
+    """
+    Drop-in replacement for pytesseract.image_to_string that never OCRs
+    the same pixels (with the same OCR config) twice.
+    """
+    key = image_cache_key(image, lang, config)
+    text = get_cached_text(key)
+    if text is None:
+        kwargs = {"config": config}
+        if lang:
+            kwargs["lang"] = lang
+        text = pytesseract.image_to_string(image, **kwargs)
+        put_cached_text(key, text)
+    return text
@@ -1,24 +1,48 @@
-from ..vision.image_captioner import generate_image_caption
+from ..vision.image_captioner import describe_image
+from ..vision.image_artifacts import get_artifacts, put_artifacts
 from langchain_core.documents import Document
 
 def vision_agent_enrich(documents: list[Document]) -> list[Document]:
     """
-    Enrich image documents with textual meaning
+    Enrich image documents with textual meaning.
+
+    Captions come from the per-image artifacts written at ingestion (one
+    lookup for all image hits). Image chunks indexed before artifacts
+    existed already carry their caption as page_content and are kept
+    as is; only images that were never processed are OCR'd live, and
+    their artifacts are stored for next time.
     """
+    image_ids = [
+        doc.metadata.get("image_id")
+        for doc in documents
+        if doc.metadata.get("type") == "image"
+    ]
+    artifacts = get_artifacts(image_ids) if image_ids else {}
+
+    processed = {}
     enriched_docs = []
 
     for doc in documents:
         if doc.metadata.get("type") == "image":
-            image_path = doc.metadata.get("image_path")
-            caption = generate_image_caption(image_path)
+            image_id = doc.metadata.get("image_id")
+            artifact = artifacts.get(image_id)
+            if artifact is None and doc.page_content:
+                enriched_docs.append(doc)
+                continue
+            if artifact is None:
+                artifact = describe_image(doc.metadata.get("image_path"))
+                # Failures (e.g. a missing file) are retried next time
+                if image_id and not artifact.get("error"):
+                    artifacts[image_id] = processed[image_id] = artifact
 
             enriched_docs.append(
                 Document(
-                    page_content=caption,
+                    page_content=artifact["caption"],
                     metadata=doc.metadata
                 )
             )
         else:
             enriched_docs.append(doc)
 
+    put_artifacts(processed)
     return enriched_docs
@@ -0,0 +1,132 @@
+"""
+resource_registry.py
+
+Process-wide registry of heavy, lazily initialised resources (embedding
+model, vector store, LLM client, MLflow client, compiled graphs, ...).
+
+Modules declare their resources at import time with lazy_resource();
+nothing is loaded until the first get(), so importing a module stays
+cheap. warm_up() loads resources ahead of traffic (e.g. on server
+startup), and readiness() reports what is loaded and how long each
+load took.
+
+Optional resources (required=False, e.g. the MLflow client) do not gate
+readiness and are only warmed up when named explicitly, so an
+unreachable tracking server cannot stall startup.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+
+class LazyResource:
+    def __init__(self, name: str, factory, required: bool = True):
+        self.name = name
+        self.factory = factory
+        self.required = required
+
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded = False
+        self.load_seconds = None
+        self.error = None
+
+    def get(self):
+        """Returns the resource, building it on first use (thread-safe, once per process)."""
+        if self._loaded:
+            return self._value
+
+        with self._lock:
+            if not self._loaded:
+                started = time.perf_counter()
+                try:
+                    value = self.factory()
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise
+                self.load_seconds = time.perf_counter() - started
+                self._value = value
+                self.error = None
+                self._loaded = True
+                logger.debug("%s loaded in %.2fs", self.name, self.load_seconds)
+        return self._value
+
+    def set(self, value):
+        """Installs a ready-made value instead of calling the factory (benchmarks, tests)."""
+        with self._lock:
+            self._value = value
+            self._loaded = True
+            self.load_seconds = 0.0
+            self.error = None
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+            self._loaded = False
+            self.load_seconds = None
+            self.error = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def status(self) -> dict:
+        return {
+            "loaded": self._loaded,
+            "required": self.required,
+            "load_seconds": round(self.load_seconds, 4) if self.load_seconds is not None else None,
+            "error": self.error,
+        }
+
+
+RESOURCES: dict[str, LazyResource] = {}
+_warm_up_seconds: float | None = None
+
+
+def lazy_resource(name: str, factory, required: bool = True) -> LazyResource:
+    resource = LazyResource(name, factory, required)
+    RESOURCES[name] = resource
+    return resource
+
+
+def loaded_resources() -> list[str]:
+    return [name for name, resource in RESOURCES.items() if resource.loaded]
+
+
+def warm_up(names: list[str] | None = None) -> dict:
+    """
+    Loads the named resources (default: every required one) in parallel.
+    Failures are recorded in readiness(), not raised.
+    """
+    global _warm_up_seconds
+
+    def load(resource: LazyResource):
+        try:
+            resource.get()
+        except Exception as e:
+            logger.warning("Warm-up of %s failed: %s", resource.name, e)
+
+    if names:
+        resources = [RESOURCES[name] for name in names]
+    else:
+        resources = [r for r in RESOURCES.values() if r.required]
+    started = time.perf_counter()
+    if resources:
+        with ThreadPoolExecutor(max_workers=len(resources), thread_name_prefix="warm-up") as pool:
+            list(pool.map(load, resources))
+    _warm_up_seconds = time.perf_counter() - started
+    return readiness()
+
+
+def readiness() -> dict:
+    """ready is True once every required resource has loaded."""
+    return {
+        "ready": all(r.loaded for r in RESOURCES.values() if r.required),
+        "warm_up_seconds": round(_warm_up_seconds, 4) if _warm_up_seconds is not None else None,
+        "resources": {name: resource.status() for name, resource in RESOURCES.items()},
+    }
@@ -9,8 +9,7 @@ from typing import List
 from pydantic import BaseModel
 from retrieval import RetrievalService, RetrievalRequest, RetrievalResponse
 from pathlib import Path
-import smtplib
-from email.message import EmailMessage
+from email_agent import send_email_notification
 
 # ---------------- Agent Pydantic Models ----------------
 class NotificationRequest(BaseModel):
@@ -21,22 +20,15 @@ class NotificationRequest(BaseModel):
 # ---------------- Helper Email Function ----------------
 def send_email(request: NotificationRequest):
     """
-    Enterprise-ready SMTP send.
-    Replace with company SMTP config or MCP server integration.
+    Queues the notification on the shared alert outbox (email_agent),
+    which handles SMTP pooling, rate limits, digests and retries.
     """
-    msg = EmailMessage()
-    msg["From"] = "noreply@company.com"
-    msg["To"] = request.recipient_email
-    msg["Subject"] = request.subject
-    msg.set_content(request.body)
-
-    # Example SMTP (replace with real credentials / server)
-    try:
-        with smtplib.SMTP("localhost") as smtp:
-            smtp.send_message(msg)
-        print(f"[DEBUG] Email sent to {request.recipient_email}")
-    except Exception as e:
-        print(f"[ERROR] Could not send email: {e}")
+    send_email_notification(
+        to_email=request.recipient_email,
+        subject=request.subject,
+        body=request.body
+    )
+    print(f"[DEBUG] Email queued for {request.recipient_email}")
 
 # ---------------- Image Alert Agent ----------------
 def image_alert_agent(pdf_name: str, image_paths: List[str], user_email: str):
@@ -85,6 +77,12 @@ class RetrievalAgent:
         )
         return response.documents
 
+    def query_batch(self, user_queries: List[str], top_k: int = 5) -> List[List[str]]:
+        responses: List[RetrievalResponse] = self.service.query_batch(
+            [RetrievalRequest(query=q, top_k=top_k) for q in user_queries]
+        )
+        return [response.documents for response in responses]
+
 # ---------------- Example Orchestration ----------------
 def orchestrate_pdf_alert(pdf_name: str, image_paths: List[str], metadata: dict, user_email: str, query: str):
     """
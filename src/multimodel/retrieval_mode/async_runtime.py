@@ -0,0 +1,132 @@
+"""
+async_runtime.py
+
+Executors and helpers behind the async request path
+(RetrievalService.aquery, SupervisorService.arun, the async MCP endpoints).
+
+- Embedding / cross-encoder inference runs on a small dedicated executor,
+  so model work never competes with blocking I/O for threads
+- Blocking I/O (vector index reads, MLflow, SMTP, OCR) is awaited on a
+  larger I/O executor instead of holding an event-loop or uvicorn thread;
+  submit_background() runs work nobody waits for (audit, alerts) there too
+- Concurrent queries that miss the embedding cache are micro-batched into
+  one embed_documents call, so hundreds of in-flight requests cost a few
+  forward passes rather than one each
+"""
+
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- Configuration ----------------
+# Model inference releases the GIL inside torch / ONNX Runtime; a couple of
+# threads keep the cores busy without oversubscribing them
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "2"))
+BLOCKING_IO_WORKERS = int(os.getenv("BLOCKING_IO_WORKERS", "64"))
+# Queries arriving within this window share one embedding forward pass
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "2"))
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "64"))
+
+
+# ---------------- Executors ----------------
+embedding_executor = ThreadPoolExecutor(max_workers=EMBEDDING_WORKERS, thread_name_prefix="embedding")
+io_executor = ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS, thread_name_prefix="blocking-io")
+
+
+async def run_in(executor, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """Awaits model inference on the embedding executor."""
+    return await run_in(embedding_executor, fn, *args, **kwargs)
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Awaits a blocking I/O call on the I/O executor."""
+    return await run_in(io_executor, fn, *args, **kwargs)
+
+
+def submit_background(fn, *args, **kwargs):
+    """Runs fn on the I/O executor without waiting for it; failures are logged, not raised."""
+    future = io_executor.submit(fn, *args, **kwargs)
+    future.add_done_callback(_log_background_failure)
+    return future
+
+
+def _log_background_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Background task failed: %s", future.exception())
+
+
+# ---------------- Embedding Micro-Batcher ----------------
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embed() calls from one event loop into batched
+    embed_fn(texts) calls on the embedding executor. Not thread-safe:
+    embed() must be awaited from the loop that owns the batcher.
+    """
+
+    def __init__(self, embed_fn, max_batch: int = EMBED_BATCH_MAX, window_ms: float = EMBED_BATCH_WINDOW_MS):
+        self.embed_fn = embed_fn
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self.batches = 0
+        self.texts_embedded = 0
+
+        self._loop = None
+        self._pending = {}
+        self._timer = None
+
+    async def embed(self, text: str):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures of a previous loop (e.g. an earlier asyncio.run) are unusable
+            self._loop, self._pending, self._timer = loop, {}, None
+
+        future = self._pending.get(text)
+        if future is None:
+            future = self._pending[text] = loop.create_future()
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        texts = list(pending)
+        self.batches += 1
+        self.texts_embedded += len(texts)
+        batch = self._loop.run_in_executor(embedding_executor, self.embed_fn, texts)
+        batch.add_done_callback(functools.partial(self._resolve, pending))
+
+    @staticmethod
+    def _resolve(pending: dict, batch):
+        # A cancelled batch (e.g. executor shutdown) has no exception() to
+        # read; cancel the waiters instead of leaving them pending forever
+        cancelled = batch.cancelled()
+        error = None if cancelled else batch.exception()
+        vectors = None if cancelled or error else batch.result()
+        for i, future in enumerate(pending.values()):
+            if future.done():
+                continue
+            if cancelled:
+                future.cancel()
+            elif error:
+                future.set_exception(error)
+            else:
+                future.set_result(vectors[i])
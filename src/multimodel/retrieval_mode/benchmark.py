@@ -0,0 +1,496 @@
+"""
+benchmark.py
+
+Offline query-path benchmark and regression harness.
+
+Builds a synthetic collection (10k to millions of chunks, clustered
+vectors with matching text) in a throwaway vector index and BM25 sidecar,
+then replays a query set through each stage of the query path:
+
+- retrieval_node          : search + relevance threshold
+- service_query           : RetrievalService.query (graph, agents, audit, alert)
+- supervisor_run          : SupervisorService.run (full supervisor graph)
+- supervisor_arun         : SupervisorService.arun under asyncio concurrency
+
+and reports p50/p95/p99 latency, QPS at --concurrency, peak RSS and
+recall@k against exact brute-force search, as JSON.
+
+MLflow and SMTP are replaced by in-process recorders, and by default the
+embedder is synthetic (each query maps to a known vector, so no model is
+loaded). The query path never calls the LLM (llm.py). The real
+vector_store is never touched.
+
+--baseline compares against a stored report and exits with status 1
+when latency, QPS or recall regress beyond the tolerances.
+
+Usage (from the repository root):
+    python -m src.multimodel.retrieval_mode.benchmark --chunks 100000 --output baseline.json
+    python -m src.multimodel.retrieval_mode.benchmark --chunks 100000 --baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from .. import bm25_index, embedding_registry, vector_index
+from ..benchmark_utils import PeakRSS, latency_summary, process_peak_rss_mb
+from ..pdf_ingestion.synthetic_pdfs import VOCABULARY
+from ..retrieval_mode.query_cache import normalize_query
+
+STAGES = ("retrieval_node", "service_query", "supervisor_run", "supervisor_arun")
+COLLECTION_NAME = "retrieval_benchmark"
+BUILD_BATCH_ROWS = 50000
+CHUNKS_PER_PDF = 200
+# Noise around the cluster centre, as a fraction of the unit-norm centre
+CHUNK_SPREAD = 0.5
+QUERY_SPREAD = 0.2
+TOPIC_WORDS = 3
+
+# Regression tolerances for --baseline
+LATENCY_TOLERANCE = 0.2
+QPS_TOLERANCE = 0.2
+RECALL_TOLERANCE = 0.01
+
+
+# ---------------- Synthetic Collection ----------------
+def _unit(vectors):
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+class SyntheticCorpus:
+    """
+    Deterministic clustered corpus: chunk i belongs to cluster i % clusters,
+    its vector is the cluster centre plus noise and its text leads with the
+    cluster's topic words. Any batch can be regenerated independently.
+    """
+
+    def __init__(self, chunks: int, dim: int, clusters: int, seed: int = 0):
+        self.chunks = chunks
+        self.dim = dim
+        self.clusters = clusters
+        self.seed = seed
+
+        rng = np.random.default_rng([seed, 0])
+        self.centres = _unit(rng.normal(size=(clusters, dim)))
+        self.topics = [
+            " ".join(rng.choice(VOCABULARY, size=TOPIC_WORDS, replace=False)) for _ in range(clusters)
+        ]
+
+    @staticmethod
+    def chunk_id(row: int) -> str:
+        return f"bench-{row:09d}"
+
+    def _text(self, rng, cluster: int) -> str:
+        words = " ".join(rng.choice(VOCABULARY, size=12))
+        return f"{self.topics[cluster]} {words}"
+
+    def batch(self, start: int, end: int):
+        """(ids, vectors, documents, metadatas) for rows [start, end)."""
+        rng = np.random.default_rng([self.seed, 1, start])
+        rows = np.arange(start, end)
+        cluster = rows % self.clusters
+        noise = rng.normal(size=(len(rows), self.dim)) * CHUNK_SPREAD / np.sqrt(self.dim)
+        vectors = _unit(self.centres[cluster] + noise)
+
+        ids = [self.chunk_id(row) for row in rows.tolist()]
+        documents = [self._text(rng, c) for c in cluster.tolist()]
+        metadatas = [
+            {
+                "chunk_id": chunk_id,
+                "pdf_name": f"bench-{row // CHUNKS_PER_PDF}",
+                "page": (row % CHUNKS_PER_PDF) // 4 + 1,
+                "type": "table" if row % 10 == 0 else "text",
+                "category": "benchmark",
+                "ingested_at": 0,
+            }
+            for chunk_id, row in zip(ids, rows.tolist())
+        ]
+        return ids, vectors, documents, metadatas
+
+    def queries(self, count: int):
+        """(texts, vectors): one query near a random cluster centre each."""
+        rng = np.random.default_rng([self.seed, 2])
+        cluster = rng.integers(0, self.clusters, size=count)
+        noise = rng.normal(size=(count, self.dim)) * QUERY_SPREAD / np.sqrt(self.dim)
+        vectors = _unit(self.centres[cluster] + noise)
+        texts = [
+            f"{self.topics[c]} {' '.join(rng.choice(VOCABULARY, size=3))} q{i}"
+            for i, c in enumerate(cluster.tolist())
+        ]
+        return texts, vectors
+
+
+class SyntheticEmbeddings(Embeddings):
+    """
+    Embeddings stand-in for the query path: known query texts map to their
+    precomputed vectors, anything else to a hash-seeded unit vector.
+    """
+
+    def __init__(self, dim: int, known: dict | None = None):
+        self.dim = dim
+        self.known = {normalize_query(text): vector for text, vector in (known or {}).items()}
+
+    def _vector(self, text: str) -> list[float]:
+        vector = self.known.get(normalize_query(text))
+        if vector is None:
+            seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little")
+            vector = _unit(np.random.default_rng(seed).normal(size=(1, self.dim)))[0]
+        return vector.tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._vector(text)
+
+
+def build_collection(index, lexical, corpus: SyntheticCorpus, query_vectors, k: int, embedder=None) -> dict:
+    """
+    Streams the corpus into the index (and BM25 sidecar if given) batch by
+    batch while tracking the exact top-k of every query over the same
+    batches. Returns build metrics and the exact neighbour ids per query.
+    """
+    native = isinstance(index, vector_index.NumpyIndex)
+
+    def batches():
+        for start in range(0, corpus.chunks, BUILD_BATCH_ROWS):
+            end = min(start + BUILD_BATCH_ROWS, corpus.chunks)
+            ids, vectors, documents, metadatas = corpus.batch(start, end)
+            if embedder is not None:
+                vectors = np.asarray(embedder.embed_documents(documents), dtype=np.float32)
+            index.upsert(ids, vectors if native else vectors.tolist(), documents, metadatas)
+            if lexical is not None:
+                lexical.add([{"id": i, "document": d} for i, d in zip(ids, documents)])
+            yield np.arange(start, end), vectors, np.einsum("ij,ij->i", vectors, vectors), None
+
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        exact = vector_index._top_k(query_vectors, batches(), k)
+        load_seconds = time.perf_counter() - started
+        index.persist()
+        seconds = time.perf_counter() - started
+
+    return {
+        "exact_ids": [[corpus.chunk_id(row) for row, _ in hits] for hits in exact],
+        "metrics": {
+            "seconds": round(seconds, 3),
+            "load_seconds": round(load_seconds, 3),
+            "persist_seconds": round(seconds - load_seconds, 3),
+            "chunks_per_sec": round(corpus.chunks / seconds, 1) if seconds else None,
+            "peak_rss_mb": rss.peak_mb,
+        },
+    }
+
+
+def directory_mb(path: Path) -> float:
+    size = sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+    return round(size / (1024 * 1024), 1)
+
+
+# ---------------- Query Path Wiring ----------------
+class Recorder:
+    """Counts calls in place of MLflow logging and SMTP."""
+
+    def __init__(self):
+        self.calls = Counter()
+
+    def stub(self, name: str):
+        def record(*args, **kwargs):
+            self.calls[name] += 1
+        return record
+
+
+def load_query_path(index, index_dir: Path, lexical, embeddings: Embeddings, recorder: Recorder, mode: str):
+    """
+    Imports retrieval / supervisor_graph against the benchmark index, BM25
+    sidecar and embedder, with audit logging and email recorded instead of
+    sent. Returns (retrieval module, RetrievalService, SupervisorService).
+    """
+    from ..retrieval_mode import retrieval, supervisor_graph
+
+    # Heavy resources are lazy, so installing them also covers modules imported earlier
+    embedding_registry.embedding_model.set(embeddings)
+    retrieval.vector_store.set(index)
+    retrieval.lexical_store.set(lexical)
+    retrieval.VECTOR_INDEX_PATH = index_dir
+    retrieval.DEFAULT_RETRIEVAL_MODE = mode
+    for module in (retrieval, supervisor_graph):
+        module.log_rag_interaction = recorder.stub("log_rag_interaction")
+        module.send_email_notification = recorder.stub("send_email_notification")
+    retrieval.log_rag_batch = recorder.stub("log_rag_batch")
+
+    return retrieval, retrieval.RetrievalService(), supervisor_graph.SupervisorService()
+
+
+# ---------------- Replay ----------------
+def _texts(documents) -> list[str]:
+    return [doc.page_content if hasattr(doc, "page_content") else doc for doc in documents]
+
+
+def replay(call, queries: list[str], concurrency: int):
+    """Runs call(query) for every query on `concurrency` threads; returns (latencies, outputs, wall seconds)."""
+    def timed(query):
+        started = time.perf_counter()
+        output = call(query)
+        return time.perf_counter() - started, output
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, queries))
+    wall = time.perf_counter() - started
+    return [r[0] for r in results], [r[1] for r in results], wall
+
+
+def replay_async(call, queries: list[str], concurrency: int):
+    """Async replay: at most `concurrency` coroutines in flight."""
+    async def run_all():
+        gate = asyncio.Semaphore(concurrency)
+
+        async def timed(query):
+            async with gate:
+                started = time.perf_counter()
+                output = await call(query)
+                return time.perf_counter() - started, output
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*[timed(q) for q in queries])
+        return results, time.perf_counter() - started
+
+    results, wall = asyncio.run(run_all())
+    return [r[0] for r in results], [r[1] for r in results], wall
+
+
+def recall_at_k(outputs: list[list[str]], exact_texts: list[set], k: int) -> float:
+    return round(float(np.mean([
+        len(set(got[:k]) & want) / max(len(want), 1) for got, want in zip(outputs, exact_texts)
+    ])), 4)
+
+
+def stage_runner(stage: str, retrieval, service, supervisor, k: int, mode: str):
+    """(call, is_async) for one stage; every call returns the chunk texts it retrieved."""
+    if stage == "retrieval_node":
+        def call(query):
+            state = retrieval.retrieval_node(retrieval.RetrievalState(query=query, top_k=k, mode=mode, rerank=False))
+            return _texts(state.documents)
+        return call, False
+    if stage == "service_query":
+        def call(query):
+            request = retrieval.RetrievalRequest(query=query, top_k=k, mode=mode, rerank=False)
+            return service.query(request).documents
+        return call, False
+    if stage == "supervisor_run":
+        def call(query):
+            return _texts(supervisor.run(query=query, top_k=k).get("documents", []))
+        return call, False
+    if stage == "supervisor_arun":
+        async def call(query):
+            state = await supervisor.arun(query=query, top_k=k)
+            return _texts(state.get("documents", []))
+        return call, True
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+# ---------------- Baseline Comparison ----------------
+def compare_to_baseline(report: dict, baseline: dict, latency_tolerance: float = LATENCY_TOLERANCE,
+                        qps_tolerance: float = QPS_TOLERANCE, recall_tolerance: float = RECALL_TOLERANCE) -> dict:
+    """Per-stage deltas against a stored report; regressions are listed by name."""
+    k = report["config"]["k"]
+    checks = (
+        ("p50_ms", "higher_is_worse", latency_tolerance),
+        ("p95_ms", "higher_is_worse", latency_tolerance),
+        ("p99_ms", "higher_is_worse", latency_tolerance),
+        ("qps", "lower_is_worse", qps_tolerance),
+        (f"recall@{k}", "drop", recall_tolerance),
+    )
+    comparison, regressions = {}, []
+
+    sections = {"index_search": report.get("index_search", {}), **report.get("stages", {})}
+    baseline_sections = {"index_search": baseline.get("index_search", {}), **baseline.get("stages", {})}
+    for section, metrics in sections.items():
+        previous = baseline_sections.get(section)
+        if not previous:
+            continue
+        comparison[section] = {}
+        for metric, direction, tolerance in checks:
+            current, before = metrics.get(metric), previous.get(metric)
+            if current is None or before is None:
+                continue
+            if direction == "higher_is_worse":
+                regressed = current > before * (1 + tolerance)
+            elif direction == "lower_is_worse":
+                regressed = current < before * (1 - tolerance)
+            else:
+                regressed = current < before - tolerance
+            comparison[section][metric] = {
+                "baseline": before,
+                "current": current,
+                "change": round((current - before) / before, 4) if before else None,
+                "regressed": regressed,
+            }
+            if regressed:
+                regressions.append(f"{section}.{metric}")
+
+    config_changes = {
+        key: {"baseline": baseline.get("config", {}).get(key), "current": value}
+        for key, value in report["config"].items()
+        if key != "cpu_count" and baseline.get("config", {}).get(key) != value
+    }
+    return {"config_changes": config_changes, "sections": comparison, "regressions": regressions}
+
+
+# ---------------- Benchmark ----------------
+def run_benchmark(chunks: int = 10000, dim: int = 384, clusters: int | None = None, queries: int = 200,
+                  k: int = 10, concurrency: int = 8, stages=STAGES, mode: str = "vector",
+                  backend: str = "native", quantization: str = "none", embedder: str = "synthetic",
+                  seed: int = 0, workdir: Path | None = None) -> dict:
+    clusters = clusters or max(16, chunks // 500)
+
+    with tempfile.TemporaryDirectory(prefix="retrieval-bench-") as tmp:
+        root = Path(workdir or tmp)
+        index_dir = vector_index.vector_index_dir(root / "vector_store", COLLECTION_NAME, backend)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        if backend == "native":
+            index = vector_index.NumpyIndex(index_dir, quantization=quantization)
+        else:
+            index = vector_index.ChromaIndex(index_dir, COLLECTION_NAME)
+        lexical = bm25_index.BM25Index(root / "vector_store" / "bm25.sqlite")
+
+        corpus = SyntheticCorpus(chunks, dim, clusters, seed)
+        query_texts, query_vectors = corpus.queries(queries)
+        model = None
+        if embedder == "model":
+            # Real vectors for chunks and queries; slow beyond ~100k chunks
+            model = embedding_registry.get_embedding_model()
+            query_vectors = np.asarray(model.embed_documents(query_texts), dtype=np.float32)
+            embeddings = model
+        else:
+            embeddings = SyntheticEmbeddings(dim, dict(zip(query_texts, query_vectors)))
+
+        built = build_collection(index, lexical if mode == "hybrid" else None, corpus, query_vectors, k, model)
+        exact_ids = built["exact_ids"]
+        exact_docs = index.get(sorted({i for ids in exact_ids for i in ids}))
+        exact_texts = [{exact_docs[i].page_content for i in ids if i in exact_docs} for ids in exact_ids]
+
+        report = {
+            "config": {
+                "chunks": chunks,
+                "dim": dim,
+                "clusters": clusters,
+                "queries": queries,
+                "k": k,
+                "concurrency": concurrency,
+                "stages": list(stages),
+                "mode": mode,
+                "backend": backend,
+                "quantization": quantization,
+                "embedder": embedder,
+                "seed": seed,
+                "cpu_count": os.cpu_count(),
+            },
+            "build": {
+                **built["metrics"],
+                "index_mb": directory_mb(index_dir),
+                "hnsw": bool(backend == "native" and index._snapshot().hnsw is not None),
+            },
+            "stages": {},
+        }
+
+        # Raw index recall: approximation error only (HNSW / quantization), no threshold
+        started = time.perf_counter()
+        hits = index.search_batch(query_vectors, k)
+        seconds = time.perf_counter() - started
+        report["index_search"] = {
+            f"recall@{k}": recall_at_k([_texts([doc for doc, _ in h]) for h in hits], exact_texts, k),
+            "ms_per_query": round(1000 * seconds / queries, 3),
+        }
+
+        recorder = Recorder()
+        retrieval, service, supervisor = load_query_path(
+            index, index_dir, lexical, embeddings, recorder, mode
+        )
+
+        for stage in stages:
+            call, is_async = stage_runner(stage, retrieval, service, supervisor, k, mode)
+            # Cold caches per stage, so every stage pays embedding and search
+            retrieval.query_cache.clear()
+            with PeakRSS() as rss, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                latencies, outputs, wall = (replay_async if is_async else replay)(call, query_texts, concurrency)
+
+            report["stages"][stage] = {
+                **latency_summary(latencies),
+                "qps": round(queries / wall, 2) if wall else None,
+                f"recall@{k}": recall_at_k(outputs, exact_texts, k),
+                "mean_documents": round(float(np.mean([len(o) for o in outputs])), 2),
+                "peak_rss_mb": rss.peak_mb,
+            }
+
+        report["stubbed_calls"] = dict(recorder.calls)
+        report["process_peak_rss_mb"] = process_peak_rss_mb()
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline retrieval latency / recall benchmark")
+    parser.add_argument("--chunks", type=int, default=10000, help="synthetic collection size")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, help="default: chunks / 500")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--mode", default="vector", choices=["vector", "hybrid"])
+    parser.add_argument("--backend", default="native", choices=["native", "chroma"])
+    parser.add_argument("--quantization", default="none", choices=["none", "int8", "binary"])
+    parser.add_argument("--embedder", default="synthetic", choices=["synthetic", "model"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="keep the collection here instead of a temp dir")
+    parser.add_argument("--baseline", help="stored report to compare against")
+    parser.add_argument("--latency-tolerance", type=float, default=LATENCY_TOLERANCE)
+    parser.add_argument("--qps-tolerance", type=float, default=QPS_TOLERANCE)
+    parser.add_argument("--recall-tolerance", type=float, default=RECALL_TOLERANCE)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        chunks=args.chunks,
+        dim=args.dim,
+        clusters=args.clusters,
+        queries=args.queries,
+        k=args.k,
+        concurrency=args.concurrency,
+        stages=args.stages,
+        mode=args.mode,
+        backend=args.backend,
+        quantization=args.quantization,
+        embedder=args.embedder,
+        seed=args.seed,
+        workdir=Path(args.workdir) if args.workdir else None,
+    )
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        report["comparison"] = compare_to_baseline(
+            report, baseline, args.latency_tolerance, args.qps_tolerance, args.recall_tolerance
+        )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    else:
+        print(output)
+
+    if args.baseline and report["comparison"]["regressions"]:
+        print(f"[WARNING] Regressions: {', '.join(report['comparison']['regressions'])}", file=sys.stderr)
+        sys.exit(1)
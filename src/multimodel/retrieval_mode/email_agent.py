@@ -1,27 +1,476 @@
+"""
+email_agent.py
+
+Alert e-mail outbox.
+
+send_email_notification() only puts the alert on an in-memory queue
+(microseconds on the query path). A background thread then:
+
+- persists alerts into a SQLite outbox (EMAIL_OUTBOX_PATH), so pending
+  mail survives restarts and is shared by every worker process
+- deduplicates: a repeat of a pending alert bumps its repeat count, and a
+  repeat of one sent within EMAIL_DEDUP_SECONDS is dropped
+- rate-limits per recipient (EMAIL_MIN_INTERVAL_SECONDS between mails,
+  EMAIL_MAX_PER_HOUR); alerts that pile up meanwhile go out as one digest
+- sends over pooled, reused SMTP connections (one STARTTLS + login per
+  connection, not per mail)
+- retries failures with exponential backoff up to EMAIL_MAX_ATTEMPTS
+
+Credentials come only from the environment: with SMTP_USER unset the
+server is used without login, and with SMTP_USER set but SMTP_PASSWORD
+unset nothing is sent (alerts stay pending and are retried).
+
+For a local SMTP stub (e.g. `python -m aiosmtpd -n -l localhost:1025`):
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=false ...
+"""
+
+import atexit
+import contextlib
+import hashlib
+import logging
+import os
+import queue
 import smtplib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import os
+from pathlib import Path
+
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- Configuration ----------------
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER") or None
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD") or None
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+EMAIL_FROM = os.getenv("EMAIL_FROM", SMTP_USER or "noreply@company.com")
+SMTP_TIMEOUT = 30
+
+EMAIL_OUTBOX_PATH = Path(os.getenv(
+    "EMAIL_OUTBOX_PATH",
+    str(Path(__file__).resolve().parent.parent / "audit_log" / "email_outbox.sqlite")
+))
+EMAIL_POOL_SIZE = int(os.getenv("EMAIL_POOL_SIZE", "2"))
+# An idle connection older than this is checked with NOOP before reuse
+EMAIL_CONNECTION_MAX_IDLE = 30.0
+EMAIL_MIN_INTERVAL_SECONDS = float(os.getenv("EMAIL_MIN_INTERVAL_SECONDS", "60"))
+EMAIL_MAX_PER_HOUR = int(os.getenv("EMAIL_MAX_PER_HOUR", "20"))
+EMAIL_DEDUP_SECONDS = float(os.getenv("EMAIL_DEDUP_SECONDS", "3600"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+EMAIL_RETRY_BASE_SECONDS = 5.0
+EMAIL_RETRY_MAX_SECONDS = 900.0
+EMAIL_POLL_SECONDS = 0.5
+DIGEST_MAX_ALERTS = 50
+# A "sending" claim older than this belongs to a crashed process and is released
+CLAIM_TIMEOUT_SECONDS = 600.0
+# Sent / failed rows are kept this long (dedup window, inspection)
+RETENTION_SECONDS = 7 * 24 * 3600.0
+
+
+# ---------------- SMTP ----------------
+class SMTPConfigurationError(RuntimeError):
+    pass
+
+
+def smtp_connect() -> smtplib.SMTP:
+    if SMTP_USER and not SMTP_PASSWORD:
+        raise SMTPConfigurationError("SMTP_USER is set but SMTP_PASSWORD is not; refusing to send")
+    server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    if SMTP_STARTTLS:
+        server.starttls()
+    if SMTP_USER:
+        server.login(SMTP_USER, SMTP_PASSWORD)
+    return server
+
+
+def _quit(server):
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
+
+
+def build_message(to_email: str, subject: str, body: str) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg["From"] = EMAIL_FROM
+    msg["To"] = to_email
+    msg["Subject"] = subject
+
+    msg.attach(MIMEText(body, "plain"))
+    return msg
+
+
+class SMTPPool:
+    """At most `size` live SMTP connections, reused across sends."""
+
+    def __init__(self, size: int = EMAIL_POOL_SIZE, connect=smtp_connect):
+        self.connect = connect
+        self.opened = 0
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextlib.contextmanager
+    def connection(self):
+        self._slots.acquire()
+        server = None
+        try:
+            server = self._checkout()
+            yield server
+        except Exception:
+            # A failed conversation leaves the connection in an unknown state
+            if server is not None:
+                _quit(server)
+                server = None
+            raise
+        finally:
+            if server is not None:
+                self._idle.put((server, time.monotonic()))
+            self._slots.release()
+
+    def _checkout(self):
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                self.opened += 1
+                return self.connect()
+            if time.monotonic() - last_used < EMAIL_CONNECTION_MAX_IDLE:
+                return server
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except (smtplib.SMTPException, OSError):
+                pass
+            _quit(server)
 
+    def close(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _quit(server)
 
-SMTP_HOST = "smtp.gmail.com"
-SMTP_PORT = 587
-SMTP_USER = "thorvikash@gmail.com"
-SMTP_PASSWORD = "hwyj crbi kcol nbpl"
 
+def _is_permanent(error: Exception) -> bool:
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    # 5xx replies are final, except bad credentials (fixed by configuration)
+    return (isinstance(error, smtplib.SMTPResponseException)
+            and not isinstance(error, smtplib.SMTPAuthenticationError)
+            and 500 <= error.smtp_code < 600)
+
+
+# ---------------- Outbox ----------------
+class EmailOutbox:
+    def __init__(self, path: Path = EMAIL_OUTBOX_PATH, connect=smtp_connect, pool_size: int = EMAIL_POOL_SIZE):
+        self.path = Path(path)
+        self.pool = SMTPPool(pool_size, connect)
+        self.incoming = queue.SimpleQueue()
+        self.counters = {
+            "enqueued": 0,
+            "deduplicated": 0,
+            "repeats_merged": 0,
+            "emails_sent": 0,
+            "alerts_sent": 0,
+            "digests_sent": 0,
+            "send_failures": 0,
+            "alerts_failed": 0,
+        }
+
+        self._senders = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="email-sender")
+        self._lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        # Serializes outbox cycles (sender thread vs process_once / close)
+        self._cycle_lock = threading.Lock()
+        self._started = False
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._conn = None
+        self._conn_pid = None
+
+    # ---------- Producer side (query path) ----------
+    def enqueue(self, to_email: str, subject: str, body: str):
+        self._ensure_started()
+        self.incoming.put((to_email, subject, body, time.time()))
+        self._count("enqueued")
+        self._wake.set()
+
+    def _count(self, name: str, n: int = 1):
+        with self._counter_lock:
+            self.counters[name] += n
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._lock:
+            if not self._started:
+                threading.Thread(target=self._run, name="email-outbox", daemon=True).start()
+                atexit.register(self.close)
+                self._started = True
+
+    # ---------- Storage ----------
+    def _db(self) -> sqlite3.Connection:
+        # Connections must not cross a fork into worker processes
+        if self._conn is None or self._conn_pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY,
+                    recipient TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    dedup_key TEXT NOT NULL,
+                    repeats INTEGER NOT NULL DEFAULT 1,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    next_attempt REAL NOT NULL,
+                    claimed_at REAL,
+                    sent_at REAL,
+                    last_error TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt);
+                CREATE INDEX IF NOT EXISTS idx_outbox_dedup ON outbox(dedup_key, status);
+                CREATE TABLE IF NOT EXISTS recipients (
+                    recipient TEXT PRIMARY KEY,
+                    last_sent REAL NOT NULL,
+                    hour_start REAL NOT NULL,
+                    hour_count INTEGER NOT NULL
+                );
+                """
+            )
+            self._conn.commit()
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _persist_incoming(self, conn: sqlite3.Connection):
+        while True:
+            try:
+                recipient, subject, body, created_at = self.incoming.get_nowait()
+            except queue.Empty:
+                break
+            key = hashlib.sha1(f"{recipient}\0{subject}\0{body}".encode("utf-8")).hexdigest()
+
+            updated = conn.execute(
+                "UPDATE outbox SET repeats = repeats + 1 WHERE dedup_key = ? AND status = 'pending'", (key,)
+            ).rowcount
+            if updated:
+                self._count("repeats_merged")
+                continue
+            recent = conn.execute(
+                "SELECT 1 FROM outbox WHERE dedup_key = ? AND status IN ('sending', 'sent')"
+                " AND COALESCE(sent_at, created_at) >= ? LIMIT 1",
+                (key, created_at - EMAIL_DEDUP_SECONDS)
+            ).fetchone()
+            if recent:
+                self._count("deduplicated")
+                continue
+            conn.execute(
+                "INSERT INTO outbox (recipient, subject, body, dedup_key, created_at, next_attempt)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (recipient, subject, body, key, created_at, created_at)
+            )
+        conn.commit()
+
+    # ---------- Rate Limiting ----------
+    def _reserve(self, conn: sqlite3.Connection, recipient: str, now: float) -> bool:
+        """Takes one send slot for recipient if its limits allow it."""
+        row = conn.execute(
+            "SELECT last_sent, hour_start, hour_count FROM recipients WHERE recipient = ?", (recipient,)
+        ).fetchone()
+        if row is None:
+            conn.execute("INSERT INTO recipients VALUES (?, ?, ?, 1)", (recipient, now, now))
+            return True
+
+        last_sent, hour_start, hour_count = row
+        if now - last_sent < EMAIL_MIN_INTERVAL_SECONDS:
+            return False
+        if now - hour_start >= 3600:
+            hour_start, hour_count = now, 0
+        if hour_count >= EMAIL_MAX_PER_HOUR:
+            return False
+        conn.execute(
+            "UPDATE recipients SET last_sent = ?, hour_start = ?, hour_count = ? WHERE recipient = ?",
+            (now, hour_start, hour_count + 1, recipient)
+        )
+        return True
+
+    # ---------- Sending ----------
+    @staticmethod
+    def compose(items: list) -> tuple[str, str]:
+        """(subject, body) for one recipient's due alerts: the alert itself, or a digest."""
+        if len(items) == 1:
+            _, subject, body, repeats = items[0]
+            if repeats > 1:
+                body = f"{body}\n(This alert was raised {repeats} times.)"
+            return subject, body
+
+        sections = []
+        for _, subject, body, repeats in items:
+            suffix = f" (x{repeats})" if repeats > 1 else ""
+            sections.append(f"--- {subject}{suffix} ---\n{body.strip()}")
+        return f"Enterprise RAG Alert Digest ({len(items)} alerts)", "\n\n".join(sections)
+
+    def _send(self, recipient: str, items: list):
+        subject, body = self.compose(items)
+        with self.pool.connection() as server:
+            server.send_message(build_message(recipient, subject, body))
+
+    def _dispatch(self, conn: sqlite3.Connection):
+        if self._stop.is_set():
+            # Closing: nothing new is claimed, due rows stay 'pending' for the next process
+            return
+        now = time.time()
+        rows = conn.execute(
+            "SELECT id, recipient, subject, body, repeats FROM outbox"
+            " WHERE status = 'pending' AND next_attempt <= ? ORDER BY created_at",
+            (now,)
+        ).fetchall()
+        by_recipient = {}
+        for row_id, recipient, subject, body, repeats in rows:
+            by_recipient.setdefault(recipient, []).append((row_id, subject, body, repeats))
+
+        claimed = {}
+        for recipient, items in by_recipient.items():
+            items = items[:DIGEST_MAX_ALERTS]
+            ids = [item[0] for item in items]
+            conn.execute("BEGIN IMMEDIATE")
+            placeholders = ",".join("?" * len(ids))
+            pending = conn.execute(
+                f"SELECT COUNT(*) FROM outbox WHERE id IN ({placeholders}) AND status = 'pending'", ids
+            ).fetchone()[0]
+            # Another worker process claimed these first, or the recipient is rate-limited
+            if pending != len(ids) or not self._reserve(conn, recipient, now):
+                conn.rollback()
+                continue
+            conn.execute(
+                f"UPDATE outbox SET status = 'sending', claimed_at = ? WHERE id IN ({placeholders})", [now, *ids]
+            )
+            conn.commit()
+            claimed[recipient] = items
+
+        futures = {recipient: self._senders.submit(self._send, recipient, items) for recipient, items in claimed.items()}
+        for recipient, future in futures.items():
+            items = claimed[recipient]
+            ids = [item[0] for item in items]
+            placeholders = ",".join("?" * len(ids))
+            error = future.exception()
+            if error is None:
+                conn.execute(
+                    f"UPDATE outbox SET status = 'sent', sent_at = ?, attempts = attempts + 1"
+                    f" WHERE id IN ({placeholders})", [time.time(), *ids]
+                )
+                self._count("emails_sent")
+                self._count("alerts_sent", len(items))
+                if len(items) > 1:
+                    self._count("digests_sent")
+            else:
+                self._count("send_failures")
+                self._fail(conn, ids, error)
+                logger.warning("Alert email to %s failed: %s", recipient, error)
+        conn.commit()
+
+    def _fail(self, conn: sqlite3.Connection, ids: list, error: Exception):
+        now = time.time()
+        permanent = _is_permanent(error)
+        for row_id, attempts in conn.execute(
+            f"SELECT id, attempts FROM outbox WHERE id IN ({','.join('?' * len(ids))})", ids
+        ).fetchall():
+            attempts += 1
+            if permanent or attempts >= EMAIL_MAX_ATTEMPTS:
+                status, next_attempt = "failed", now
+                self._count("alerts_failed")
+            else:
+                status = "pending"
+                next_attempt = now + min(EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), EMAIL_RETRY_MAX_SECONDS)
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                (status, attempts, next_attempt, str(error)[:500], row_id)
+            )
+
+    def _housekeeping(self, conn: sqlite3.Connection):
+        now = time.time()
+        conn.execute(
+            "UPDATE outbox SET status = 'pending' WHERE status = 'sending' AND claimed_at < ?",
+            (now - CLAIM_TIMEOUT_SECONDS,)
+        )
+        conn.execute(
+            "DELETE FROM outbox WHERE status IN ('sent', 'failed') AND COALESCE(sent_at, next_attempt) < ?",
+            (now - RETENTION_SECONDS,)
+        )
+        conn.commit()
+
+    # ---------- Lifecycle ----------
+    def process_once(self):
+        """One outbox cycle: persist queued alerts, then send whatever is due."""
+        with self._cycle_lock:
+            conn = self._db()
+            self._persist_incoming(conn)
+            self._dispatch(conn)
+
+    def _run(self):
+        last_housekeeping = 0.0
+        while not self._stop.is_set():
+            self._wake.wait(EMAIL_POLL_SECONDS)
+            self._wake.clear()
+            try:
+                self.process_once()
+                if time.monotonic() - last_housekeeping > CLAIM_TIMEOUT_SECONDS / 10:
+                    with self._cycle_lock:
+                        self._housekeeping(self._db())
+                    last_housekeeping = time.monotonic()
+            except Exception as e:
+                logger.warning("Email outbox cycle failed: %s", e)
+                self._stop.wait(EMAIL_POLL_SECONDS)
+
+    def close(self):
+        # Queued alerts are persisted; they are sent by the next process.
+        # The cycle lock waits out an in-flight dispatch, so every row this
+        # process claimed ends up 'sent' or back to 'pending', never stuck
+        # in 'sending' until CLAIM_TIMEOUT_SECONDS.
+        self._stop.set()
+        with self._cycle_lock:
+            self._persist_incoming(self._db())
+            self._senders.shutdown(wait=True)
+        self.pool.close()
+
+    def stats(self) -> dict:
+        with self._cycle_lock:
+            by_status = dict(self._db().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        with self._counter_lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "queued_in_memory": self.incoming.qsize(),
+            "pending": by_status.get("pending", 0),
+            "sending": by_status.get("sending", 0),
+            "failed": by_status.get("failed", 0),
+            "connections_opened": self.pool.opened,
+        }
+
+
+outbox = EmailOutbox()
+
+
+# ---------------- Public API ----------------
 def send_email_notification(
     to_email: str,
     subject: str,
     body: str
 ):
-    msg = MIMEMultipart()
-    msg["From"] = SMTP_USER
-    msg["To"] = to_email
-    msg["Subject"] = subject
+    """Queues an alert; delivery, dedup, digesting and retries happen in the outbox."""
+    outbox.enqueue(to_email, subject, body)
 
-    msg.attach(MIMEText(body, "plain"))
 
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        server.send_message(msg)
+def outbox_stats() -> dict:
+    return outbox.stats()
@@ -1,3 +1,29 @@
+"""
+importance_agent.py
+
+Flags chunks that mention important terms (penalties, liabilities, ...).
+
+Matching runs once per chunk at ingestion (tag_importance() in
+build_chunks) with a single compiled, word-bounded pattern per category
+that also accepts plurals ("risks", "taxes", "penalties"), and the result
+is stored in chunk metadata:
+
+    important       : bool
+    important_terms : comma-separated matched keywords (singular form)
+
+The query-time check is then an OR over the retrieved chunks' metadata;
+only chunks ingested before tagging existed are matched live.
+
+Extra keywords per catalog category can be supplied as JSON via
+IMPORTANT_KEYWORDS_FILE, e.g. {"bank": ["npa", "write-off"]}; they are
+matched in addition to IMPORTANT_KEYWORDS.
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+
 IMPORTANT_KEYWORDS = [
     "penalty",
     "termination",
@@ -12,6 +38,96 @@ IMPORTANT_KEYWORDS = [
     "tax"
 ]
 
+IMPORTANT_KEYWORDS_FILE = os.getenv("IMPORTANT_KEYWORDS_FILE")
+
+
+def _load_category_keywords() -> dict[str, list[str]]:
+    if not IMPORTANT_KEYWORDS_FILE:
+        return {}
+    with open(IMPORTANT_KEYWORDS_FILE, "r", encoding="utf-8") as f:
+        return {category.casefold(): list(keywords) for category, keywords in json.load(f).items()}
+
+
+IMPORTANT_KEYWORDS_BY_CATEGORY = _load_category_keywords()
+
+
+# ---------------- Matcher ----------------
+def _with_plural(word: str) -> str:
+    """Regex for a word or its plural: risk(s), tax(es), penalt(y|ies)."""
+    if len(word) > 1 and word.endswith("y") and word[-2] not in "aeiou":
+        return re.escape(word[:-1]) + "(?:y|ies)"
+    return re.escape(word) + "(?:e?s)?"
+
+
+def compile_matcher(keywords) -> re.Pattern:
+    """
+    One alternation over all keywords, longest first, matched as whole
+    words ("fine" does not match "define") with an optional plural ending
+    on the last word; multi-word keywords allow any whitespace between
+    their words.
+    """
+    terms = sorted({k.strip().casefold() for k in keywords if k.strip()}, key=len, reverse=True)
+    if not terms:
+        return re.compile(r"(?!)")
+    alternatives = "|".join(
+        r"\s+".join([*map(re.escape, term.split()[:-1]), _with_plural(term.split()[-1])])
+        for term in terms
+    )
+    return re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def keywords_for(category: str | None = None) -> frozenset[str]:
+    extra = IMPORTANT_KEYWORDS_BY_CATEGORY.get((category or "").casefold(), [])
+    return frozenset(" ".join(k.casefold().split()) for k in [*IMPORTANT_KEYWORDS, *extra] if k.strip())
+
+
+@lru_cache(maxsize=None)
+def matcher_for(category: str | None = None) -> re.Pattern:
+    return compile_matcher(keywords_for(category))
+
+
+def _keyword(matched: str, keywords: frozenset[str]) -> str:
+    """Maps a (possibly plural) match back to its keyword: "penalties" -> "penalty"."""
+    for form in (matched, matched[:-1], matched[:-2], matched[:-3] + "y"):
+        if form in keywords:
+            return form
+    return matched
+
+
+def match_important_terms(text: str, category: str | None = None) -> list[str]:
+    """Distinct important keywords in text, normalized and sorted."""
+    keywords = keywords_for(category)
+    return sorted({
+        _keyword(" ".join(m.group(0).casefold().split()), keywords)
+        for m in matcher_for(category).finditer(text or "")
+    })
+
+
+# ---------------- Ingestion ----------------
+def tag_importance(chunks: list, category: str | None = None) -> list:
+    """Stamps important / important_terms on the metadata of chunk records ({"document", "metadata"})."""
+    for chunk in chunks:
+        terms = match_important_terms(chunk["document"], category)
+        chunk["metadata"]["important"] = bool(terms)
+        chunk["metadata"]["important_terms"] = ",".join(terms)
+    return chunks
+
+
+# ---------------- Query Time ----------------
+def is_important(doc) -> bool:
+    important = doc.metadata.get("important")
+    if important is None:
+        # Chunk ingested before importance tagging
+        return matcher_for(doc.metadata.get("category")).search(doc.page_content or "") is not None
+    return bool(important)
+
+
+def documents_important(documents: list) -> bool:
+    return any(is_important(doc) for doc in documents)
+
+
 def detect_important_information(text_chunks: list) -> bool:
-    combined_text = " ".join(text_chunks).lower()
-    return any(keyword in combined_text for keyword in IMPORTANT_KEYWORDS)
+    """Live check over raw texts (for callers without chunk metadata)."""
+    matcher = matcher_for(None)
+    return any(matcher.search(text or "") for text in text_chunks)
@@ -13,10 +13,11 @@ Responsibilities:
 from typing import List
 from pydantic import BaseModel, Field
 
-from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
+from ..resource_registry import lazy_resource
+
 
 # ------------------------------------------------------------------
 # Pydantic Contracts (UI / MCP / API Safe)
@@ -35,10 +36,17 @@ class LLMResponse(BaseModel):
 # Ollama Model Configuration
 # ------------------------------------------------------------------
 
-llm = ChatOllama(
-    model="llama3",
-    temperature=0.1
-)
+def _load_llm():
+    from langchain_ollama import ChatOllama
+
+    return ChatOllama(
+        model="llama3",
+        temperature=0.1
+    )
+
+
+# Built on first answer or warm_up(); the query path itself never calls the LLM
+llm = lazy_resource("llm", _load_llm, required=False)
 
 
 # ------------------------------------------------------------------
@@ -77,7 +85,7 @@ def generate_answer(request: LLMRequest) -> LLMResponse:
 
     context = "\n\n".join(request.context_docs)
 
-    chain = PROMPT | llm | StrOutputParser()
+    chain = PROMPT | llm.get() | StrOutputParser()
 
     answer = chain.invoke(
         {
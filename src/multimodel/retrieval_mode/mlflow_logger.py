@@ -1,10 +1,366 @@
-import mlflow
+"""
+mlflow_logger.py
+
+Non-blocking audit trail for RAG queries.
+
+log_rag_interaction() / log_rag_batch() only enqueue a record on a
+bounded in-process queue and return; nothing on the query path talks to
+the tracking server.
+
+- A writer thread drains the queue into an append-only JSONL segment
+  under AUDIT_DIR, rolling to a new segment every AUDIT_SEGMENT_RECORDS
+  records or AUDIT_SEGMENT_SECONDS seconds
+- A shipper thread uploads closed segments to MLflow, one run per
+  segment (params / metrics in bulk through log_batch, the records as an
+  artifact), and deletes a segment once it is shipped
+
+Several processes (uvicorn / ingestion workers) share AUDIT_DIR:
+
+    audit-<writer pid>-<ns>.open             being written by that process
+    audit-<writer pid>-<ns>.jsonl            closed, waiting to be shipped
+    audit-<writer pid>-<ns>.shipping-<pid>   claimed (atomic rename) by one shipper
+
+Open segments and claims of processes that are no longer alive are
+closed / released by the survivors, so nothing is shipped twice and
+nothing is lost when a worker dies.
+- An unavailable tracking server only grows the on-disk backlog (retried
+  with exponential backoff); a full queue drops the record and counts it
+
+audit_stats() reports queue depth, drops, backlog and shipping failures.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
 import uuid
 from datetime import datetime
+from pathlib import Path
+
+from ..resource_registry import lazy_resource
+
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- Configuration ----------------
+MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://127.0.0.1:5006")
+MLFLOW_EXPERIMENT = os.getenv("MLFLOW_EXPERIMENT", "Enterprise-RAG-PDF-latest-2334")
+AUDIT_DIR = Path(os.getenv("AUDIT_DIR", str(Path(__file__).resolve().parent.parent / "audit_log")))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+# Records appended per write; the writer also flushes whenever the queue runs dry
+AUDIT_WRITE_BATCH = 500
+AUDIT_SEGMENT_RECORDS = int(os.getenv("AUDIT_SEGMENT_RECORDS", "1000"))
+AUDIT_SEGMENT_SECONDS = float(os.getenv("AUDIT_SEGMENT_SECONDS", "30"))
+AUDIT_SHIP_INTERVAL = float(os.getenv("AUDIT_SHIP_INTERVAL", "10"))
+AUDIT_SHIP_MAX_BACKOFF = 300.0
+# Set AUDIT_SHIP=false to keep the local log only (e.g. no tracking server)
+AUDIT_SHIP = os.getenv("AUDIT_SHIP", "true").lower() == "true"
+
+SEGMENT_SUFFIX = ".jsonl"
+OPEN_SUFFIX = ".open"
+CLAIM_SUFFIX = ".shipping-"
+
+
+# ---------------- MLflow Shipping ----------------
+def _load_mlflow():
+    import mlflow
+
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    mlflow.set_experiment(MLFLOW_EXPERIMENT)
+    return mlflow
+
+
+# Imported and configured on first shipment or warm_up(), never at import time;
+# an unreachable tracking server does not make the service unready
+mlflow_client = lazy_resource("mlflow", _load_mlflow, required=False)
+
+
+def ship_segment(path: Path):
+    """Uploads one closed segment as a single MLflow run."""
+    text = path.read_text(encoding="utf-8")
+    records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if not records:
+        return
+
+    interactions = [r for r in records if r["kind"] == "interaction"]
+    batches = [r for r in records if r["kind"] == "batch"]
+    metrics = {
+        "interactions": len(interactions),
+        "batches": len(batches),
+        "batched_queries": sum(len(r["queries"]) for r in batches),
+        "retrieved_chunks": sum(r["retrieved_chunks"] for r in records),
+    }
+    for record in records:
+        for k, v in record["flags"].items():
+            metrics[k] = metrics.get(k, 0) + float(v)
+
+    mlflow = mlflow_client.get()
+    with mlflow.start_run(run_name=f"rag-audit-{uuid.uuid4().hex[:8]}"):
+        mlflow.log_params({
+            "segment": path.stem,
+            "records": len(records),
+            "first_timestamp": records[0]["timestamp"],
+            "last_timestamp": records[-1]["timestamp"],
+        })
+        mlflow.log_metrics(metrics)
+        mlflow.log_text(text, artifact_file="interactions.jsonl")
+
+
+# ---------------- Segment Ownership ----------------
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, owned by another user
+        return True
+    return True
+
+
+def _segment_writer(path: Path) -> int | None:
+    """Writer pid from audit-<pid>-<ns>.*; None for names this module did not create."""
+    parts = path.name.split(".", 1)[0].split("-")
+    try:
+        return int(parts[1]) if len(parts) == 3 else None
+    except ValueError:
+        return None
+
+
+def _claim_owner(path: Path) -> int | None:
+    try:
+        return int(path.suffix[len(CLAIM_SUFFIX):])
+    except ValueError:
+        return None
 
-mlflow.set_tracking_uri("http://127.0.0.1:5006")
-mlflow.set_experiment("Enterprise-RAG-PDF-latest-2334")
 
+def _release(path: Path):
+    """Renames an open segment or a claim back to a closed segment; a racing process may win."""
+    try:
+        os.replace(path, path.with_suffix(SEGMENT_SUFFIX))
+    except FileNotFoundError:
+        pass
+
+
+# ---------------- Audit Sink ----------------
+class AuditSink:
+    def __init__(self, directory: Path = AUDIT_DIR, queue_size: int = AUDIT_QUEUE_SIZE,
+                 ship: bool = AUDIT_SHIP, shipper=ship_segment):
+        self.directory = Path(directory)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.ship = ship
+        self.shipper = shipper
+
+        self.counters = {
+            "submitted": 0,
+            "dropped": 0,
+            "written": 0,
+            "write_failures": 0,
+            "segments_shipped": 0,
+            "records_shipped": 0,
+            "ship_failures": 0,
+        }
+        self.last_ship_error = None
+
+        self._lock = threading.Lock()
+        # Guards the open segment (writer thread vs flush / close)
+        self._io_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._started = False
+        self._stop = threading.Event()
+        self._segment = None
+        self._segment_records = 0
+        self._segment_opened = 0.0
+
+    # ---------- Producer side (query path) ----------
+    def submit(self, record: dict) -> bool:
+        """Enqueues a record without blocking; returns False if it was dropped."""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("submitted")
+        return True
+
+    def _count(self, name: str, n: int = 1):
+        with self._counter_lock:
+            self.counters[name] += n
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Nothing is open yet, so files under our own pid are from a previous
+            # process that had it (pid reuse, e.g. pid 1 in containers)
+            self.recover_orphans(own_pid_is_stale=True)
+            threading.Thread(target=self._write_loop, name="audit-writer", daemon=True).start()
+            if self.ship:
+                threading.Thread(target=self._ship_loop, name="audit-shipper", daemon=True).start()
+            atexit.register(self.close)
+            self._started = True
+
+    # ---------- Writer ----------
+    def _write_loop(self):
+        while not self._stop.is_set():
+            try:
+                first = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                with self._io_lock:
+                    self._roll_if_due()
+                continue
+            batch = [first]
+            while len(batch) < AUDIT_WRITE_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self._io_lock:
+                self._write(batch)
+                self._roll_if_due()
+
+    def _write(self, batch: list):
+        try:
+            if self._segment is None:
+                self._segment = self.directory / f"audit-{os.getpid()}-{time.time_ns()}{OPEN_SUFFIX}"
+                self._segment_records = 0
+                self._segment_opened = time.monotonic()
+            with open(self._segment, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record, default=str) + "\n" for record in batch))
+            self._segment_records += len(batch)
+            self._count("written", len(batch))
+        except OSError as e:
+            self._count("write_failures", len(batch))
+            logger.warning("Audit log write failed, %d records lost: %s", len(batch), e)
+
+    def _roll_if_due(self, force: bool = False):
+        if self._segment is None:
+            return
+        if (force or self._segment_records >= AUDIT_SEGMENT_RECORDS
+                or time.monotonic() - self._segment_opened >= AUDIT_SEGMENT_SECONDS):
+            os.replace(self._segment, self._segment.with_suffix(SEGMENT_SUFFIX))
+            self._segment = None
+
+    # ---------- Shipper ----------
+    def closed_segments(self) -> list[Path]:
+        return sorted(self.directory.glob(f"*{SEGMENT_SUFFIX}"))
+
+    def claimed_segments(self) -> list[Path]:
+        return sorted(self.directory.glob(f"*{CLAIM_SUFFIX}*"))
+
+    def recover_orphans(self, own_pid_is_stale: bool = False):
+        """
+        Closes segments left open by dead writers and releases shipping
+        claims of dead shippers. Segments are complete up to their last line.
+        """
+        pid = os.getpid()
+        for path in self.directory.glob(f"*{OPEN_SUFFIX}"):
+            writer = _segment_writer(path)
+            if writer is None:
+                continue
+            if (writer == pid and own_pid_is_stale) or (writer != pid and not _pid_alive(writer)):
+                _release(path)
+        for path in self.claimed_segments():
+            shipper = _claim_owner(path)
+            if shipper is None:
+                continue
+            if (shipper == pid and own_pid_is_stale) or (shipper != pid and not _pid_alive(shipper)):
+                _release(path)
+
+    def _claim(self, segment: Path) -> Path | None:
+        """Atomically takes a closed segment for this process; None if another process got it first."""
+        claimed = segment.with_suffix(f"{CLAIM_SUFFIX}{os.getpid()}")
+        try:
+            os.rename(segment, claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+
+    def ship_pending(self) -> bool:
+        """
+        One shipping pass over the closed segments. Returns False if
+        shipping failed (the segment is released for a later retry).
+        """
+        self.recover_orphans()
+        for segment in self.closed_segments():
+            claimed = self._claim(segment)
+            if claimed is None:
+                continue
+            try:
+                with open(claimed, "r", encoding="utf-8") as f:
+                    records = sum(1 for _ in f)
+                self.shipper(claimed)
+            except Exception as e:
+                _release(claimed)
+                self._count("ship_failures")
+                self.last_ship_error = str(e)
+                logger.warning("Audit shipping of %s failed: %s", segment.name, e)
+                return False
+            claimed.unlink(missing_ok=True)
+            self._count("segments_shipped")
+            self._count("records_shipped", records)
+        return True
+
+    def _ship_loop(self):
+        failures = 0
+        while not self._stop.wait(self._ship_delay(failures)):
+            failures = 0 if self.ship_pending() else failures + 1
+
+    @staticmethod
+    def _ship_delay(failures: int) -> float:
+        # Back off while the tracking server is down; the backlog stays on disk
+        if not failures:
+            return AUDIT_SHIP_INTERVAL
+        return min(AUDIT_SHIP_INTERVAL * 2 ** min(failures, 10), AUDIT_SHIP_MAX_BACKOFF)
+
+    # ---------- Lifecycle / Metrics ----------
+    def flush(self, timeout: float = 5.0):
+        """Waits until queued records are on disk and closes the current segment."""
+        deadline = time.monotonic() + timeout
+        while not self.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with self._io_lock:
+            self._roll_if_due(force=True)
+
+    def close(self):
+        # Drains what is queued to disk; unshipped segments are shipped by the next process
+        if not self._stop.is_set():
+            batch = []
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._stop.set()
+            with self._io_lock:
+                if batch:
+                    self._write(batch)
+                self._roll_if_due(force=True)
+
+    def stats(self) -> dict:
+        segments = [*self.closed_segments(), *self.claimed_segments()] if self.directory.exists() else []
+        return {
+            **self.counters,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "backlog_segments": len(segments),
+            "backlog_bytes": sum(s.stat().st_size for s in segments),
+            "last_ship_error": self.last_ship_error,
+        }
+
+
+audit_sink = AuditSink()
+
+
+# ---------------- Public API ----------------
 def log_rag_interaction(
     query: str,
     response: str,
@@ -12,15 +368,33 @@ def log_rag_interaction(
     pdf_sources: list,
     flags: dict
 ):
-    run_name = f"rag-run-{uuid.uuid4().hex[:8]}"
+    audit_sink.submit({
+        "kind": "interaction",
+        "query": query,
+        "response": response,
+        "retrieved_chunks": retrieved_chunks,
+        "pdf_sources": list(pdf_sources),
+        "flags": flags,
+        "timestamp": datetime.utcnow().isoformat(),
+    })
 
-    with mlflow.start_run(run_name=run_name):
-        mlflow.log_param("query", query)
-        mlflow.log_param("retrieved_chunks", retrieved_chunks)
-        mlflow.log_param("pdf_sources", ",".join(pdf_sources))
-        mlflow.log_param("timestamp", datetime.utcnow().isoformat())
 
-        for k, v in flags.items():
-            mlflow.log_param(k, v)
+def log_rag_batch(
+    queries: list,
+    retrieved_chunks: int,
+    pdf_sources: list,
+    flags: dict
+):
+    """One record for a whole query_batch() call; flags are per-batch counts."""
+    audit_sink.submit({
+        "kind": "batch",
+        "queries": list(queries),
+        "retrieved_chunks": retrieved_chunks,
+        "pdf_sources": list(pdf_sources),
+        "flags": flags,
+        "timestamp": datetime.utcnow().isoformat(),
+    })
+
 
-        mlflow.log_text(response, artifact_file="llm_response.txt")
+def audit_stats() -> dict:
+    return audit_sink.stats()
@@ -0,0 +1,124 @@
+"""
+query_cache.py
+
+Two-level cache in front of the vector search:
+
+1. LRU:  normalized query -> query embedding (skips the model)
+2. TTL:  (normalized query, top_k, filters, collection version)
+         -> scored results (skips the model and the vector index)
+
+The collection version is bumped by ingestion on every write, so a new
+ingestion run invalidates cached results without waiting for the TTL.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "10000"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "5000"))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and trailing punctuation do not change the answer."""
+    return _WHITESPACE.sub(" ", query).strip().rstrip("?!.").strip().casefold()
+
+
+# ---------------- Cache Primitives ----------------
+class LRUCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TTLCache(LRUCache):
+    """LRU bounded cache whose entries also expire after ttl seconds."""
+
+    def __init__(self, max_size: int, ttl: float):
+        super().__init__(max_size)
+        self.ttl = ttl
+        self.expired = 0
+
+    def get(self, key):
+        entry = super().get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl:
+            with self._lock:
+                self._data.pop(key, None)
+                self.hits -= 1
+                self.misses += 1
+                self.expired += 1
+            return None
+        return value
+
+    def put(self, key, value):
+        super().put(key, (time.monotonic(), value))
+
+
+# ---------------- Query Cache ----------------
+class QueryCache:
+    def __init__(self, embedding_size: int = QUERY_EMBEDDING_CACHE_SIZE,
+                 result_size: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL_SECONDS):
+        self.embeddings = LRUCache(embedding_size)
+        self.results = TTLCache(result_size, ttl)
+
+    @staticmethod
+    def result_key(normalized_query: str, top_k: int, filters, version: str, mode: str = "vector"):
+        filters_key = json.dumps(filters, sort_keys=True, default=str) if filters else ""
+        return (mode, normalized_query, top_k, filters_key, version)
+
+    def embed(self, normalized_query: str, embed_fn):
+        vector = self.embeddings.get(normalized_query)
+        if vector is None:
+            vector = embed_fn(normalized_query)
+            self.embeddings.put(normalized_query, vector)
+        return vector
+
+    def clear(self):
+        self.embeddings.clear()
+        self.results.clear()
+
+    def stats(self) -> dict:
+        return {
+            "embedding_hits": self.embeddings.hits,
+            "embedding_misses": self.embeddings.misses,
+            "embedding_entries": len(self.embeddings),
+            "result_hits": self.results.hits,
+            "result_misses": self.results.misses,
+            "result_expired": self.results.expired,
+            "result_entries": len(self.results),
+        }
@@ -0,0 +1,167 @@
+"""
+reranker.py
+
+Optional cross-encoder reranking stage for retrieval.
+
+- The vector / hybrid search over-fetches candidates; a small local
+  cross-encoder (ms-marco-MiniLM by default) scores every (query, chunk)
+  pair in one batched CPU forward pass
+- Scores are cached per (normalized query, chunk id); chunk ids are
+  content-derived, so a cached score never outlives the chunk text
+- RERANK_BUDGET_MS bounds the forward pass: the measured cost per pair
+  decides how many uncached candidates are scored, never fewer than top_k;
+  the search only over-fetches as many candidates as the budget can score
+  (candidate_count)
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+
+from langchain_core.documents import Document
+
+from ..retrieval_mode.query_cache import LRUCache, normalize_query
+
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- Configuration ----------------
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANKER_MODEL_PATH = os.getenv("RERANKER_MODEL_PATH", "./ms-marco-MiniLM-L-6-v2")
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+# Candidates fetched per requested result when reranking
+RERANK_CANDIDATE_FACTOR = 4
+RERANK_MAX_CANDIDATES = 64
+# Raw cross-encoder logit below which a chunk is not relevant (ms-marco: 0 ~ p=0.5)
+RERANK_MIN_SCORE = float(os.getenv("RERANK_MIN_SCORE", "0.0"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "50000"))
+RERANK_MAX_LENGTH = 512
+# Weight of the newest measurement in the moving average of seconds per pair
+COST_SMOOTHING = 0.3
+
+
+def rerank_candidates(top_k: int) -> int:
+    return min(top_k * RERANK_CANDIDATE_FACTOR, RERANK_MAX_CANDIDATES)
+
+
+def _chunk_key(doc: Document) -> str:
+    return doc.metadata.get("chunk_id") or doc.page_content
+
+
+class CrossEncoderReranker:
+    def __init__(self, model_path: str = RERANKER_MODEL_PATH, budget_ms: float = RERANK_BUDGET_MS,
+                 cache_size: int = RERANK_CACHE_SIZE):
+        self.model_path = model_path
+        self.budget_seconds = budget_ms / 1000
+        self.scores = LRUCache(cache_size)
+        self.seconds_per_pair = None
+
+        self._model = None
+        self._lock = threading.Lock()
+        self.pairs_scored = 0
+        self.candidates_dropped = 0
+
+    def model(self):
+        """Loads the cross-encoder on first use (once per process)."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    started = time.perf_counter()
+                    self._model = CrossEncoder(
+                        self.model_path, device="cpu", max_length=RERANK_MAX_LENGTH
+                    )
+                    logger.debug("Reranker loaded in %.2fs", time.perf_counter() - started)
+        return self._model
+
+    def _pair_allowance(self) -> float:
+        """Uncached pairs that fit in the latency budget (unbounded until measured)."""
+        if self.seconds_per_pair is None:
+            return math.inf
+        return self.budget_seconds / self.seconds_per_pair
+
+    def candidate_count(self, top_k: int, queries: int = 1) -> int:
+        """
+        Candidates worth fetching for each of `queries` reranked queries:
+        the over-fetch shrinks to what the latency budget lets the
+        cross-encoder score, never below top_k.
+        """
+        wanted = rerank_candidates(top_k)
+        allowance = self._pair_allowance() / max(queries, 1)
+        if allowance >= wanted:
+            return wanted
+        return max(top_k, int(allowance))
+
+    def _score_pairs(self, pairs: list[tuple[str, str]]) -> list[float]:
+        started = time.perf_counter()
+        scores = self.model().predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+        cost = (time.perf_counter() - started) / len(pairs)
+
+        if self.seconds_per_pair is None:
+            self.seconds_per_pair = cost
+        else:
+            self.seconds_per_pair += COST_SMOOTHING * (cost - self.seconds_per_pair)
+        self.pairs_scored += len(pairs)
+        return [float(score) for score in scores]
+
+    def rerank_many(self, queries: list[str], candidates: list[list[Document]],
+                    top_ks: list[int]) -> list[list[tuple[Document, float]]]:
+        """
+        Reranks each query's candidates (best retrieval rank first) and
+        returns its top_k [(Document, score)], best first. All uncached
+        pairs of all queries go through one forward pass.
+        """
+        allowance = self._pair_allowance() / max(len(queries), 1)
+        normalized = [normalize_query(q) for q in queries]
+
+        known, pending, selected = {}, {}, []
+        for query, n, docs, top_k in zip(queries, normalized, candidates, top_ks):
+            kept, spent = [], 0
+            for doc in docs:
+                key = (n, _chunk_key(doc))
+                if key not in known and key not in pending:
+                    score = self.scores.get(key)
+                    if score is not None:
+                        known[key] = score
+                if key in known or key in pending:
+                    kept.append(doc)
+                elif spent < allowance or len(kept) < top_k:
+                    pending[key] = (query, doc.page_content)
+                    kept.append(doc)
+                    spent += 1
+            self.candidates_dropped += len(docs) - len(kept)
+            selected.append(kept)
+
+        if pending:
+            for key, score in zip(pending, self._score_pairs(list(pending.values()))):
+                known[key] = score
+                self.scores.put(key, score)
+
+        results = []
+        for n, docs, top_k in zip(normalized, selected, top_ks):
+            scored = [(doc, known[(n, _chunk_key(doc))]) for doc in docs]
+            scored.sort(key=lambda item: item[1], reverse=True)
+            results.append(scored[:top_k])
+        return results
+
+    def rerank(self, query: str, candidates: list[Document], top_k: int) -> list[tuple[Document, float]]:
+        return self.rerank_many([query], [candidates], [top_k])[0]
+
+    def stats(self) -> dict:
+        return {
+            "pairs_scored": self.pairs_scored,
+            "candidates_dropped": self.candidates_dropped,
+            "ms_per_pair": round(1000 * self.seconds_per_pair, 3) if self.seconds_per_pair else None,
+            "cache_hits": self.scores.hits,
+            "cache_misses": self.scores.misses,
+            "cache_entries": len(self.scores),
+        }
+
+
+def select_reranked(scored: list[tuple[Document, float]], min_score: float = RERANK_MIN_SCORE) -> list[Document]:
+    """Replaces the distance threshold when reranking: keeps chunks scored >= min_score."""
+    return [doc for doc, score in scored if score >= min_score]
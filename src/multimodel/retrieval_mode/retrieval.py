@@ -3,36 +3,111 @@ retrieval.py
 
 Enterprise-grade retrieval layer for a Multimodal RAG system
 with Agent-based post-retrieval actions and MLflow tracking.
+
+Every graph node has an async twin (a*-prefixed); build_retrieval_graph(use_async=True)
+wires those for RetrievalService.aquery (see async_runtime.py).
 """
 
-from typing import List
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Literal
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 from langgraph.graph import StateGraph, END
 from langchain_core.documents import Document
 
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+from ..embedding_registry import embedding_model
+from ..collection_version import collection_version
+from ..bm25_index import BM25Index, reciprocal_rank_fusion
+from ..vector_index import open_vector_index, vector_index_dir, matches_filter
+from ..resource_registry import lazy_resource
 
-from ..retrieval_mode.importance_agent import detect_important_information
+from ..retrieval_mode.importance_agent import documents_important
 from ..retrieval_mode.email_agent import send_email_notification
-from ..retrieval_mode.mlflow_logger import log_rag_interaction
+from ..retrieval_mode.mlflow_logger import log_rag_interaction, log_rag_batch
+from ..retrieval_mode.query_cache import QueryCache, normalize_query
+from ..retrieval_mode.reranker import (
+    CrossEncoderReranker, RERANK_ENABLED, select_reranked
+)
+from ..retrieval_mode.async_runtime import EmbeddingBatcher, run_cpu, run_in
+
 
+logger = logging.getLogger(__name__)
 
 RELEVANCE_THRESHOLD = 0.35
 # ---------------- Configuration ----------------
 BASE_DIR = Path(__file__).resolve().parent.parent
-LOCAL_EMBEDDING_MODEL_PATH = "./all-MiniLM-L6-v2"
-CHROMA_DB_PATH = str(BASE_DIR / "vector_store" / "chroma")
 COLLECTION_NAME = "enterprise_rag_documents"
+# Directory of the active VECTOR_BACKEND's collection (see vector_index.py)
+VECTOR_INDEX_PATH = vector_index_dir(BASE_DIR / "vector_store", COLLECTION_NAME)
+BM25_INDEX_PATH = BASE_DIR / "vector_store" / "bm25.sqlite"
+# "vector" (embedding search only) or "hybrid" (BM25 + vector, fused with RRF)
+DEFAULT_RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+RRF_K = 60
+# Each side of a hybrid search fetches top_k * this many candidates for fusion
+HYBRID_CANDIDATE_FACTOR = 2
+# In hybrid mode a chunk outside RELEVANCE_THRESHOLD still counts as relevant when
+# it matches at least this share of the query's IDF weight (see bm25_index.LexicalHit)
+HYBRID_LEXICAL_MIN_COVERAGE = float(os.getenv("HYBRID_LEXICAL_MIN_COVERAGE", "0.6"))
 
 
 # ---------------- Pydantic Models ----------------
+class RetrievalFilters(BaseModel):
+    """
+    Metadata scope of a search, evaluated inside the vector index before
+    scoring. Every field is optional; list fields match any of their values.
+    """
+    category: List[str] | None = Field(default=None, description="Catalog categories, e.g. bank")
+    pdf_name: List[str] | None = Field(default=None, description="Source PDFs (with or without .pdf)")
+    type: List[Literal["text", "table", "image"]] | None = Field(default=None)
+    page_from: int | None = Field(default=None, ge=1)
+    page_to: int | None = Field(default=None, ge=1)
+    ingested_after: datetime | None = Field(default=None)
+    ingested_before: datetime | None = Field(default=None)
+
+    @field_validator("pdf_name")
+    @classmethod
+    def strip_pdf_suffix(cls, names):
+        # Chunk metadata stores the file stem
+        return [name[:-4] if name.lower().endswith(".pdf") else name for name in names] if names else names
+
+    def to_where(self) -> dict | None:
+        """Chroma-style where clause understood by every VectorIndex backend."""
+        clauses = [
+            {field: {"$in": values}}
+            for field, values in (("category", self.category), ("pdf_name", self.pdf_name), ("type", self.type))
+            if values
+        ]
+        if self.page_from is not None:
+            clauses.append({"page": {"$gte": self.page_from}})
+        if self.page_to is not None:
+            clauses.append({"page": {"$lte": self.page_to}})
+        if self.ingested_after is not None:
+            clauses.append({"ingested_at": {"$gte": int(self.ingested_after.timestamp())}})
+        if self.ingested_before is not None:
+            clauses.append({"ingested_at": {"$lte": int(self.ingested_before.timestamp())}})
+
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def filters_where(filters: RetrievalFilters | None) -> dict | None:
+    return filters.to_where() if filters is not None else None
+
+
 class RetrievalRequest(BaseModel):
     query: str = Field(..., description="User search query")
     top_k: int = Field(default=5, ge=1, le=20)
     user_email: str | None = Field(default=None)
+    mode: Literal["vector", "hybrid"] = Field(default=DEFAULT_RETRIEVAL_MODE)
+    filters: RetrievalFilters | None = Field(default=None)
+    rerank: bool = Field(default=RERANK_ENABLED, description="Cross-encoder rerank of over-fetched candidates")
 
 
 class RetrievalResponse(BaseModel):
@@ -45,67 +120,383 @@ class RetrievalResponse(BaseModel):
 class RetrievalState(BaseModel):
     query: str
     top_k: int
+    mode: str = DEFAULT_RETRIEVAL_MODE
+    filters: RetrievalFilters | None = None
+    rerank: bool = RERANK_ENABLED
+    # Over-fetched search results awaiting the rerank node
+    candidates: List[Document] = []
     documents: List[Document] = []
     no_relevant_docs: bool = False
 
 
 
 # ---------------- Vector Store ----------------
-embedding_function = HuggingFaceEmbeddings(
-    model_name=LOCAL_EMBEDDING_MODEL_PATH
-)
+# Loaded on first use or by warm_up() (see resource_registry.py), so
+# importing this module does not load the model or open the index.
+# embedding_model is the shared resource from embedding_registry.py.
+vector_store = lazy_resource("vector_store", lambda: open_vector_index(VECTOR_INDEX_PATH, COLLECTION_NAME))
+
+lexical_store = lazy_resource("bm25_index", lambda: BM25Index(BM25_INDEX_PATH))
+
+# Runs the lexical and vector halves of a hybrid search side by side
+search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hybrid-search")
+
+# ---------------- Query Cache ----------------
+query_cache = QueryCache()
+
+# Coalesces the embedding-cache misses of concurrent async queries
+embedding_batcher = EmbeddingBatcher(lambda texts: embedding_model.get().embed_documents(texts))
+
+# ---------------- Reranker ----------------
+# The cross-encoder itself is only loaded by the first reranked query (or warm-up when enabled)
+reranker = CrossEncoderReranker()
+if RERANK_ENABLED:
+    lazy_resource("reranker_model", reranker.model)
+
+
+def cached_similarity_search(query: str, top_k: int, filters: dict | None = None):
+    """
+    Vector search behind the two-level query cache.
+    Returns [(Document, distance)]; a repeated query never touches the
+    embedding model or the index until ingestion bumps the collection version.
+    """
+    normalized = normalize_query(query)
+    key = QueryCache.result_key(normalized, top_k, filters, collection_version(VECTOR_INDEX_PATH))
+
+    results = query_cache.results.get(key)
+    if results is not None:
+        return results
+
+    vector = query_cache.embed(normalized, embedding_model.get().embed_query)
+    results = vector_store.get().search(vector, top_k, filters)
+    query_cache.results.put(key, results)
+    return results
+
+
+def batch_similarity_search(queries: List[str], top_k: int, filters: dict | None = None):
+    """
+    Vector search for many queries at once: cache misses are embedded in
+    one batched forward pass and searched with a single multi-query
+    index call. Returns one [(Document, distance)] list per query,
+    sharing result-cache entries with cached_similarity_search.
+    """
+    version = collection_version(VECTOR_INDEX_PATH)
+    normalized = [normalize_query(q) for q in queries]
+    keys = [QueryCache.result_key(n, top_k, filters, version) for n in normalized]
+    results = [query_cache.results.get(key) for key in keys]
+
+    pending = {}
+    for i, (n, cached) in enumerate(zip(normalized, results)):
+        if cached is None:
+            pending.setdefault(n, []).append(i)
+    if not pending:
+        return results
+
+    vectors = {n: query_cache.embeddings.get(n) for n in pending}
+    to_embed = [n for n, v in vectors.items() if v is None]
+    if to_embed:
+        for n, vector in zip(to_embed, embedding_model.get().embed_documents(to_embed)):
+            vectors[n] = vector
+            query_cache.embeddings.put(n, vector)
+
+    batch = list(pending)
+    searched = vector_store.get().search_batch([vectors[n] for n in batch], top_k, filters)
+    for n, hits in zip(batch, searched):
+        for i in pending[n]:
+            results[i] = hits
+        query_cache.results.put(keys[pending[n][0]], hits)
+
+    return results
+
+
+async def acached_similarity_search(query: str, top_k: int, filters: dict | None = None):
+    """
+    Async cached_similarity_search: the embedding is micro-batched with
+    other in-flight queries and the index search runs off the event loop.
+    """
+    normalized = normalize_query(query)
+    key = QueryCache.result_key(normalized, top_k, filters, collection_version(VECTOR_INDEX_PATH))
+
+    results = query_cache.results.get(key)
+    if results is not None:
+        return results
+
+    vector = query_cache.embeddings.get(normalized)
+    if vector is None:
+        vector = await embedding_batcher.embed(normalized)
+        query_cache.embeddings.put(normalized, vector)
+    results = await run_in(search_executor, lambda: vector_store.get().search(vector, top_k, filters))
+    query_cache.results.put(key, results)
+    return results
+
+
+def _doc_key(doc: Document) -> str:
+    return doc.metadata.get("chunk_id") or doc.page_content
+
+
+def lexical_search(query: str, top_k: int, filters: dict | None = None):
+    """
+    BM25 search. The sidecar has no metadata, so with filters each page
+    of the BM25 ranking is checked against the chunk metadata inside the
+    scan, until top_k matching chunks are found.
+    """
+    accept = None
+    if filters:
+        def accept(chunk_ids):
+            docs = vector_store.get().get(chunk_ids)
+            return [i for i in chunk_ids if i in docs and matches_filter(docs[i].metadata, filters)]
+    return lexical_store.get().search(query, top_k, accept)
+
+
+def hybrid_search(query: str, top_k: int, filters: dict | None = None):
+    """
+    BM25 and vector search run concurrently and are merged with
+    reciprocal rank fusion. Returns [(Document, distance)]: vector hits
+    keep their distance (RELEVANCE_THRESHOLD applies), BM25-only hits
+    have distance None and are only kept when they cover at least
+    HYBRID_LEXICAL_MIN_COVERAGE of the query.
+    """
+    normalized = normalize_query(query)
+    key = QueryCache.result_key(
+        normalized, top_k, filters, collection_version(VECTOR_INDEX_PATH), mode="hybrid"
+    )
 
-vector_db = Chroma(
-    collection_name=COLLECTION_NAME,
-    persist_directory=CHROMA_DB_PATH,
-    embedding_function=embedding_function
-)
+    results = query_cache.results.get(key)
+    if results is not None:
+        return results
 
+    candidates = top_k * HYBRID_CANDIDATE_FACTOR
+    vector_future = search_executor.submit(cached_similarity_search, query, candidates, filters)
+    lexical_future = search_executor.submit(lexical_search, query, candidates, filters)
 
-# ---------------- LangGraph Node ----------------
-def retrieval_node(state: RetrievalState) -> RetrievalState:
-    results = vector_db.similarity_search_with_score(
-        query=state.query,
-        k=state.top_k
+    results = fuse_hybrid(vector_future.result(), lexical_future.result(), top_k)
+    query_cache.results.put(key, results)
+    return results
+
+
+async def ahybrid_search(query: str, top_k: int, filters: dict | None = None):
+    """Async hybrid_search; shares its result-cache entries."""
+    normalized = normalize_query(query)
+    key = QueryCache.result_key(
+        normalized, top_k, filters, collection_version(VECTOR_INDEX_PATH), mode="hybrid"
+    )
+
+    results = query_cache.results.get(key)
+    if results is not None:
+        return results
+
+    candidates = top_k * HYBRID_CANDIDATE_FACTOR
+    vector_results, lexical_results = await asyncio.gather(
+        acached_similarity_search(query, candidates, filters),
+        run_in(search_executor, lexical_search, query, candidates, filters)
     )
+    # Fusion may read chunks back from the index
+    results = await run_in(search_executor, fuse_hybrid, vector_results, lexical_results, top_k)
+    query_cache.results.put(key, results)
+    return results
+
+
+def fuse_hybrid(vector_results, lexical_results, top_k: int,
+                min_coverage: float = HYBRID_LEXICAL_MIN_COVERAGE):
+    """
+    Reciprocal rank fusion of vector [(Document, distance)] and BM25
+    [LexicalHit] results (both already filtered). Returns
+    [(Document, distance)]: vector hits keep their distance, BM25-only
+    hits have distance None, and every BM25 hit carries its query
+    coverage as metadata["lexical_coverage"] for select_relevant().
+    Every BM25 hit counts towards the fused ranking, but a chunk only
+    the BM25 side found is returned only if it clears min_coverage.
+    """
+    by_key = {_doc_key(doc): (doc, distance) for doc, distance in vector_results}
+    coverage = {hit.chunk_id: hit.coverage for hit in lexical_results}
+
+    fused = [
+        chunk_id
+        for chunk_id, _ in reciprocal_rank_fusion([list(by_key), list(coverage)], k=RRF_K)
+        if chunk_id in by_key or coverage[chunk_id] >= min_coverage
+    ][:top_k]
+
+    # Lexical-only hits are fetched from the collection by id
+    missing = [chunk_id for chunk_id in fused if chunk_id not in by_key]
+    if missing:
+        for chunk_id, doc in vector_store.get().get(missing).items():
+            by_key[chunk_id] = (doc, None)
+
+    results = []
+    for chunk_id in fused:
+        if chunk_id not in by_key:
+            continue
+        doc, distance = by_key[chunk_id]
+        if chunk_id in coverage:
+            doc = Document(
+                page_content=doc.page_content,
+                metadata={**doc.metadata, "lexical_coverage": round(coverage[chunk_id], 4)}
+            )
+        results.append((doc, distance))
+    return results
+
 
+def is_relevant(doc: Document, distance: float | None) -> bool:
+    """Within RELEVANCE_THRESHOLD, or (hybrid mode) enough of the query matched lexically."""
+    if distance is not None and distance <= RELEVANCE_THRESHOLD:
+        return True
+    return doc.metadata.get("lexical_coverage", 0.0) >= HYBRID_LEXICAL_MIN_COVERAGE
+
+
+def select_relevant(results) -> List[Document]:
+    """
+    Applies is_relevant() to [(Document, distance)] search results; every
+    candidate's scores are logged at DEBUG level.
+    """
     relevant_docs = []
 
-    print("\n[DEBUG] Retrieval scores:")
+    debug = logger.isEnabledFor(logging.DEBUG)
     for doc, score in results:
-        print(f"Score: {score:.4f} | Preview: {doc.page_content[:120]}")
+        if debug:
+            logger.debug(
+                "Retrieval score: %s | Lexical coverage: %s | Preview: %s",
+                "n/a" if score is None else f"{score:.4f}",
+                doc.metadata.get("lexical_coverage"),
+                doc.page_content[:120],
+            )
 
-        if score <= RELEVANCE_THRESHOLD:
+        if is_relevant(doc, score):
             relevant_docs.append(doc)
 
+    return relevant_docs
+
+
+# ---------------- LangGraph Node ----------------
+def _search_params(state):
+    mode = getattr(state, "mode", DEFAULT_RETRIEVAL_MODE)
+    where = filters_where(getattr(state, "filters", None))
+    rerank = getattr(state, "rerank", False)
+    # With reranking the search over-fetches (as far as the rerank budget
+    # can score) and the cross-encoder decides relevance
+    top_k = reranker.candidate_count(state.top_k) if rerank else state.top_k
+    return mode, where, rerank, top_k
+
+
+def retrieval_node(state: RetrievalState) -> RetrievalState:
+    mode, where, rerank, top_k = _search_params(state)
+    if mode == "hybrid":
+        results = hybrid_search(state.query, top_k, where)
+    else:
+        results = cached_similarity_search(state.query, top_k, where)
+    return _apply_results(state, results, rerank)
+
+
+async def aretrieval_node(state: RetrievalState) -> RetrievalState:
+    mode, where, rerank, top_k = _search_params(state)
+    if mode == "hybrid":
+        results = await ahybrid_search(state.query, top_k, where)
+    else:
+        results = await acached_similarity_search(state.query, top_k, where)
+    return _apply_results(state, results, rerank)
+
+
+def _apply_results(state, results, rerank: bool):
+    if rerank:
+        state.candidates = [doc for doc, _ in results]
+        return state
+
+    relevant_docs = select_relevant(results)
+
     state.documents = relevant_docs
     state.no_relevant_docs = len(relevant_docs) == 0
-    print(state.no_relevant_docs,'******************', state.documents)
+    logger.debug("%d of %d results relevant", len(relevant_docs), len(results))
     return state
 
 
+def rerank_node(state: RetrievalState) -> RetrievalState:
+    scored = reranker.rerank(state.query, state.candidates, state.top_k)
+    return _apply_reranked(state, scored)
+
+
+async def arerank_node(state: RetrievalState) -> RetrievalState:
+    scored = await run_cpu(reranker.rerank, state.query, state.candidates, state.top_k)
+    return _apply_reranked(state, scored)
+
+
+def _apply_reranked(state, scored):
+    relevant_docs = select_reranked(scored)
+
+    state.documents = relevant_docs
+    state.candidates = []
+    state.no_relevant_docs = len(relevant_docs) == 0
+    return state
+
+
+def route_after_retrieve(state: RetrievalState) -> str:
+    return "rerank" if state.rerank else END
+
+
 # ---------------- LangGraph Workflow ----------------
-def build_retrieval_graph():
+def build_retrieval_graph(use_async: bool = False):
+    """use_async=True wires the async nodes; the graph must then be run with ainvoke."""
     graph = StateGraph(RetrievalState)
-    graph.add_node("retrieve", retrieval_node)
+    graph.add_node("retrieve", aretrieval_node if use_async else retrieval_node)
+    graph.add_node("rerank", arerank_node if use_async else rerank_node)
     graph.set_entry_point("retrieve")
-    graph.add_edge("retrieve", END)
+    graph.add_conditional_edges("retrieve", route_after_retrieve, {"rerank": "rerank", END: END})
+    graph.add_edge("rerank", END)
     return graph.compile()
 
 
+retrieval_graph = lazy_resource("retrieval_graph", build_retrieval_graph)
+async_retrieval_graph = lazy_resource("async_retrieval_graph", lambda: build_retrieval_graph(use_async=True))
+
+
 # ---------------- Public Service ----------------
 class RetrievalService:
-    def __init__(self):
-        self.graph = build_retrieval_graph()
+    """Cheap to construct; the graphs are compiled once per process on first use."""
+
+    @property
+    def graph(self):
+        return retrieval_graph.get()
+
+    @property
+    def async_graph(self):
+        return async_retrieval_graph.get()
 
     def query(self, request: RetrievalRequest) -> RetrievalResponse:
-        initial_state = RetrievalState(
+        final_state = self.graph.invoke(self._initial_state(request))
+        response, audit, alert = self._respond(request, final_state)
+
+        log_rag_interaction(**audit)
+        if alert:
+            send_email_notification(**alert)
+        return response
+
+    async def aquery(self, request: RetrievalRequest) -> RetrievalResponse:
+        """Async query() over the async retrieval graph."""
+        final_state = await self.async_graph.ainvoke(self._initial_state(request))
+        response, audit, alert = self._respond(request, final_state)
+
+        # Both only enqueue; see mlflow_logger.AuditSink and email_agent.EmailOutbox
+        log_rag_interaction(**audit)
+        if alert:
+            send_email_notification(**alert)
+        return response
+
+    @staticmethod
+    def stats() -> dict:
+        """Hit / miss counters of the process-wide query cache and reranker."""
+        return {"query_cache": query_cache.stats(), "reranker": reranker.stats()}
+
+    @staticmethod
+    def _initial_state(request: RetrievalRequest) -> RetrievalState:
+        return RetrievalState(
             query=request.query,
-            top_k=request.top_k
+            top_k=request.top_k,
+            mode=request.mode,
+            filters=request.filters,
+            rerank=request.rerank
         )
 
-        final_state = self.graph.invoke(initial_state)
-
+    @staticmethod
+    def _respond(request: RetrievalRequest, final_state):
+        """Returns (response, MLflow audit kwargs, alert email kwargs or None)."""
         if isinstance(final_state, dict):
             final_state = RetrievalState(**final_state)
 
@@ -118,14 +509,14 @@ class RetrievalService:
         )
 
         # ---------------- Agents ----------------
-        important_info_detected = detect_important_information(docs_text)
+        important_info_detected = documents_important(docs)
 
         images_present = any(
             doc.metadata.get("type") == "image" for doc in docs
         )
 
         # ---------------- MLflow Logging ----------------
-        log_rag_interaction(
+        audit = dict(
             query=request.query,
             response="\n".join(docs_text[:3]),
             retrieved_chunks=len(docs),
@@ -137,6 +528,7 @@ class RetrievalService:
         )
 
         # ---------------- Email Notification ----------------
+        alert = None
         if request.user_email and (important_info_detected or images_present):
             email_body = f"""
 Enterprise RAG Alert
@@ -152,18 +544,129 @@ Flags:
 - Images Present: {images_present}
 """
 
-            send_email_notification(
+            alert = dict(
                 to_email=request.user_email,
                 subject="Enterprise RAG Alert: Important PDF Content",
                 body=email_body
             )
 
-        return RetrievalResponse(
+        response = RetrievalResponse(
             query=request.query,
             documents=docs_text,
             important_info_detected=important_info_detected,
             images_present=images_present
         )
+        return response, audit, alert
+
+    def query_batch(self, requests: List[RetrievalRequest]) -> List[RetrievalResponse]:
+        """
+        Bulk variant of query() for evaluation jobs and agent fan-out.
+
+        Vector-mode requests with the same filters share one embedding pass
+        and one multi-query search (at the largest top_k, trimmed per
+        request); hybrid requests go through hybrid_search. Reranked requests
+        share a single cross-encoder forward pass. The audit record and alert
+        emails are aggregated: one audit record per batch and one digest per
+        recipient.
+        """
+        if not requests:
+            return []
+
+        results = [None] * len(requests)
+        wheres = [filters_where(r.filters) for r in requests]
+        reranked_queries = sum(1 for r in requests if r.rerank)
+        fetch_ks = [
+            reranker.candidate_count(r.top_k, reranked_queries) if r.rerank else r.top_k for r in requests
+        ]
+        vector_groups = {}
+        for i, request in enumerate(requests):
+            if request.mode != "hybrid":
+                vector_groups.setdefault(json.dumps(wheres[i], sort_keys=True), []).append(i)
+        for vector_idx in vector_groups.values():
+            max_k = max(fetch_ks[i] for i in vector_idx)
+            batch = batch_similarity_search(
+                [requests[i].query for i in vector_idx], max_k, wheres[vector_idx[0]]
+            )
+            for i, hits in zip(vector_idx, batch):
+                results[i] = hits[:fetch_ks[i]]
+        for i, request in enumerate(requests):
+            if request.mode == "hybrid":
+                results[i] = hybrid_search(request.query, fetch_ks[i], wheres[i])
+
+        relevant = [None] * len(requests)
+        rerank_idx = [i for i, r in enumerate(requests) if r.rerank]
+        if rerank_idx:
+            reranked = reranker.rerank_many(
+                [requests[i].query for i in rerank_idx],
+                [[doc for doc, _ in results[i]] for i in rerank_idx],
+                [requests[i].top_k for i in rerank_idx]
+            )
+            for i, scored in zip(rerank_idx, reranked):
+                relevant[i] = select_reranked(scored)
+        for i, hits in enumerate(results):
+            if relevant[i] is None:
+                relevant[i] = select_relevant(hits)
+
+        responses = []
+        pdf_sources = set()
+        alerts = {}
+        retrieved_chunks = 0
+        for request, docs in zip(requests, relevant):
+            docs_text = [doc.page_content for doc in docs]
+            sources = {doc.metadata.get("pdf_name", "unknown") for doc in docs}
+
+            important_info_detected = documents_important(docs)
+            images_present = any(doc.metadata.get("type") == "image" for doc in docs)
+
+            responses.append(RetrievalResponse(
+                query=request.query,
+                documents=docs_text,
+                important_info_detected=important_info_detected,
+                images_present=images_present
+            ))
+            pdf_sources |= sources
+            retrieved_chunks += len(docs)
+
+            if request.user_email and (important_info_detected or images_present):
+                alerts.setdefault(request.user_email, []).append(
+                    (request.query, sorted(sources), important_info_detected, images_present)
+                )
+
+        # ---------------- MLflow Logging (one audit record per batch) ----------------
+        log_rag_batch(
+            queries=[r.query for r in requests],
+            retrieved_chunks=retrieved_chunks,
+            pdf_sources=sorted(pdf_sources),
+            flags={
+                "important_info_detected": sum(r.important_info_detected for r in responses),
+                "images_present": sum(r.images_present for r in responses),
+                "no_relevant_docs": sum(not r.documents for r in responses)
+            }
+        )
+
+        # ---------------- Email Notification (one digest per recipient) ----------------
+        for user_email, items in alerts.items():
+            sections = "\n".join(
+                f"""
+Query:
+{query}
+
+PDF Sources:
+{', '.join(sources)}
+
+Flags:
+- Important Info Detected: {important}
+- Images Present: {images}
+"""
+                for query, sources, important, images in items
+            )
+            send_email_notification(
+                to_email=user_email,
+                subject=f"Enterprise RAG Alert: Important PDF Content ({len(items)} queries)",
+                body=f"\nEnterprise RAG Alert Digest\n{sections}"
+            )
+
+        return responses
 
 
 # ---------------- Smoke Test ----------------
@@ -171,9 +674,7 @@ if __name__ == "__main__":
     service = RetrievalService()
 
     try:
-        num_docs = len(
-            vector_db._collection.get(include=["documents"])["documents"]
-        )
+        num_docs = vector_store.get().count()
         print(f"[DEBUG] Vector DB contains {num_docs} documents.")
     except Exception as e:
         print(f"[DEBUG] Could not fetch collection size: {e}")
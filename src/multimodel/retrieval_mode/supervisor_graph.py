@@ -2,13 +2,18 @@ from typing import List
 from pydantic import BaseModel
 from langchain_core.documents import Document
 
-from ..retrieval_mode.retrieval import retrieval_node
+from ..retrieval_mode.retrieval import (
+    retrieval_node, rerank_node, aretrieval_node, arerank_node, RetrievalFilters
+)
+from ..retrieval_mode.reranker import RERANK_ENABLED
 #from supervisor_graph import SupervisorState
 
-from ..retrieval_mode.importance_agent import detect_important_information
+from ..retrieval_mode.importance_agent import documents_important
 
 from ..retrieval_mode.email_agent import send_email_notification
 from ..retrieval_mode.mlflow_logger import log_rag_interaction
+from ..retrieval_mode.async_runtime import run_blocking, submit_background
+from ..resource_registry import lazy_resource
 from langgraph.graph import StateGraph, END
 
 from ..pdf_ingestion.vision.vision_agent import vision_agent_enrich
@@ -18,6 +23,8 @@ class SupervisorState(BaseModel):
     query: str
     top_k: int
     user_email: str | None = None
+    filters: RetrievalFilters | None = None
+    rerank: bool = RERANK_ENABLED
 
     documents: List[Document] = []
 
@@ -26,42 +33,58 @@ class SupervisorState(BaseModel):
 
     response_text: str = ""
 
-def retrieval_agent(state: SupervisorState) -> SupervisorState:
+def _retrieval_state(state: SupervisorState):
     retrieval_state = {
         "query": state.query,
-        "top_k": state.top_k
+        "top_k": state.top_k,
+        "filters": state.filters,
+        "rerank": state.rerank
     }
+    return type("Tmp", (), retrieval_state)
 
-    result = retrieval_node(type("Tmp", (), retrieval_state))
-    state.documents = result.documents
-    return state
 
+# Nodes return only the keys they write, so parallel branches never
+# update the same key in one step
+def retrieval_agent(state: SupervisorState) -> dict:
+    result = retrieval_node(_retrieval_state(state))
+    if state.rerank:
+        result = rerank_node(result)
+    return {"documents": result.documents}
+
+
+async def aretrieval_agent(state: SupervisorState) -> dict:
+    result = await aretrieval_node(_retrieval_state(state))
+    if state.rerank:
+        result = await arerank_node(result)
+    return {"documents": result.documents}
 
-def importance_agent_node(state: SupervisorState) -> SupervisorState:
-    texts = [doc.page_content for doc in state.documents]
-    state.important_info_detected = detect_important_information(texts)
-    return state
 
-def image_agent_node(state: SupervisorState) -> SupervisorState:
-    state.images_present = any(
+def importance_agent_node(state: SupervisorState) -> dict:
+    return {"important_info_detected": documents_important(state.documents)}
+
+def image_agent_node(state: SupervisorState) -> dict:
+    return {"images_present": any(
         doc.metadata.get("type") == "image"
         for doc in state.documents
-    )
-    return state
+    )}
 
-def vision_agent_node(state: SupervisorState) -> SupervisorState:
-    state.documents = vision_agent_enrich(state.documents)
-    return state
+def vision_agent_node(state: SupervisorState) -> dict:
+    return {"documents": vision_agent_enrich(state.documents)}
 
 
+async def avision_agent_node(state: SupervisorState) -> dict:
+    # Captioning shells out to OCR
+    return {"documents": await run_blocking(vision_agent_enrich, state.documents)}
 
-def audit_and_notify_agent(state: SupervisorState) -> SupervisorState:
+
+def _audit_and_alert(state: SupervisorState):
+    """(MLflow audit kwargs, alert email kwargs or None) for a finished query."""
     texts = [doc.page_content for doc in state.documents]
     pdf_sources = list(
         {doc.metadata.get("pdf_name", "unknown") for doc in state.documents}
     )
 
-    log_rag_interaction(
+    audit = dict(
         query=state.query,
         response="\n".join(texts[:3]),
         retrieved_chunks=len(state.documents),
@@ -72,8 +95,9 @@ def audit_and_notify_agent(state: SupervisorState) -> SupervisorState:
         }
     )
 
+    alert = None
     if state.user_email and (state.important_info_detected or state.images_present):
-        send_email_notification(
+        alert = dict(
             to_email=state.user_email,
             subject="Enterprise RAG Alert",
             body=f"""
@@ -84,36 +108,79 @@ Images Present: {state.images_present}
 """
         )
 
-    return state
+    return audit, alert
+
+
+def audit_and_notify(state: SupervisorState):
+    """MLflow audit and alert email; runs after the answer has been returned."""
+    audit, alert = _audit_and_alert(state)
+    log_rag_interaction(**audit)
+    if alert:
+        send_email_notification(**alert)
+
 
-def build_supervisor_graph():
+def build_supervisor_graph(use_async: bool = False):
+    """
+    retrieve fans out to three independent branches that join at END:
+        vision       (image captions)
+        importance   (ingestion-time importance tags in chunk metadata)
+        image_check  (chunk type metadata)
+    Audit and notification are not graph nodes: SupervisorService runs
+    them in the background once the graph has produced the answer.
+    use_async=True wires the async agents; the graph must then be run with ainvoke.
+    """
     graph = StateGraph(SupervisorState)
 
-    graph.add_node("retrieve", retrieval_agent)
-    graph.add_node("vision", vision_agent_node)
+    graph.add_node("retrieve", aretrieval_agent if use_async else retrieval_agent)
+    graph.add_node("vision", avision_agent_node if use_async else vision_agent_node)
     graph.add_node("importance", importance_agent_node)
     graph.add_node("image_check", image_agent_node)
-    graph.add_node("audit_notify", audit_and_notify_agent)
 
     graph.set_entry_point("retrieve")
 
     graph.add_edge("retrieve", "vision")
-    graph.add_edge("vision", "importance")
-    graph.add_edge("importance", "image_check")
-    graph.add_edge("image_check", "audit_notify")
-    graph.add_edge("audit_notify", END)
+    graph.add_edge("retrieve", "importance")
+    graph.add_edge("retrieve", "image_check")
+    graph.add_edge(["vision", "importance", "image_check"], END)
 
     return graph.compile()
 
 
+supervisor_graph = lazy_resource("supervisor_graph", build_supervisor_graph)
+async_supervisor_graph = lazy_resource("async_supervisor_graph", lambda: build_supervisor_graph(use_async=True))
+
+
 class SupervisorService:
-    def __init__(self):
-        self.graph = build_supervisor_graph()
+    """Cheap to construct; the graphs are compiled once per process on first use."""
+
+    @property
+    def graph(self):
+        return supervisor_graph.get()
+
+    @property
+    def async_graph(self):
+        return async_supervisor_graph.get()
+
+    def run(self, query: str, top_k: int = 5, user_email: str | None = None,
+            filters: RetrievalFilters | None = None):
+        state = SupervisorState(
+            query=query,
+            top_k=top_k,
+            user_email=user_email,
+            filters=filters
+        )
+        result = self.graph.invoke(state)
+        submit_background(audit_and_notify, SupervisorState(**result))
+        return result
 
-    def run(self, query: str, top_k: int = 5, user_email: str | None = None):
+    async def arun(self, query: str, top_k: int = 5, user_email: str | None = None,
+                   filters: RetrievalFilters | None = None):
         state = SupervisorState(
             query=query,
             top_k=top_k,
-            user_email=user_email
+            user_email=user_email,
+            filters=filters
         )
-        return self.graph.invoke(state)
+        result = await self.async_graph.ainvoke(state)
+        submit_background(audit_and_notify, SupervisorState(**result))
+        return result
@@ -0,0 +1,149 @@
+"""
+startup_benchmark.py
+
+Import-time and warm-up cost of the service modules, so startup cost
+cannot creep back.
+
+Each module is imported --repeats times in a fresh interpreter and the
+import wall time is recorded. A module import must not load any
+resource_registry resource (embedding model, vector store, graphs, ...);
+any that it does is reported under loaded_at_import and fails the run.
+--warm-up additionally times warm_up() per resource, and --top lists the
+slowest imports reported by `python -X importtime`.
+
+--baseline compares against a stored report and exits with status 1 when
+import time regresses beyond the tolerance (and by more than
+IMPORT_SLACK_MS, to ride out interpreter noise).
+
+Usage (from the repository root):
+    python -m src.multimodel.startup_benchmark --output startup_baseline.json
+    python -m src.multimodel.startup_benchmark --baseline startup_baseline.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from .benchmark_utils import latency_summary
+
+
+# ---------------- Configuration ----------------
+REPO_ROOT = Path(__file__).resolve().parents[2]
+MODULES = [
+    "src.multimodel.retrieval_mode.mlflow_logger",
+    "src.multimodel.retrieval_mode.email_agent",
+    "src.multimodel.retrieval_mode.retrieval",
+    "src.multimodel.retrieval_mode.supervisor_graph",
+    "src.mcp.server",
+]
+IMPORT_TOLERANCE = 0.25
+IMPORT_SLACK_MS = 50.0
+REPORT_MARKER = "@@startup-report "
+
+# Runs in a fresh interpreter: argv = module, warm_up flag
+PROBE = f"""
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - started
+from src.multimodel.resource_registry import loaded_resources, warm_up
+report = {{"import_seconds": seconds, "loaded_at_import": loaded_resources()}}
+if sys.argv[2] == "1":
+    report["warm_up"] = warm_up()
+print({REPORT_MARKER!r} + json.dumps(report))
+"""
+
+
+# ---------------- Probes ----------------
+def probe(module: str, warm: bool = False, importtime: bool = False) -> tuple[dict, str]:
+    """Imports module in a child interpreter; returns (probe report, stderr)."""
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", PROBE, module, "1" if warm else "0"]
+    result = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith(REPORT_MARKER):
+            return json.loads(line[len(REPORT_MARKER):]), result.stderr
+    raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+
+def slowest_imports(importtime_log: str, top: int) -> list[dict]:
+    """Top cumulative entries of a `-X importtime` log."""
+    entries = []
+    for line in importtime_log.splitlines():
+        # import time: <self us> | <cumulative us> | <indented module name>
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append({"module": name.strip(), "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    entries.sort(key=lambda e: e["cumulative_ms"], reverse=True)
+    return entries[:top]
+
+
+def measure_module(module: str, repeats: int, warm: bool, top: int) -> dict:
+    seconds, loaded = [], set()
+    for _ in range(repeats):
+        report, _ = probe(module)
+        seconds.append(report["import_seconds"])
+        loaded.update(report["loaded_at_import"])
+
+    result = {"import": latency_summary(seconds), "loaded_at_import": sorted(loaded)}
+    if top:
+        _, log = probe(module, importtime=True)
+        result["slowest_imports"] = slowest_imports(log, top)
+    if warm:
+        report, _ = probe(module, warm=True)
+        result["warm_up"] = report["warm_up"]
+    return result
+
+
+# ---------------- Regression Check ----------------
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float = IMPORT_TOLERANCE) -> dict:
+    comparison, regressions = {}, []
+    for module, metrics in report["modules"].items():
+        if metrics["loaded_at_import"]:
+            regressions.append(f"{module}.loaded_at_import")
+        previous = baseline.get("modules", {}).get(module)
+        if not previous:
+            continue
+        current, before = metrics["import"]["p50_ms"], previous["import"]["p50_ms"]
+        regressed = current > before * (1 + tolerance) and current - before > IMPORT_SLACK_MS
+        comparison[module] = {
+            "baseline_p50_ms": before,
+            "current_p50_ms": current,
+            "change": round((current - before) / before, 4) if before else None,
+            "regressed": regressed,
+        }
+        if regressed:
+            regressions.append(f"{module}.import_p50_ms")
+    return {"modules": comparison, "regressions": regressions}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service import-time / warm-up benchmark")
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warm-up", action="store_true", help="also time warm_up() per resource")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list (0 = skip)")
+    parser.add_argument("--baseline", help="stored report to compare against")
+    parser.add_argument("--tolerance", type=float, default=IMPORT_TOLERANCE)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = {
+        "config": {"repeats": args.repeats, "python": sys.version.split()[0]},
+        "modules": {m: measure_module(m, args.repeats, args.warm_up, args.top) for m in args.modules},
+    }
+    report["comparison"] = compare_to_baseline(
+        report, json.loads(Path(args.baseline).read_text(encoding="utf-8")) if args.baseline else {}, args.tolerance
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    else:
+        print(output)
+
+    if report["comparison"]["regressions"]:
+        print(f"[WARNING] Regressions: {', '.join(report['comparison']['regressions'])}", file=sys.stderr)
+        sys.exit(1)
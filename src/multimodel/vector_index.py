@@ -0,0 +1,1064 @@
+"""
+vector_index.py
+
+Pluggable vector index shared by ingestion (EmbeddingWriter) and
+retrieval. Both sides talk to a VectorIndex; VECTOR_BACKEND picks the store:
+
+- "chroma" : langchain Chroma collection (default)
+- "native" : in-process NumPy index over a memory-mapped float32 file,
+             exact flat search, plus an HNSW graph (hnswlib, optional)
+             once the collection reaches HNSW_MIN_ROWS
+
+Distances are squared L2 for both backends (Chroma's default space), so
+RELEVANCE_THRESHOLD means the same thing whichever store is used.
+Filters use Chroma's where syntax ($and/$or, $eq/$ne/$in/$nin and
+$gt/$gte/$lt/$lte). The native backend resolves them to a row mask
+through columnar metadata indexes before any vector is scored.
+
+Native layout (vector_store/native/<collection>/):
+    index.json               committed header: dim, rows, log size, generation
+    vectors-<gen>.f32        row-major float32 embeddings, append-only
+    records-<gen>.mpk        msgpack log: ["put", row, id, document, metadata] | ["del", id]
+    codes-<gen>.q            quantized copy of the vectors (see vector_quantization.py)
+    hnsw-<gen>-<rows>.bin    HNSW graph over the first <rows> rows
+
+Writers append rows and log entries, then swap the header in atomically;
+writers in different processes are serialized by an flock on
+write.lock. Readers map the vector file and the record log read-only,
+so any number of processes share one copy through the page cache. Per
+row, a process only keeps the entry's offset and length in the log,
+the live-id lookup and the columnar filter indexes; documents and
+metadata are decoded from the mapped log when a row is returned. New
+rows are picked up by replaying the log tail whenever the header
+changes. Upserts and deletes leave tombstoned rows behind until
+persist() compacts them into a new generation.
+
+A quantized collection scans its int8 / binary codes first and re-scores
+a shortlist against the float32 file; it is not given an HNSW graph,
+which would hold a full-precision copy in memory again.
+
+Maintenance commands (repository root):
+    python -m src.multimodel.vector_index migrate              # copy the Chroma collection in
+    python -m src.multimodel.vector_index quantize int8        # rebuild as none / int8 / binary
+    python -m src.multimodel.vector_index evaluate --k 10      # recall vs resident memory per quantization
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import mmap
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import msgpack
+import numpy as np
+from langchain_core.documents import Document
+
+from .collection_version import bump_collection_version
+from .vector_quantization import VECTOR_QUANTIZATION, QUANTIZERS, fit_quantizer, load_quantizer
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: writers are only serialized within one process
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- Configuration ----------------
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+# Native backend: collections at least this large are searched through HNSW
+HNSW_MIN_ROWS = int(os.getenv("HNSW_MIN_ROWS", "50000"))
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 128
+# HNSW candidates fetched per requested result, absorbing tombstoned rows
+HNSW_OVERFETCH = 2
+# persist() rebuilds the graph once this fraction of rows is not in it
+HNSW_REBUILD_RATIO = 0.1
+# persist() compacts the files once this fraction of rows is tombstoned
+COMPACT_DEAD_RATIO = 0.3
+# Rows scored per matrix product in flat search (bounds temporary memory)
+FLAT_BLOCK_ROWS = 65536
+# Metadata fields with columnar indexes in the native backend
+INDEXED_FIELDS = ("category", "pdf_name", "type", "page", "ingested_at")
+# Filtered searches over at most this fraction of the rows gather just those rows
+FILTER_GATHER_RATIO = 0.25
+# Filtered searches matching at least this many rows go through the HNSW graph
+HNSW_FILTER_MIN_ROWS = 20000
+HEADER_FILE_NAME = "index.json"
+WRITE_LOCK_FILE_NAME = "write.lock"
+# Bytes of the record log decoded per read while replaying it
+LOG_READ_BYTES = 8 * 1024 * 1024
+
+
+# ---------------- Interface ----------------
+class VectorIndex:
+    """
+    Backend-neutral vector collection. Search results are
+    [(Document, distance)] best first, distance = squared L2.
+    """
+
+    def upsert(self, ids: list[str], embeddings, documents: list[str], metadatas: list[dict]):
+        raise NotImplementedError
+
+    def delete(self, ids: list[str]):
+        raise NotImplementedError
+
+    def search_batch(self, embeddings, k: int, filters: dict | None = None) -> list[list[tuple[Document, float]]]:
+        raise NotImplementedError
+
+    def search(self, embedding, k: int, filters: dict | None = None) -> list[tuple[Document, float]]:
+        return self.search_batch([embedding], k, filters)[0]
+
+    def get(self, ids: list[str]) -> dict[str, Document]:
+        """id -> Document for the ids present in the collection."""
+        raise NotImplementedError
+
+    def iter_batches(self, page_size: int = 1000):
+        """Yields {"ids", "embeddings", "documents", "metadatas"} pages of the whole collection."""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def persist(self):
+        pass
+
+
+# ---------------- Chroma Backend ----------------
+class ChromaIndex(VectorIndex):
+    def __init__(self, directory, collection_name: str):
+        from langchain_community.vectorstores import Chroma
+
+        # Vectors are always supplied by the caller, so no embedding function
+        self.store = Chroma(
+            collection_name=collection_name,
+            persist_directory=str(directory)
+        )
+        self.collection = self.store._collection
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            documents=documents,
+        )
+
+    def delete(self, ids):
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def search_batch(self, embeddings, k, filters=None):
+        raw = self.collection.query(
+            query_embeddings=list(embeddings),
+            n_results=k,
+            where=filters or None,
+            include=["documents", "metadatas", "distances"]
+        )
+        return [
+            [
+                (Document(page_content=text, metadata=metadata or {}), distance)
+                for text, metadata, distance in zip(texts, metadatas, distances)
+            ]
+            for texts, metadatas, distances in zip(raw["documents"], raw["metadatas"], raw["distances"])
+        ]
+
+    def get(self, ids):
+        fetched = self.collection.get(ids=list(ids), include=["documents", "metadatas"])
+        return {
+            chunk_id: Document(page_content=text, metadata=metadata or {})
+            for chunk_id, text, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"])
+        }
+
+    def iter_batches(self, page_size=1000):
+        offset = 0
+        while True:
+            batch = self.collection.get(
+                include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset
+            )
+            if not batch["ids"]:
+                return
+            yield {
+                "ids": batch["ids"],
+                "embeddings": batch["embeddings"],
+                "documents": batch["documents"],
+                "metadatas": [m or {} for m in batch["metadatas"]],
+            }
+            offset += len(batch["ids"])
+
+    def count(self):
+        return self.collection.count()
+
+    def persist(self):
+        if hasattr(self.store, "persist"):
+            self.store.persist()
+
+
+# ---------------- Native Backend ----------------
+def l2_distances(queries, vectors, sq_norms):
+    """Squared L2 from every query to every row, using precomputed row norms."""
+    q_norms = np.einsum("ij,ij->i", queries, queries)
+    return sq_norms[None, :] - 2.0 * (queries @ vectors.T) + q_norms[:, None]
+
+
+def _top_k(queries, blocks, k: int, scorer=l2_distances) -> list[list[tuple[int, float]]]:
+    """
+    Top-k of every query over `blocks` of (row ids, vectors or codes,
+    squared norms, valid mask or None), ranked by `scorer`.
+    Returns [(row, distance)] best first, one list per query.
+    """
+    m = len(queries)
+    best_d = np.empty((m, 0), dtype=np.float32)
+    best_i = np.empty((m, 0), dtype=np.int64)
+
+    for row_ids, vectors, sq_norms, valid in blocks:
+        d = scorer(queries, vectors, sq_norms)
+        if valid is not None:
+            d[:, ~valid] = np.inf
+        if d.shape[1] > k:
+            idx = np.argpartition(d, k - 1, axis=1)[:, :k]
+        else:
+            idx = np.broadcast_to(np.arange(d.shape[1]), d.shape)
+
+        best_d = np.concatenate([best_d, np.take_along_axis(d, idx, axis=1)], axis=1)
+        best_i = np.concatenate([best_i, row_ids[idx]], axis=1)
+        if best_d.shape[1] > k:
+            keep = np.argpartition(best_d, k - 1, axis=1)[:, :k]
+            best_d = np.take_along_axis(best_d, keep, axis=1)
+            best_i = np.take_along_axis(best_i, keep, axis=1)
+
+    order = np.argsort(best_d, axis=1)
+    best_d = np.take_along_axis(best_d, order, axis=1)
+    best_i = np.take_along_axis(best_i, order, axis=1)
+    return [
+        [(int(row), max(float(dist), 0.0)) for row, dist in zip(rows, dists) if np.isfinite(dist)]
+        for rows, dists in zip(best_i, best_d)
+    ]
+
+
+def flat_search(queries, vectors, sq_norms, valid, k: int, scorer=l2_distances) -> list[list[tuple[int, float]]]:
+    """
+    Top-k over the rows of `vectors` where `valid` is set, scored in
+    FLAT_BLOCK_ROWS blocks so a memory-mapped matrix is streamed rather
+    than copied. Blocks with no valid row are skipped.
+    """
+    if k <= 0 or len(vectors) == 0:
+        return [[] for _ in range(len(queries))]
+
+    def blocks():
+        for start in range(0, len(vectors), FLAT_BLOCK_ROWS):
+            end = min(start + FLAT_BLOCK_ROWS, len(vectors))
+            if valid[start:end].any():
+                yield np.arange(start, end), vectors[start:end], sq_norms[start:end], valid[start:end]
+
+    return _top_k(queries, blocks(), k, scorer)
+
+
+def flat_search_rows(queries, vectors, sq_norms, rows, k: int, scorer=l2_distances) -> list[list[tuple[int, float]]]:
+    """Top-k over an explicit, pre-filtered set of rows; only those vectors are read."""
+    if k <= 0 or len(rows) == 0:
+        return [[] for _ in range(len(queries))]
+
+    def blocks():
+        for start in range(0, len(rows), FLAT_BLOCK_ROWS):
+            block = rows[start:start + FLAT_BLOCK_ROWS]
+            yield block, np.asarray(vectors[block]), sq_norms[block], None
+
+    return _top_k(queries, blocks(), k, scorer)
+
+
+def quantized_search(queries, k: int, quantizer, codes, vectors, sq_norms, valid, rows=None):
+    """
+    First pass over the quantized codes for k * rescore_factor candidates
+    (under the `valid` mask, or over explicit `rows`), then exact
+    re-scoring of that shortlist against the full-precision vectors.
+    """
+    shortlist_k = k * quantizer.rescore_factor
+    if rows is None:
+        shortlists = flat_search(queries, codes, sq_norms, valid, shortlist_k, quantizer.distances)
+    else:
+        shortlists = flat_search_rows(queries, codes, sq_norms, rows, shortlist_k, quantizer.distances)
+
+    return [
+        # Sorted rows keep the reads from the memory-mapped file sequential
+        flat_search_rows(queries[q:q + 1], vectors, sq_norms, np.sort([row for row, _ in shortlist]), k)[0]
+        for q, shortlist in enumerate(shortlists)
+    ]
+
+
+# ---------------- Metadata Filters ----------------
+_FILTER_OPERATORS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$gt": lambda value, operand: value > operand,
+    "$gte": lambda value, operand: value >= operand,
+    "$lt": lambda value, operand: value < operand,
+    "$lte": lambda value, operand: value <= operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+}
+_RANGE_OPERATORS = {
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+}
+
+
+def _conditions(condition) -> dict:
+    return condition if isinstance(condition, dict) else {"$eq": condition}
+
+
+def matches_filter(metadata: dict, where: dict) -> bool:
+    """Evaluates a Chroma-style where clause against one metadata dict."""
+    if "$and" in where:
+        return all(matches_filter(metadata, clause) for clause in where["$and"])
+    if "$or" in where:
+        return any(matches_filter(metadata, clause) for clause in where["$or"])
+
+    for field, condition in where.items():
+        value = metadata.get(field)
+        for op, operand in _conditions(condition).items():
+            if op not in _FILTER_OPERATORS:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            try:
+                if not _FILTER_OPERATORS[op](value, operand):
+                    return False
+            except TypeError:
+                # Range comparison against a missing / non-numeric value
+                return False
+    return True
+
+
+class MetadataIndex:
+    """
+    Columnar per-field indexes over row metadata, so filters are
+    evaluated as vectorised masks before any vector is scored:
+    dictionary-encoded value codes for $eq / $ne / $in / $nin and a
+    float column for range operators. Fields outside INDEXED_FIELDS
+    are still filterable, row by row.
+    """
+
+    def __init__(self, fields=INDEXED_FIELDS):
+        self.fields = tuple(fields)
+        self.vocab = {field: {} for field in self.fields}
+        self.codes = {field: np.full(0, -1, dtype=np.int32) for field in self.fields}
+        self.numbers = {field: np.full(0, np.nan, dtype=np.float64) for field in self.fields}
+
+    def add(self, row: int, metadata: dict):
+        for field in self.fields:
+            codes = self.codes[field] = _grow(self.codes[field], row + 1, fill=-1)
+            numbers = self.numbers[field] = _grow(self.numbers[field], row + 1, fill=np.nan)
+            value = metadata.get(field)
+            if value is None:
+                continue
+            vocab = self.vocab[field]
+            codes[row] = vocab.setdefault(value, len(vocab))
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                numbers[row] = value
+
+    def bytes_per_row(self) -> int:
+        return sum(self.codes[f].itemsize + self.numbers[f].itemsize for f in self.fields)
+
+    def mask(self, where: dict, rows: int, metadata_of):
+        """
+        Boolean mask over the first `rows` rows for a Chroma-style where
+        clause; metadata_of(row) is only called for non-indexed fields.
+        """
+        if "$and" in where:
+            return np.logical_and.reduce([self.mask(clause, rows, metadata_of) for clause in where["$and"]])
+        if "$or" in where:
+            return np.logical_or.reduce([self.mask(clause, rows, metadata_of) for clause in where["$or"]])
+
+        mask = np.ones(rows, dtype=bool)
+        for field, condition in where.items():
+            mask &= self._field_mask(field, _conditions(condition), rows, metadata_of)
+        return mask
+
+    def _field_mask(self, field: str, condition: dict, rows: int, metadata_of):
+        if field not in self.vocab:
+            # Read row by row from the record log
+            return np.fromiter(
+                (matches_filter(metadata_of(row), {field: condition}) for row in range(rows)),
+                dtype=bool, count=rows
+            )
+
+        codes = self.codes[field][:rows]
+        numbers = self.numbers[field][:rows]
+        vocab = self.vocab[field]
+        mask = np.ones(rows, dtype=bool)
+        for op, operand in condition.items():
+            if op in ("$eq", "$ne", "$in", "$nin"):
+                values = operand if op in ("$in", "$nin") else [operand]
+                matched = np.isin(codes, [vocab[v] for v in values if v in vocab])
+                mask &= ~matched if op in ("$ne", "$nin") else matched
+            elif op in _RANGE_OPERATORS:
+                mask &= _RANGE_OPERATORS[op](numbers, operand)
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+        return mask
+
+
+def _write_at(path: Path, offset: int, data: bytes):
+    """Writes data at offset, dropping anything an interrupted write left past it."""
+    with open(path, "r+b" if path.exists() else "wb") as f:
+        f.seek(offset)
+        f.write(data)
+        f.truncate()
+
+
+def _grow(array, size: int, fill=0):
+    if size <= len(array):
+        return array
+    grown = np.full(max(size, 2 * len(array), 1024), fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class RecordView(NamedTuple):
+    """
+    Row-addressed reads from the memory-mapped record log: only each
+    row's entry offset and length are held in memory.
+    """
+    data: object
+    offsets: object
+    lengths: object
+
+    def entry(self, row: int) -> list:
+        """["put", row, chunk_id, document, metadata]"""
+        start = int(self.offsets[row])
+        return msgpack.unpackb(self.data[start:start + int(self.lengths[row])], raw=False)
+
+    def metadata(self, row: int) -> dict:
+        return self.entry(row)[4] or {}
+
+    def document(self, row: int) -> Document:
+        _, _, _, text, metadata = self.entry(row)
+        return Document(page_content=text, metadata=metadata or {})
+
+
+class IndexView(NamedTuple):
+    """Consistent snapshot of a NumpyIndex taken at the start of a read."""
+    rows: int
+    vectors: object
+    sq_norms: object
+    alive: object
+    hnsw: object
+    hnsw_rows: int
+    quantizer: object
+    codes: object
+    records: RecordView
+    metadata_index: MetadataIndex
+
+
+class NumpyIndex(VectorIndex):
+    """
+    Memory-mapped native index (see module docstring for the file layout).
+    Any number of processes may read; writers take turns on write.lock.
+    `quantization` only applies when the collection is first written;
+    afterwards the header decides (see requantize()).
+    """
+
+    def __init__(self, directory, quantization: str = VECTOR_QUANTIZATION):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.header_path = self.directory / HEADER_FILE_NAME
+        self.quantization = quantization
+        self._lock = threading.RLock()
+        self._write_depth = 0
+        self._write_lock_file = None
+        self._packer = msgpack.Packer(use_bin_type=True)
+        self._stamp = None
+        self._reset({
+            "generation": 0, "dim": None, "rows": 0, "log_bytes": 0, "hnsw_rows": 0,
+            "quantization": None, "quantizer_params": None,
+        })
+        self._refresh()
+
+    # ---------- Files ----------
+    def _vectors_file(self, generation) -> Path:
+        return self.directory / f"vectors-{generation}.f32"
+
+    def _codes_file(self, generation) -> Path:
+        return self.directory / f"codes-{generation}.q"
+
+    def _records_file(self, generation) -> Path:
+        return self.directory / f"records-{generation}.mpk"
+
+    def _hnsw_file(self, generation, rows) -> Path:
+        return self.directory / f"hnsw-{generation}-{rows}.bin"
+
+    def _remove_stale_files(self):
+        generation = self._header["generation"]
+        current = {
+            self._vectors_file(generation),
+            self._codes_file(generation),
+            self._records_file(generation),
+            self._hnsw_file(generation, self._header["hnsw_rows"]),
+            self.header_path,
+        }
+        for path in self.directory.iterdir():
+            if path not in current and path.suffix in (".f32", ".q", ".mpk", ".bin"):
+                try:
+                    path.unlink()
+                except OSError:
+                    # Still mapped by a reader on a platform that forbids it; next compaction retries
+                    pass
+
+    # ---------- Reader State ----------
+    def _reset(self, header: dict):
+        self._header = {**header, "rows": 0, "log_bytes": 0, "hnsw_rows": 0}
+        self.row_of = {}
+        self._offsets = np.zeros(0, dtype=np.int64)
+        self._lengths = np.zeros(0, dtype=np.int32)
+        self._log = b""
+        self.metadata_index = MetadataIndex()
+        self.quantizer = load_quantizer(header.get("quantization"), header.get("quantizer_params"))
+        self._alive = np.zeros(0, dtype=bool)
+        self._sq_norms = np.zeros(0, dtype=np.float32)
+        self._vectors = None
+        self._codes = None
+        self._hnsw = None
+
+    def _refresh(self):
+        """Applies whatever the writer has committed since the last call."""
+        try:
+            stat = os.stat(self.header_path)
+        except FileNotFoundError:
+            return
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return
+
+        with self._lock:
+            header = json.loads(self.header_path.read_text(encoding="utf-8"))
+            if header["generation"] != self._header["generation"] or (
+                    header.get("quantizer_params") != self._header.get("quantizer_params")):
+                self._reset(header)
+            self._apply(header)
+            self._stamp = stamp
+
+    def _apply(self, header: dict):
+        generation, dim, rows = header["generation"], header["dim"], header["rows"]
+        applied_rows = self._header["rows"]
+
+        self._alive = _grow(self._alive, rows)
+        self._sq_norms = _grow(self._sq_norms, rows)
+
+        if header["log_bytes"] > self._header["log_bytes"]:
+            self._replay(self._records_file(generation), self._header["log_bytes"], header["log_bytes"])
+            with open(self._records_file(generation), "rb") as f:
+                self._log = mmap.mmap(f.fileno(), header["log_bytes"], access=mmap.ACCESS_READ)
+
+        if rows > applied_rows:
+            self._vectors = np.memmap(
+                self._vectors_file(generation), dtype=np.float32, mode="r", shape=(rows, dim)
+            )
+            new = self._vectors[applied_rows:rows]
+            self._sq_norms[applied_rows:rows] = np.einsum("ij,ij->i", new, new)
+            if self.quantizer is not None:
+                self._codes = np.memmap(
+                    self._codes_file(generation), dtype=self.quantizer.dtype, mode="r",
+                    shape=(rows, self.quantizer.code_size(dim))
+                )
+
+        if header["hnsw_rows"] != self._header["hnsw_rows"]:
+            self._hnsw = self._load_hnsw(generation, dim, header["hnsw_rows"])
+            if self._hnsw is None:
+                header = {**header, "hnsw_rows": 0}
+
+        self._header = header
+
+    def _replay(self, path: Path, start: int, end: int):
+        """Applies log entries in [start, end), streamed, keeping only their positions."""
+        unpacker = msgpack.Unpacker(raw=False)
+        position = start
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                data = f.read(min(LOG_READ_BYTES, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                unpacker.feed(data)
+                for entry in unpacker:
+                    consumed = start + unpacker.tell()
+                    self._apply_entry(entry, position, consumed - position)
+                    position = consumed
+
+    def _apply_entry(self, entry: list, offset: int, length: int):
+        if entry[0] == "put":
+            _, row, chunk_id, _, metadata = entry
+            previous = self.row_of.get(chunk_id)
+            if previous is not None:
+                self._alive[previous] = False
+            self._offsets = _grow(self._offsets, row + 1)
+            self._lengths = _grow(self._lengths, row + 1)
+            self._offsets[row] = offset
+            self._lengths[row] = length
+            self.row_of[chunk_id] = row
+            self.metadata_index.add(row, metadata or {})
+            self._alive[row] = True
+        else:
+            row = self.row_of.pop(entry[1], None)
+            if row is not None:
+                self._alive[row] = False
+
+    def _load_hnsw(self, generation, dim, rows):
+        if not rows:
+            return None
+        try:
+            import hnswlib
+        except ImportError:
+            logger.warning("hnswlib is not installed; native index falls back to flat search")
+            return None
+        index = hnswlib.Index(space="l2", dim=dim)
+        index.load_index(str(self._hnsw_file(generation, rows)))
+        index.set_ef(HNSW_EF_SEARCH)
+        return index
+
+    def _snapshot(self) -> IndexView:
+        self._refresh()
+        with self._lock:
+            rows = self._header["rows"]
+            return IndexView(
+                rows=rows,
+                vectors=self._vectors,
+                sq_norms=self._sq_norms[:rows],
+                alive=self._alive[:rows],
+                hnsw=self._hnsw,
+                hnsw_rows=self._header["hnsw_rows"],
+                quantizer=self.quantizer,
+                codes=self._codes,
+                records=RecordView(self._log, self._offsets[:rows], self._lengths[:rows]),
+                metadata_index=self.metadata_index,
+            )
+
+    # ---------- Writes ----------
+    @contextlib.contextmanager
+    def _writing(self):
+        """
+        Exclusive write access: the thread lock within this process, an
+        flock on write.lock across processes. Re-entrant, so maintenance
+        steps can nest.
+        """
+        with self._lock:
+            if self._write_depth == 0 and fcntl is not None:
+                self._write_lock_file = open(self.directory / WRITE_LOCK_FILE_NAME, "a+b")
+                fcntl.flock(self._write_lock_file, fcntl.LOCK_EX)
+            self._write_depth += 1
+            try:
+                # Another process may have committed while we waited
+                self._refresh()
+                yield
+            finally:
+                self._write_depth -= 1
+                if self._write_depth == 0 and self._write_lock_file is not None:
+                    fcntl.flock(self._write_lock_file, fcntl.LOCK_UN)
+                    self._write_lock_file.close()
+                    self._write_lock_file = None
+
+    def _commit(self, header: dict):
+        tmp_path = self.header_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(header), encoding="utf-8")
+        os.replace(tmp_path, self.header_path)
+        self._refresh()
+
+    def _append(self, header: dict, vectors, entries: list, quantizer=None) -> dict:
+        generation = header["generation"]
+        if vectors is not None and len(vectors):
+            _write_at(self._vectors_file(generation), header["rows"] * header["dim"] * 4, vectors.tobytes())
+            if quantizer is not None:
+                _write_at(
+                    self._codes_file(generation),
+                    header["rows"] * quantizer.code_size(header["dim"]),
+                    quantizer.encode(vectors).tobytes()
+                )
+        payload = b"".join(self._packer.pack(entry) for entry in entries)
+        _write_at(self._records_file(generation), header["log_bytes"], payload)
+        return {
+            **header,
+            "rows": header["rows"] + (len(vectors) if vectors is not None else 0),
+            "log_bytes": header["log_bytes"] + len(payload),
+        }
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        if not ids:
+            return
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+
+        with self._writing():
+            header = dict(self._header)
+            quantizer = self.quantizer
+            if header["dim"] is None:
+                # First write builds the collection: fix dimension and quantization
+                header["dim"] = vectors.shape[1]
+                quantizer = fit_quantizer(self.quantization, [vectors])
+                header["quantization"] = quantizer.kind if quantizer else None
+                header["quantizer_params"] = quantizer.params() if quantizer else None
+            elif vectors.shape[1] != header["dim"]:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match index dimension {header['dim']}"
+                )
+
+            start = header["rows"]
+            entries = [
+                ["put", start + i, chunk_id, document, metadata or {}]
+                for i, (chunk_id, document, metadata) in enumerate(zip(ids, documents, metadatas))
+            ]
+            self._commit(self._append(header, vectors, entries, quantizer))
+
+    def delete(self, ids):
+        with self._writing():
+            present = [chunk_id for chunk_id in ids if chunk_id in self.row_of]
+            if present:
+                self._commit(self._append(dict(self._header), None, [["del", i] for i in present]))
+
+    # ---------- Maintenance ----------
+    def persist(self):
+        """Compacts tombstones and (re)builds the HNSW graph when worthwhile."""
+        with self._writing():
+            rows = self._header["rows"]
+            if not rows:
+                return
+            live = int(self._alive[:rows].sum())
+            if (rows - live) / rows > COMPACT_DEAD_RATIO:
+                self._compact(self._header.get("quantization"))
+                rows = self._header["rows"]
+            if (self.quantizer is None and live >= HNSW_MIN_ROWS
+                    and rows - self._header["hnsw_rows"] > HNSW_REBUILD_RATIO * rows):
+                self._build_hnsw()
+
+    def requantize(self, quantization: str):
+        """Rebuilds the collection with another representation: none / int8 / binary."""
+        with self._writing():
+            if self._header["dim"] is None:
+                self.quantization = quantization
+                return
+            self._compact(quantization)
+            self.persist()
+
+    def _live_blocks(self, live_rows):
+        for start in range(0, len(live_rows), FLAT_BLOCK_ROWS):
+            block = live_rows[start:start + FLAT_BLOCK_ROWS]
+            yield block, np.ascontiguousarray(self._vectors[block])
+
+    def _compact(self, quantization: str | None):
+        """
+        Rewrites the live rows into a new generation (refitting the
+        quantizer on all of them); readers switch on their next search.
+        """
+        old = self._header
+        records = self._snapshot().records
+        live_rows = np.flatnonzero(self._alive[:old["rows"]])
+        quantizer = fit_quantizer(quantization, (vectors for _, vectors in self._live_blocks(live_rows)))
+        header = {
+            "generation": old["generation"] + 1, "dim": old["dim"], "rows": 0, "log_bytes": 0, "hnsw_rows": 0,
+            "quantization": quantizer.kind if quantizer else None,
+            "quantizer_params": quantizer.params() if quantizer else None,
+        }
+
+        for block, vectors in self._live_blocks(live_rows):
+            entries = [
+                ["put", header["rows"] + i, *records.entry(row)[2:]]
+                for i, row in enumerate(block.tolist())
+            ]
+            header = self._append(header, vectors, entries, quantizer)
+
+        self._commit(header)
+        self._remove_stale_files()
+        logger.debug("Vector index compacted: %d -> %d rows (quantization: %s)",
+                     old["rows"], header["rows"], header["quantization"] or "none")
+
+    def _build_hnsw(self):
+        try:
+            import hnswlib
+        except ImportError:
+            logger.warning("hnswlib is not installed; native index stays on flat search")
+            return
+
+        header = dict(self._header)
+        rows = header["rows"]
+        graph = hnswlib.Index(space="l2", dim=header["dim"])
+        graph.init_index(max_elements=rows, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+        live_rows = np.flatnonzero(self._alive[:rows])
+        for block, vectors in self._live_blocks(live_rows):
+            graph.add_items(vectors, block)
+        graph.save_index(str(self._hnsw_file(header["generation"], rows)))
+
+        header["hnsw_rows"] = rows
+        self._commit(header)
+        self._remove_stale_files()
+        logger.debug("HNSW graph built over %d vectors", len(live_rows))
+
+    # ---------- Reads ----------
+    def _hnsw_search(self, queries, k, view: IndexView, valid, filtered=False):
+        """
+        HNSW over the graph rows, exact search over rows appended since it
+        was built. When `filtered`, the graph walk itself only accepts
+        rows in `valid`.
+        """
+        vectors, sq_norms, hnsw, hnsw_rows = view.vectors, view.sq_norms, view.hnsw, view.hnsw_rows
+        hnsw_valid = int(valid[:hnsw_rows].sum())
+        graph_k = min(k * HNSW_OVERFETCH, hnsw_valid if filtered else hnsw_rows)
+        if not graph_k:
+            return flat_search(queries, vectors, sq_norms, valid, k)
+        try:
+            labels, distances = hnsw.knn_query(
+                queries, k=graph_k, num_threads=1,
+                filter=(lambda row: bool(valid[row])) if filtered else None
+            )
+        except RuntimeError:
+            # The graph walk could not reach enough matching rows
+            return flat_search(queries, vectors, sq_norms, valid, k)
+        tail = flat_search(queries, vectors[hnsw_rows:], sq_norms[hnsw_rows:], valid[hnsw_rows:], k)
+
+        results = []
+        for q, (row_labels, row_distances, tail_hits) in enumerate(zip(labels, distances, tail)):
+            hits = [(int(row), float(d)) for row, d in zip(row_labels, row_distances) if valid[row]]
+            if len(hits) < min(k, hnsw_valid):
+                # Too many candidates were tombstoned: answer this query exactly
+                results.append(flat_search(queries[q:q + 1], vectors, sq_norms, valid, k)[0])
+                continue
+            hits.extend((hnsw_rows + row, d) for row, d in tail_hits)
+            hits.sort(key=lambda hit: hit[1])
+            results.append(hits[:k])
+        return results
+
+    def _flat(self, queries, k, view: IndexView, valid, rows=None):
+        """Exact scan, or quantized scan + re-scoring, under a mask or over explicit rows."""
+        if view.quantizer is not None:
+            return quantized_search(queries, k, view.quantizer, view.codes, view.vectors, view.sq_norms, valid, rows)
+        if rows is not None:
+            return flat_search_rows(queries, view.vectors, view.sq_norms, rows, k)
+        return flat_search(queries, view.vectors, view.sq_norms, valid, k)
+
+    def _filtered_search(self, queries, k, filters, view: IndexView):
+        """
+        Filters are resolved to a row mask through the metadata indexes
+        first; only matching rows are ever scored. Selective filters gather
+        their rows, broad ones stream the matrix under the mask (or walk
+        the HNSW graph restricted to it).
+        """
+        valid = view.alive & view.metadata_index.mask(filters, view.rows, view.records.metadata)
+        selected = int(valid.sum())
+
+        if view.hnsw is not None and selected >= HNSW_FILTER_MIN_ROWS:
+            return self._hnsw_search(queries, k, view, valid, filtered=True)
+        if selected <= FILTER_GATHER_RATIO * view.rows:
+            return self._flat(queries, k, view, valid, rows=np.flatnonzero(valid))
+        return self._flat(queries, k, view, valid)
+
+    def search_batch(self, embeddings, k, filters=None):
+        view = self._snapshot()
+        if not view.rows:
+            return [[] for _ in embeddings]
+
+        queries = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+        if filters:
+            hits = self._filtered_search(queries, k, filters, view)
+        elif view.hnsw is not None:
+            hits = self._hnsw_search(queries, k, view, view.alive)
+        else:
+            hits = self._flat(queries, k, view, view.alive)
+
+        return [
+            [(view.records.document(row), distance) for row, distance in query_hits]
+            for query_hits in hits
+        ]
+
+    def get(self, ids):
+        with self._lock:
+            view = self._snapshot()
+            rows = {chunk_id: row for chunk_id in ids if (row := self.row_of.get(chunk_id)) is not None}
+        return {chunk_id: view.records.document(row) for chunk_id, row in rows.items()}
+
+    def iter_batches(self, page_size=1000):
+        view = self._snapshot()
+        live_rows = np.flatnonzero(view.alive)
+        for start in range(0, len(live_rows), page_size):
+            block = live_rows[start:start + page_size]
+            entries = [view.records.entry(row) for row in block]
+            yield {
+                "ids": [entry[2] for entry in entries],
+                "embeddings": np.asarray(view.vectors[block]).tolist(),
+                "documents": [entry[3] for entry in entries],
+                "metadatas": [entry[4] or {} for entry in entries],
+            }
+
+    def count(self):
+        return int(self._snapshot().alive.sum())
+
+
+# ---------------- Quantization Evaluation ----------------
+# Evaluation queries are stored vectors plus this much relative Gaussian noise
+EVAL_QUERY_NOISE = 0.05
+
+
+def evaluate_quantization(index: NumpyIndex, kinds=tuple(QUANTIZERS), num_queries: int = 200,
+                          k: int = 10, seed: int = 0) -> dict:
+    """
+    Recall@k and resident memory per chunk of each quantization,
+    measured against exact float32 search on the index's own vectors.
+    vector_bytes_per_chunk is the vector (or code) plus its norm;
+    resident_bytes_per_chunk adds the per-row state every reader keeps
+    (tombstone flag, record log offset/length, filter columns and the
+    live-id lookup). Documents and metadata stay in the mapped log and
+    are not counted. The index itself is not modified.
+    """
+    view = index._snapshot()
+    live_rows = np.flatnonzero(view.alive)
+    if not len(live_rows):
+        return {"rows": 0}
+
+    dim = view.vectors.shape[1]
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(live_rows, size=min(num_queries, len(live_rows)), replace=False))
+    base = np.asarray(view.vectors[sample])
+    noise = rng.normal(size=base.shape).astype(np.float32)
+    queries = base + noise * EVAL_QUERY_NOISE * np.linalg.norm(base, axis=1, keepdims=True) / np.sqrt(dim)
+
+    started = time.perf_counter()
+    exact = flat_search(queries, view.vectors, view.sq_norms, view.alive, k)
+    exact_seconds = time.perf_counter() - started
+
+    # Memory that has to stay resident to scan: the vectors (or codes) plus the row norms
+    float_bytes = dim * 4 + 4
+    with index._lock:
+        lookup_bytes = sys.getsizeof(index.row_of) + sum(sys.getsizeof(chunk_id) for chunk_id in index.row_of)
+    row_bytes = (
+        view.alive.itemsize + view.records.offsets.itemsize + view.records.lengths.itemsize
+        + view.metadata_index.bytes_per_row() + lookup_bytes / len(live_rows)
+    )
+    float_resident = float_bytes + row_bytes
+    report = {
+        "rows": len(live_rows),
+        "dim": dim,
+        "k": k,
+        "queries": len(queries),
+        "row_overhead_bytes_per_chunk": round(row_bytes, 1),
+        "none": {
+            f"recall@{k}": 1.0,
+            "vector_bytes_per_chunk": float_bytes,
+            "resident_bytes_per_chunk": round(float_resident, 1),
+            "memory_ratio": 1.0,
+            "ms_per_query": round(1000 * exact_seconds / len(queries), 3),
+        },
+    }
+
+    blocks = [(start, min(start + FLAT_BLOCK_ROWS, view.rows)) for start in range(0, view.rows, FLAT_BLOCK_ROWS)]
+    for kind in kinds:
+        quantizer = fit_quantizer(kind, (np.asarray(view.vectors[start:end]) for start, end in blocks))
+        codes = np.concatenate([quantizer.encode(np.asarray(view.vectors[start:end])) for start, end in blocks])
+
+        started = time.perf_counter()
+        hits = quantized_search(queries, k, quantizer, codes, view.vectors, view.sq_norms, view.alive)
+        seconds = time.perf_counter() - started
+
+        recall = np.mean([
+            len({row for row, _ in got} & {row for row, _ in want}) / max(len(want), 1)
+            for got, want in zip(hits, exact)
+        ])
+        code_bytes = quantizer.code_size(dim) + 4
+        report[kind] = {
+            f"recall@{k}": round(float(recall), 4),
+            "vector_bytes_per_chunk": code_bytes,
+            "resident_bytes_per_chunk": round(code_bytes + row_bytes, 1),
+            "memory_ratio": round((code_bytes + row_bytes) / float_resident, 4),
+            "rescore_factor": quantizer.rescore_factor,
+            "ms_per_query": round(1000 * seconds / len(queries), 3),
+        }
+
+    return report
+
+
+# ---------------- Registry ----------------
+_lock = threading.Lock()
+_indexes: dict[tuple[str, str], VectorIndex] = {}
+
+
+def vector_index_dir(vector_store_dir, collection_name: str, backend: str = VECTOR_BACKEND) -> Path:
+    """Directory holding `collection_name` for `backend` under vector_store/."""
+    if backend == "chroma":
+        return Path(vector_store_dir) / "chroma"
+    return Path(vector_store_dir) / backend / collection_name
+
+
+def open_vector_index(directory, collection_name: str, backend: str = VECTOR_BACKEND) -> VectorIndex:
+    """
+    Returns the process-wide index for `directory`, opening it on first
+    use (the native backend replays its log once per process).
+    """
+    key = (backend, str(Path(directory).resolve()))
+    with _lock:
+        index = _indexes.get(key)
+        if index is None:
+            if backend == "chroma":
+                index = ChromaIndex(directory, collection_name)
+            elif backend == "native":
+                index = NumpyIndex(directory)
+            else:
+                raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
+            _indexes[key] = index
+    return index
+
+
+def copy_vector_index(source: VectorIndex, target: VectorIndex, page_size: int = 1000) -> int:
+    """Copies every vector, document and metadata record from source to target."""
+    copied = 0
+    for batch in source.iter_batches(page_size):
+        target.upsert(batch["ids"], batch["embeddings"], batch["documents"], batch["metadatas"])
+        copied += len(batch["ids"])
+    target.persist()
+    return copied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Native vector index maintenance")
+    parser.add_argument("--collection", default="enterprise_rag_documents")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("migrate", help="copy the Chroma collection into the native index")
+    quantize = commands.add_parser("quantize", help="rebuild the native index with another representation")
+    quantize.add_argument("kind", choices=["none", *QUANTIZERS])
+    evaluate = commands.add_parser("evaluate", help="recall vs memory for each quantization")
+    evaluate.add_argument("--queries", type=int, default=200)
+    evaluate.add_argument("--k", type=int, default=10)
+    evaluate.add_argument("--seed", type=int, default=0)
+    evaluate.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    vector_store_dir = Path(__file__).resolve().parent / "vector_store"
+    native_dir = vector_index_dir(vector_store_dir, args.collection, "native")
+
+    if args.command in (None, "migrate"):
+        copied = copy_vector_index(
+            open_vector_index(vector_index_dir(vector_store_dir, args.collection, "chroma"), args.collection, "chroma"),
+            open_vector_index(native_dir, args.collection, "native")
+        )
+        bump_collection_version(native_dir)
+        print(f"Copied {copied} vectors into {native_dir} (set VECTOR_BACKEND=native to use it)")
+
+    elif args.command == "quantize":
+        open_vector_index(native_dir, args.collection, "native").requantize(args.kind)
+        bump_collection_version(native_dir)
+
+    elif args.command == "evaluate":
+        report = evaluate_quantization(
+            open_vector_index(native_dir, args.collection, "native"),
+            num_queries=args.queries, k=args.k, seed=args.seed
+        )
+        output = json.dumps(report, indent=2)
+        if args.output:
+            Path(args.output).write_text(output, encoding="utf-8")
+        else:
+            print(output)
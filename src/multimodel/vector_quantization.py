@@ -0,0 +1,109 @@
+"""
+vector_quantization.py
+
+Compressed first-pass representations for the native vector index,
+chosen when a collection is built (VECTOR_QUANTIZATION for a new
+collection, or `python -m src.multimodel.vector_index quantize <kind>`
+to rebuild an existing one):
+
+- "int8"   : per-dimension symmetric scalar quantization, 1 byte / dim (4x smaller)
+- "binary" : sign bits, 1 bit / dim (32x smaller), ranked by Hamming distance
+
+Searches scan only the codes, then re-score a shortlist of
+k * rescore_factor rows exactly against the full-precision vectors.
+Those stay on disk (memory-mapped) and are paged in for that shortlist only.
+"""
+
+import os
+
+import numpy as np
+
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")
+# Shortlist size per requested result before exact re-scoring
+INT8_RESCORE_FACTOR = 4
+BINARY_RESCORE_FACTOR = 16
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class ScalarQuantizer:
+    kind = "int8"
+    dtype = np.int8
+    rescore_factor = INT8_RESCORE_FACTOR
+
+    def __init__(self, scale):
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, blocks):
+        """Per-dimension scale from the largest |value| seen in any block."""
+        peak = None
+        for block in blocks:
+            block_peak = np.abs(block).max(axis=0)
+            peak = block_peak if peak is None else np.maximum(peak, block_peak)
+        return cls(np.maximum(peak, 1e-6) / 127.0)
+
+    def params(self) -> dict:
+        return {"scale": self.scale.tolist()}
+
+    def code_size(self, dim: int) -> int:
+        return dim
+
+    def encode(self, vectors):
+        # Values beyond the fitted range are clipped; compaction refits the scale
+        return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+
+    def distances(self, queries, codes, sq_norms):
+        """Approximate squared L2: exact stored norms, dot product against dequantized codes."""
+        q_norms = np.einsum("ij,ij->i", queries, queries)
+        dots = (queries * self.scale) @ codes.astype(np.float32).T
+        return sq_norms[None, :] - 2.0 * dots + q_norms[:, None]
+
+
+class BinaryQuantizer:
+    kind = "binary"
+    dtype = np.uint8
+    rescore_factor = BINARY_RESCORE_FACTOR
+
+    @classmethod
+    def fit(cls, blocks):
+        return cls()
+
+    def params(self) -> dict:
+        return {}
+
+    def code_size(self, dim: int) -> int:
+        return (dim + 7) // 8
+
+    def encode(self, vectors):
+        return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+    def distances(self, queries, codes, sq_norms):
+        """Hamming distance between sign codes (only used to rank the shortlist)."""
+        return np.stack([
+            _POPCOUNT[np.bitwise_xor(codes, q_code)].sum(axis=1, dtype=np.int32)
+            for q_code in self.encode(queries)
+        ]).astype(np.float32)
+
+
+QUANTIZERS = {
+    ScalarQuantizer.kind: ScalarQuantizer,
+    BinaryQuantizer.kind: BinaryQuantizer,
+}
+
+
+def load_quantizer(kind: str | None, params: dict | None):
+    """Quantizer recorded in an index header (None for full precision)."""
+    if not kind or kind == "none":
+        return None
+    if kind not in QUANTIZERS:
+        raise ValueError(f"Unknown VECTOR_QUANTIZATION: {kind}")
+    return QUANTIZERS[kind](**(params or {}))
+
+
+def fit_quantizer(kind: str | None, blocks):
+    if not kind or kind == "none":
+        return None
+    if kind not in QUANTIZERS:
+        raise ValueError(f"Unknown VECTOR_QUANTIZATION: {kind}")
+    return QUANTIZERS[kind].fit(blocks)
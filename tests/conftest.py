@@ -0,0 +1,112 @@
+"""
+Shared fixtures: a throwaway native vector index and BM25 sidecar wired
+into retrieval.py in place of the real vector_store, and an ingestion
+pipeline whose directories live under tmp_path.
+"""
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+
+class KeyedEmbeddings(Embeddings):
+    """Returns the vector registered for a text; unknown texts map to a far-away vector."""
+
+    def __init__(self, vectors: dict, dim: int):
+        self.vectors = vectors
+        self.dim = dim
+
+    def _vector(self, text):
+        return list(self.vectors.get(text, np.full(self.dim, 10.0)))
+
+    def embed_documents(self, texts):
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+class ByteTokenizer:
+    """One token per UTF-8 byte, so every multi-byte character is split across tokens."""
+
+    def encode_batch(self, texts):
+        return [list(text.encode("utf-8")) for text in texts]
+
+    def decode_tokens_bytes(self, tokens):
+        return [bytes([token]) for token in tokens]
+
+
+@pytest.fixture
+def retrieval_env(tmp_path):
+    """
+    retrieval module backed by a NumpyIndex + BM25Index under tmp_path.
+    Returns (retrieval, add) where add(chunk_id, text, vector, **metadata)
+    indexes one chunk on both sides; register query vectors in
+    retrieval.embedding_model.get().vectors.
+    """
+    from src.multimodel.bm25_index import BM25Index
+    from src.multimodel.retrieval_mode import retrieval
+    from src.multimodel.vector_index import NumpyIndex
+
+    dim = 4
+    index = NumpyIndex(tmp_path / "native", quantization="none")
+    lexical = BM25Index(tmp_path / "bm25.sqlite")
+    embeddings = KeyedEmbeddings({}, dim)
+
+    saved_path = retrieval.VECTOR_INDEX_PATH
+    retrieval.VECTOR_INDEX_PATH = tmp_path / "native"
+    retrieval.embedding_model.set(embeddings)
+    retrieval.vector_store.set(index)
+    retrieval.lexical_store.set(lexical)
+    retrieval.query_cache.clear()
+
+    def add(chunk_id, text, vector, **metadata):
+        index.upsert([chunk_id], [vector], [text], [{"chunk_id": chunk_id, **metadata}])
+        lexical.add([{"id": chunk_id, "document": text}])
+
+    yield retrieval, add
+
+    retrieval.VECTOR_INDEX_PATH = saved_path
+    for resource in (retrieval.embedding_model, retrieval.vector_store, retrieval.lexical_store):
+        resource.reset()
+    retrieval.query_cache.clear()
+
+
+@pytest.fixture
+def pipeline_env(tmp_path, monkeypatch):
+    """
+    ingestion_pipeline with every directory under tmp_path, a NumpyIndex
+    in place of the configured vector backend, KeyedEmbeddings and a
+    byte tokenizer. PDFs go in pipeline.RAW_PDF_DIR / <category>.
+    """
+    from src.multimodel.embedding_registry import embedding_model
+    from src.multimodel.pdf_ingestion import ingestion_pipeline as pipeline
+    from src.multimodel.vector_index import NumpyIndex
+
+    processed = tmp_path / "processed_pdfs"
+    directories = {
+        "TEXT_DIR": processed / "text",
+        "TABLE_DIR": processed / "tables",
+        "CHUNK_DIR": processed / "chunks",
+        "IMAGE_DIR": processed / "images",
+        "IMAGE_INDEX_DIR": processed / "image_index",
+        "METADATA_DIR": tmp_path / "metadata",
+        "RAW_PDF_DIR": tmp_path / "raw_pdfs",
+        "VECTOR_DB_DIR": tmp_path / "vector_store",
+    }
+    for name, directory in directories.items():
+        directory.mkdir(parents=True)
+        monkeypatch.setattr(pipeline, name, directory)
+    monkeypatch.setattr(pipeline, "CATALOG_FILE", tmp_path / "metadata" / "pdf_catalog.json")
+    monkeypatch.setattr(pipeline, "MANIFEST_FILE", tmp_path / "metadata" / "ingestion_manifest.json")
+    monkeypatch.setattr(pipeline, "BM25_INDEX_FILE", tmp_path / "vector_store" / "bm25.sqlite")
+
+    index = NumpyIndex(tmp_path / "vector_store", quantization="none")
+    monkeypatch.setattr(pipeline, "get_vector_index", lambda: index)
+    embedding_model.set(KeyedEmbeddings({}, 4))
+    pipeline.tokenizer.set(ByteTokenizer())
+
+    yield pipeline
+
+    embedding_model.reset()
+    pipeline.tokenizer.reset()
@@ -0,0 +1,42 @@
+import asyncio
+import functools
+
+from src.multimodel.retrieval_mode.async_runtime import EmbeddingBatcher
+
+
+def test_concurrent_embeds_share_one_batch():
+    batcher = EmbeddingBatcher(lambda texts: [[len(text)] for text in texts], window_ms=5)
+
+    async def main():
+        return await asyncio.gather(*(batcher.embed(text) for text in ["a", "bb", "a", "ccc"]))
+
+    assert asyncio.run(main()) == [[1], [2], [1], [3]]
+    assert batcher.batches == 1
+    assert batcher.texts_embedded == 3
+
+
+def test_failed_batch_fails_every_waiter():
+    def embed(texts):
+        raise RuntimeError("model unavailable")
+
+    batcher = EmbeddingBatcher(embed, window_ms=1)
+
+    async def main():
+        return await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+
+    assert [str(result) for result in asyncio.run(main())] == ["model unavailable"] * 2
+
+
+def test_cancelled_batch_cancels_waiters_instead_of_hanging():
+    async def main():
+        loop = asyncio.get_running_loop()
+        batch = loop.create_future()
+        pending = {"a": loop.create_future(), "b": loop.create_future()}
+        batch.add_done_callback(functools.partial(EmbeddingBatcher._resolve, pending))
+        # e.g. the embedding executor shutting down with cancel_futures=True
+        batch.cancel()
+        await asyncio.sleep(0)
+        return pending
+
+    pending = asyncio.run(main())
+    assert all(future.cancelled() for future in pending.values())
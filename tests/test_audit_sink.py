@@ -0,0 +1,106 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from src.multimodel.retrieval_mode import mlflow_logger
+from src.multimodel.retrieval_mode.mlflow_logger import AuditSink
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _record(i):
+    return {"kind": "interaction", "query": f"q{i}", "retrieved_chunks": 1, "flags": {"important": 0}, "timestamp": "t"}
+
+
+def test_records_land_in_a_closed_segment_named_after_the_writer(tmp_path):
+    sink = AuditSink(tmp_path, ship=False)
+    for i in range(5):
+        assert sink.submit(_record(i))
+    sink.flush()
+
+    segments = sink.closed_segments()
+    assert len(segments) == 1
+    assert segments[0].name.startswith(f"audit-{os.getpid()}-")
+    assert [json.loads(line)["query"] for line in segments[0].read_text().splitlines()] == [f"q{i}" for i in range(5)]
+    assert not list(tmp_path.glob("*.open"))
+    sink.close()
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    sink = AuditSink(tmp_path, queue_size=1, ship=False)
+    sink._started = True  # no writer thread: the queue never drains
+    assert sink.submit(_record(0))
+    assert not sink.submit(_record(1))
+    assert sink.stats()["dropped"] == 1
+
+
+def test_only_segments_of_dead_processes_are_recovered(tmp_path):
+    dead, alive = _dead_pid(), os.getppid()
+    (tmp_path / f"audit-{dead}-1.open").write_text("{}\n")
+    (tmp_path / f"audit-{alive}-2.open").write_text("{}\n")
+    (tmp_path / f"audit-{os.getpid()}-3.open").write_text("{}\n")
+    (tmp_path / f"audit-{alive}-4.shipping-{dead}").write_text("{}\n")
+    (tmp_path / f"audit-{alive}-5.shipping-{alive}").write_text("{}\n")
+
+    AuditSink(tmp_path, ship=False).recover_orphans()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([
+        f"audit-{dead}-1.jsonl",
+        f"audit-{alive}-2.open",
+        f"audit-{os.getpid()}-3.open",
+        f"audit-{alive}-4.jsonl",
+        f"audit-{alive}-5.shipping-{alive}",
+    ])
+
+
+def test_startup_recovers_own_pid_leftovers(tmp_path):
+    (tmp_path / f"audit-{os.getpid()}-1.open").write_text("{}\n")
+    AuditSink(tmp_path, ship=False).recover_orphans(own_pid_is_stale=True)
+    assert [p.name for p in tmp_path.iterdir()] == [f"audit-{os.getpid()}-1.jsonl"]
+
+
+def test_each_segment_is_shipped_once_across_processes(tmp_path):
+    for i in range(6):
+        (tmp_path / f"audit-1-{i}.jsonl").write_text(json.dumps(_record(i)) + "\n")
+    shipped, lock = [], threading.Lock()
+
+    def shipper(path):
+        time.sleep(0.01)
+        with lock:
+            shipped.append(path.stem)
+
+    sinks = [AuditSink(tmp_path, ship=False, shipper=shipper) for _ in range(3)]
+    threads = [threading.Thread(target=sink.ship_pending) for sink in sinks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(shipped) == sorted(f"audit-1-{i}" for i in range(6))
+    assert not list(tmp_path.iterdir())
+
+
+def test_failed_shipment_releases_the_claim(tmp_path):
+    segment = tmp_path / "audit-1-1.jsonl"
+    segment.write_text(json.dumps(_record(0)) + "\n")
+
+    def shipper(path):
+        raise ConnectionError("tracking server down")
+
+    sink = AuditSink(tmp_path, ship=False, shipper=shipper)
+    assert sink.ship_pending() is False
+    assert [p.name for p in tmp_path.iterdir()] == [segment.name]
+    assert sink.stats()["ship_failures"] == 1
+
+
+def test_ship_delay_backs_off_and_caps():
+    assert AuditSink._ship_delay(0) == mlflow_logger.AUDIT_SHIP_INTERVAL
+    assert AuditSink._ship_delay(1) > AuditSink._ship_delay(0)
+    assert AuditSink._ship_delay(50) == mlflow_logger.AUDIT_SHIP_MAX_BACKOFF
@@ -0,0 +1,64 @@
+import pytest
+
+from src.multimodel.retrieval_mode.retrieval import RetrievalRequest, RetrievalService
+
+
+NEAR = [1.0, 0.0, 0.0, 0.0]
+OTHER = [0.0, 1.0, 0.0, 0.0]
+
+
+@pytest.fixture
+def service(retrieval_env, monkeypatch):
+    retrieval, add = retrieval_env
+    add("c-1", "The penalty for late payment is 2%", NEAR, pdf_name="terms", category="legal")
+    add("c-2", "Headcount grew in the north region", OTHER, pdf_name="hr-report", category="hr")
+    retrieval.embedding_model.get().vectors.update({"late payment penalty": NEAR, "headcount": OTHER})
+
+    audits, emails = [], []
+    monkeypatch.setattr(retrieval, "log_rag_batch", lambda **record: audits.append(record))
+    monkeypatch.setattr(retrieval, "send_email_notification", lambda **mail: emails.append(mail))
+    return retrieval, RetrievalService(), audits, emails
+
+
+def test_batch_matches_single_queries_and_shares_one_embedding_pass(service, monkeypatch):
+    retrieval, svc, _, _ = service
+    embedding = retrieval.embedding_model.get()
+    calls = []
+    monkeypatch.setattr(embedding, "embed_documents", lambda texts: calls.append(texts) or [embedding._vector(t) for t in texts])
+
+    responses = svc.query_batch([
+        RetrievalRequest(query="late payment penalty", top_k=1),
+        RetrievalRequest(query="Headcount?", top_k=2),
+        RetrievalRequest(query="late payment penalty", top_k=1),
+    ])
+
+    assert [r.documents for r in responses] == [
+        ["The penalty for late payment is 2%"],
+        ["Headcount grew in the north region"],
+        ["The penalty for late payment is 2%"],
+    ]
+    assert calls == [["late payment penalty", "headcount"]]
+
+
+def test_batch_writes_one_audit_record_and_one_digest_per_recipient(service):
+    _, svc, audits, emails = service
+    svc.query_batch([
+        RetrievalRequest(query="late payment penalty", user_email="a@example.com"),
+        RetrievalRequest(query="late payment penalty", top_k=2, user_email="a@example.com"),
+        RetrievalRequest(query="headcount", user_email="b@example.com"),
+    ])
+
+    assert len(audits) == 1
+    assert audits[0]["queries"] == ["late payment penalty", "late payment penalty", "headcount"]
+    assert [mail["to_email"] for mail in emails] == ["a@example.com"]
+    assert "(2 queries)" in emails[0]["subject"]
+
+
+def test_filters_apply_per_request(service):
+    _, svc, _, _ = service
+    responses = svc.query_batch([
+        RetrievalRequest(query="late payment penalty", filters={"category": ["hr"]}),
+        RetrievalRequest(query="late payment penalty"),
+    ])
+    assert "The penalty for late payment is 2%" not in responses[0].documents
+    assert responses[1].documents[0] == "The penalty for late payment is 2%"
@@ -0,0 +1,19 @@
+from src.multimodel.pdf_ingestion.chunker import chunk_pages
+
+from .conftest import ByteTokenizer
+
+
+def test_windows_never_split_multibyte_characters():
+    text = "Zürich–Genève “naïve” café 東京 😀" * 3
+    chunks = chunk_pages([{"page": 1, "text": text}], ByteTokenizer(), chunk_size=7, overlap=0)
+
+    assert "".join(chunk["text"].replace(" ", "") for chunk in chunks) == text.replace(" ", "")
+
+
+def test_overlapping_windows_keep_whole_characters():
+    text = "東京タワー" * 4
+    chunks = chunk_pages([{"page": 3, "text": text}], ByteTokenizer(), chunk_size=5, overlap=2)
+
+    assert all(chunk["pages"] == [3] for chunk in chunks)
+    assert all(set(chunk["text"]) <= set(text) for chunk in chunks)
+    assert chunks[0]["text"].startswith("東") and chunks[-1]["text"].endswith("ー")
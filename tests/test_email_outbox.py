@@ -0,0 +1,179 @@
+import smtplib
+import threading
+
+import pytest
+
+from src.multimodel.retrieval_mode import email_agent
+from src.multimodel.retrieval_mode.email_agent import EmailOutbox
+
+
+class FakeSMTP:
+    def __init__(self, *args, **kwargs):
+        self.sent = []
+        self.logins = []
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        self.logins.append((user, password))
+
+    def send_message(self, message):
+        self.sent.append(message)
+
+    def noop(self):
+        return (250, b"OK")
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    servers = []
+
+    def connect():
+        servers.append(FakeSMTP())
+        return servers[-1]
+
+    box = EmailOutbox(tmp_path / "outbox.sqlite", connect=connect, pool_size=1)
+    # Cycles are driven by process_once(), not the background thread
+    box._started = True
+    box.servers = servers
+    yield box
+    box.close()
+
+
+def _sent(outbox):
+    return [message for server in outbox.servers for message in server.sent]
+
+
+def test_repeats_of_a_pending_alert_merge_and_sent_alerts_are_deduplicated(outbox):
+    for _ in range(3):
+        outbox.enqueue("ops@example.com", "Disk full", "node-1")
+    outbox.process_once()
+
+    messages = _sent(outbox)
+    assert len(messages) == 1
+    assert "raised 3 times" in messages[0].get_payload()[0].get_payload()
+    assert outbox.counters["repeats_merged"] == 2
+
+    outbox.enqueue("ops@example.com", "Disk full", "node-1")
+    outbox.process_once()
+    assert len(_sent(outbox)) == 1
+    assert outbox.counters["deduplicated"] == 1
+
+
+def test_alerts_due_together_go_out_as_one_digest_and_reuse_the_connection(outbox, monkeypatch):
+    monkeypatch.setattr(email_agent, "EMAIL_MIN_INTERVAL_SECONDS", 0)
+    outbox.enqueue("ops@example.com", "Disk full", "node-1")
+    outbox.enqueue("ops@example.com", "CPU hot", "node-2")
+    outbox.process_once()
+    outbox.enqueue("ops@example.com", "Fan failed", "node-3")
+    outbox.process_once()
+
+    messages = _sent(outbox)
+    assert messages[0]["Subject"] == "Enterprise RAG Alert Digest (2 alerts)"
+    assert messages[1]["Subject"] == "Fan failed"
+    assert outbox.counters["digests_sent"] == 1
+    assert outbox.pool.opened == 1
+
+
+def test_rate_limited_recipient_keeps_alerts_pending(outbox):
+    outbox.enqueue("ops@example.com", "Disk full", "node-1")
+    outbox.process_once()
+    outbox.enqueue("ops@example.com", "CPU hot", "node-2")
+    outbox.process_once()
+
+    assert len(_sent(outbox)) == 1
+    assert outbox.stats()["pending"] == 1
+
+
+def test_transient_failures_are_retried_with_backoff(outbox, monkeypatch):
+    monkeypatch.setattr(email_agent, "EMAIL_MIN_INTERVAL_SECONDS", 0)
+    healthy = outbox.pool.connect
+    outbox.pool.connect = lambda: (_ for _ in ()).throw(OSError("connection refused"))
+    outbox.enqueue("ops@example.com", "Disk full", "node-1")
+    outbox.process_once()
+
+    conn = outbox._db()
+    status, attempts, delay = conn.execute(
+        "SELECT status, attempts, next_attempt - created_at FROM outbox"
+    ).fetchone()
+    assert (status, attempts) == ("pending", 1)
+    assert delay >= email_agent.EMAIL_RETRY_BASE_SECONDS
+
+    outbox.pool.connect = healthy
+    conn.execute("UPDATE outbox SET next_attempt = 0")
+    conn.commit()
+    outbox.process_once()
+    assert len(_sent(outbox)) == 1
+    assert outbox.stats()["pending"] == 0
+
+
+def test_permanent_failures_are_not_retried(outbox):
+    def refuse():
+        server = FakeSMTP()
+        server.send_message = lambda message: (_ for _ in ()).throw(
+            smtplib.SMTPRecipientsRefused({"ops@example.com": (550, b"no such user")})
+        )
+        return server
+
+    outbox.pool.connect = refuse
+    outbox.enqueue("ops@example.com", "Disk full", "node-1")
+    outbox.process_once()
+    assert outbox.stats()["failed"] == 1
+
+
+def test_no_login_without_configured_credentials(monkeypatch):
+    servers = []
+    monkeypatch.setattr(email_agent.smtplib, "SMTP", lambda *a, **k: servers.append(FakeSMTP()) or servers[-1])
+    monkeypatch.setattr(email_agent, "SMTP_USER", None)
+    monkeypatch.setattr(email_agent, "SMTP_PASSWORD", None)
+
+    email_agent.smtp_connect()
+    assert servers[0].logins == []
+
+
+def test_refuses_to_send_when_user_is_set_without_password(monkeypatch):
+    monkeypatch.setattr(email_agent.smtplib, "SMTP", lambda *a, **k: pytest.fail("must not connect"))
+    monkeypatch.setattr(email_agent, "SMTP_USER", "alerts@example.com")
+    monkeypatch.setattr(email_agent, "SMTP_PASSWORD", None)
+
+    with pytest.raises(email_agent.SMTPConfigurationError):
+        email_agent.smtp_connect()
+
+
+def test_close_waits_for_an_in_flight_send(outbox):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_server():
+        server = FakeSMTP()
+        send = server.send_message
+        server.send_message = lambda message: (started.set(), release.wait(5), send(message))
+        outbox.servers.append(server)
+        return server
+
+    outbox.pool.connect = slow_server
+    outbox.enqueue("ops@example.com", "Disk full", "node-1")
+    cycle = threading.Thread(target=outbox.process_once)
+    cycle.start()
+    assert started.wait(5)
+
+    closer = threading.Thread(target=outbox.close)
+    closer.start()
+    closer.join(0.2)
+    assert closer.is_alive()
+
+    release.set()
+    closer.join(5)
+    cycle.join(5)
+    assert not closer.is_alive()
+    assert len(_sent(outbox)) == 1
+    assert outbox.stats()["sending"] == 0
+    assert outbox.counters["emails_sent"] == 1
+
+    # Once closed, nothing new is claimed
+    outbox.enqueue("dev@example.com", "CPU hot", "node-2")
+    outbox.process_once()
+    assert outbox.stats()["pending"] == 1
@@ -0,0 +1,60 @@
+import pytest
+
+from src.multimodel import embedding_registry, resource_registry
+from src.multimodel.embedding_registry import embedding_model, embedding_model_info, get_embedding_model
+
+
+class FakeOnnxEmbeddings:
+    def __init__(self, model_path, quantize=False, intra_op_threads=0):
+        self.model_path = model_path
+        self.quantize = quantize
+        self.intra_op_threads = intra_op_threads
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    """Records which backend loader ran instead of loading a model."""
+    loaded = []
+    monkeypatch.setattr(embedding_registry, "OnnxSentenceEmbeddings",
+                        lambda *args, **kwargs: loaded.append("onnx") or FakeOnnxEmbeddings(*args, **kwargs))
+    monkeypatch.setattr(embedding_registry, "_load_torch_model", lambda path, threads: loaded.append("torch") or "torch-model")
+    embedding_model.reset()
+    yield loaded
+    embedding_model.reset()
+
+
+def test_model_is_loaded_once_on_first_use(backends, monkeypatch):
+    monkeypatch.setattr(embedding_registry, "EMBEDDING_BACKEND", "torch")
+
+    assert backends == []
+    assert not embedding_model_info()["loaded"]
+    assert get_embedding_model() == get_embedding_model() == "torch-model"
+    assert backends == ["torch"]
+    assert embedding_model_info()["loaded"]
+
+
+@pytest.mark.parametrize("backend, quantize", [("onnx", False), ("onnx-int8", True)])
+def test_onnx_backends_select_quantization(backends, monkeypatch, backend, quantize):
+    monkeypatch.setattr(embedding_registry, "EMBEDDING_BACKEND", backend)
+    monkeypatch.setattr(embedding_registry, "EMBEDDING_THREADS", 3)
+
+    model = get_embedding_model()
+    assert backends == ["onnx"]
+    assert model.quantize is quantize
+    assert model.intra_op_threads == 3
+
+
+def test_unknown_backend_fails_and_is_reported(backends, monkeypatch):
+    monkeypatch.setattr(embedding_registry, "EMBEDDING_BACKEND", "tpu")
+
+    with pytest.raises(ValueError, match="tpu"):
+        get_embedding_model()
+    assert backends == []
+    assert "tpu" in embedding_model.status()["error"]
+
+
+def test_retrieval_shares_the_registry_resource():
+    from src.multimodel.retrieval_mode import retrieval
+
+    assert retrieval.embedding_model is embedding_model
+    assert resource_registry.RESOURCES["embedding_model"] is embedding_model
@@ -0,0 +1,51 @@
+from src.multimodel.pdf_ingestion.embedding_writer import EmbeddingWriter, make_chunk_id
+from src.multimodel.vector_index import NumpyIndex
+
+from .conftest import KeyedEmbeddings
+
+
+def _chunks(content_hash, texts):
+    return [
+        {"id": make_chunk_id(content_hash, "text", 1, i), "document": text, "metadata": {"page": 1}}
+        for i, text in enumerate(texts)
+    ]
+
+
+def test_chunk_ids_are_stable_and_distinct():
+    assert make_chunk_id("abc", "text", 3, 0) == make_chunk_id("abc", "text", 3, 0)
+    ids = {
+        make_chunk_id("abc", "text", 3, 0),
+        make_chunk_id("abc", "text", 3, 1),
+        make_chunk_id("abc", "image", 3, 0),
+        make_chunk_id("abd", "text", 3, 0),
+    }
+    assert len(ids) == 4
+
+
+def test_reingesting_a_pdf_upserts_instead_of_duplicating(tmp_path):
+    index = NumpyIndex(tmp_path, quantization="none")
+    texts = [f"chunk {i}" for i in range(5)]
+
+    for _ in range(2):
+        with EmbeddingWriter(index, KeyedEmbeddings({}, 4), batch_size=2) as writer:
+            ids = writer.add(("bank/report.pdf", "embed"), _chunks("abc", texts))
+
+    assert index.count() == 5
+    docs = index.get(ids)
+    assert [docs[i].page_content for i in ids] == texts
+    assert all(docs[i].metadata["chunk_id"] == i for i in ids)
+
+
+def test_a_tag_completes_once_all_its_batches_are_written(tmp_path):
+    index = NumpyIndex(tmp_path, quantization="none")
+    writer = EmbeddingWriter(index, KeyedEmbeddings({}, 4), batch_size=3)
+
+    writer.add("a.pdf", _chunks("a", ["1", "2"]))
+    writer.add("empty.pdf", [])
+    writer.add("b.pdf", _chunks("b", ["3", "4", "5"]))
+    completed = writer.completed()
+    assert "empty.pdf" in completed and "b.pdf" not in completed
+
+    writer.close()
+    assert sorted(completed + writer.completed()) == ["a.pdf", "b.pdf", "empty.pdf"]
+    assert writer.stats()["chunks_written"] == 5
@@ -0,0 +1,89 @@
+import logging
+
+import numpy as np
+
+from src.multimodel.bm25_index import BM25Index, reciprocal_rank_fusion
+
+
+NEAR = [1.0, 0.0, 0.0, 0.0]
+FAR = [0.0, 0.0, 0.0, 5.0]
+
+
+def test_shared_common_word_does_not_bypass_threshold(retrieval_env):
+    retrieval, add = retrieval_env
+    for i in range(20):
+        add(f"c{i}", f"annual report section {i} on operating profit and margins", FAR)
+
+    # Vector side: far from everything; lexical side: only "report" is shared
+    query = "report on volcano eruptions"
+    results = retrieval.hybrid_search(query, 5)
+
+    assert retrieval.select_relevant(results) == []
+
+
+def test_vector_distance_kept_for_chunks_found_by_both_sides(retrieval_env):
+    retrieval, add = retrieval_env
+    add("hit", "operating profit rose sharply", NEAR)
+    add("other", "weather in the alps", FAR)
+    retrieval.embedding_model.get().vectors["operating profit"] = np.array(NEAR)
+
+    results = dict((doc.metadata["chunk_id"], distance) for doc, distance in retrieval.hybrid_search("operating profit", 2))
+
+    assert results["hit"] is not None
+    assert results["hit"] <= retrieval.RELEVANCE_THRESHOLD
+
+
+def test_lexical_only_hit_with_full_coverage_is_kept(retrieval_env):
+    retrieval, add = retrieval_env
+    add("inv", "invoice inv-2024/001 payment overdue", FAR)
+    for i in range(10):
+        add(f"x{i}", f"unrelated paragraph number {i}", FAR)
+
+    results = retrieval.hybrid_search("inv-2024/001 overdue", 3)
+    relevant = retrieval.select_relevant(results)
+
+    assert [doc.metadata["chunk_id"] for doc in relevant] == ["inv"]
+
+
+def test_filtered_lexical_search_finds_matches_beyond_unfiltered_top_k(retrieval_env):
+    retrieval, add = retrieval_env
+    for i in range(40):
+        add(f"a{i}", f"penalty clause {i}", FAR, pdf_name="a")
+    # Longer chunk ranks below every "a" chunk for the same term
+    add("b0", "penalty " + " ".join(f"filler{j}" for j in range(30)), FAR, pdf_name="b")
+
+    hits = retrieval.lexical_search("penalty", 5, {"pdf_name": {"$in": ["b"]}})
+
+    assert [hit.chunk_id for hit in hits] == ["b0"]
+
+
+def test_bm25_coverage_weights_rare_terms(tmp_path):
+    index = BM25Index(tmp_path / "bm25.sqlite")
+    index.add([{"id": f"d{i}", "document": f"common text {i}"} for i in range(20)])
+    index.add([{"id": "rare", "document": "common text zeppelin"}])
+
+    hits = {hit.chunk_id: hit for hit in index.search("common zeppelin", 30)}
+
+    assert hits["rare"].coverage == 1.0
+    assert hits["d0"].coverage < 0.2
+    assert max(hits.values(), key=lambda h: h.score).chunk_id == "rare"
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+    assert fused[0][0] == "b"
+    assert {item for item, _ in fused} == {"a", "b", "c", "d"}
+
+
+def test_select_relevant_logs_scores_at_debug_level_only(retrieval_env, caplog, capsys):
+    retrieval, add = retrieval_env
+    add("c-1", "operating profit rose", [1, 0, 0, 0])
+    results = retrieval.cached_similarity_search("operating profit", 1, None)
+
+    with caplog.at_level(logging.INFO, logger=retrieval.logger.name):
+        retrieval.select_relevant(results)
+    assert not caplog.records
+    with caplog.at_level(logging.DEBUG, logger=retrieval.logger.name):
+        retrieval.select_relevant(results)
+    assert "Lexical coverage" in caplog.text
+    assert capsys.readouterr().out == ""
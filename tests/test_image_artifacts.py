@@ -0,0 +1,57 @@
+import pytest
+from langchain_core.documents import Document
+
+from src.multimodel.pdf_ingestion.vision import image_artifacts, vision_agent
+from src.multimodel.pdf_ingestion.vision.image_artifacts import get_artifacts, put_artifacts
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_artifacts, "IMAGE_ARTIFACTS_PATH", tmp_path / "artifacts.sqlite")
+    monkeypatch.setattr(image_artifacts, "_conn", None)
+    described = []
+
+    def describe(image_path):
+        described.append(image_path)
+        return {"caption": f"OCR Extracted Content: {image_path}", "ocr_text": image_path, "features": {}}
+
+    monkeypatch.setattr(vision_agent, "describe_image", describe)
+    yield described
+    if image_artifacts._conn is not None:
+        image_artifacts._conn.close()
+
+
+def _image(image_id, caption=""):
+    return Document(page_content=caption, metadata={"type": "image", "image_id": image_id, "image_path": f"{image_id}.png"})
+
+
+def test_artifacts_round_trip_in_batches(store, monkeypatch):
+    monkeypatch.setattr(image_artifacts, "LOOKUP_BATCH", 2)
+    put_artifacts({f"img-{i}": {"caption": f"c{i}", "ocr_text": "", "features": {"width": i}} for i in range(5)})
+
+    found = get_artifacts(["img-0", "img-4", "img-4", "missing", None])
+    assert set(found) == {"img-0", "img-4"}
+    assert found["img-4"] == {"caption": "c4", "ocr_text": "", "features": {"width": 4}}
+
+
+def test_query_path_reads_stored_captions_without_ocr(store):
+    put_artifacts({"img-1": {"caption": "Revenue chart", "ocr_text": "", "features": {}}})
+    text = Document(page_content="plain text", metadata={"type": "text"})
+
+    enriched = vision_agent.vision_agent_enrich([text, _image("img-1")])
+    assert [doc.page_content for doc in enriched] == ["plain text", "Revenue chart"]
+    assert store == []
+
+
+def test_unprocessed_images_are_described_once_and_stored(store):
+    vision_agent.vision_agent_enrich([_image("img-2")])
+    enriched = vision_agent.vision_agent_enrich([_image("img-2")])
+
+    assert store == ["img-2.png"]
+    assert enriched[0].page_content == "OCR Extracted Content: img-2.png"
+
+
+def test_legacy_image_chunks_keep_their_indexed_caption(store):
+    enriched = vision_agent.vision_agent_enrich([_image("img-3", caption="indexed caption")])
+    assert enriched[0].page_content == "indexed caption"
+    assert store == []
@@ -0,0 +1,60 @@
+from langchain_core.documents import Document
+
+from src.multimodel.retrieval_mode import importance_agent
+from src.multimodel.retrieval_mode.importance_agent import (
+    compile_matcher, documents_important, match_important_terms, tag_importance
+)
+
+
+def test_keywords_match_whole_words_only():
+    assert match_important_terms("Define the scope; refine it.") == []
+    assert match_important_terms("A FINE of $10 and a late-payment penalty.") == ["fine", "payment", "penalty"]
+
+
+def test_plurals_match_and_map_back_to_their_keyword():
+    text = "Risks, taxes and penalties; liabilities, deadlines, breaches and payments."
+    assert match_important_terms(text) == ["breach", "deadline", "liability", "payment", "penalty", "risk", "tax"]
+    assert match_important_terms("Fines apply.") == ["fine"]
+    # Still whole words: no match inside longer words
+    assert match_important_terms("Define the risky taxonomy of finesse.") == []
+
+
+def test_multi_word_keywords_allow_any_whitespace():
+    matcher = compile_matcher(["early termination", "termination"])
+    assert [m.group(0) for m in matcher.finditer("Early\n termination fee; termination.")] == [
+        "Early\n termination", "termination"
+    ]
+    assert compile_matcher(["early termination"]).search("early terminations")
+    assert compile_matcher([" ", ""]).search("anything") is None
+
+
+def test_category_keywords_extend_the_defaults(monkeypatch):
+    monkeypatch.setitem(importance_agent.IMPORTANT_KEYWORDS_BY_CATEGORY, "bank", ["write-off", "npa"])
+    _clear_caches()
+    try:
+        assert match_important_terms("NPA write-off and tax", category="Bank") == ["npa", "tax", "write-off"]
+        assert match_important_terms("NPA write-offs and taxes", category="bank") == ["npa", "tax", "write-off"]
+        assert match_important_terms("NPA write-off and tax", category="hr") == ["tax"]
+    finally:
+        _clear_caches()
+
+
+def _clear_caches():
+    importance_agent.keywords_for.cache_clear()
+    importance_agent.matcher_for.cache_clear()
+
+
+def test_ingestion_tags_drive_the_query_time_check():
+    chunks = tag_importance([
+        {"document": "Interest accrues monthly", "metadata": {}},
+        {"document": "Team offsite agenda", "metadata": {}},
+    ])
+    assert [c["metadata"]["important_terms"] for c in chunks] == ["interest", ""]
+
+    tagged = [Document(page_content=c["document"], metadata=c["metadata"]) for c in chunks]
+    assert documents_important(tagged)
+    assert not documents_important(tagged[1:])
+    # The stored tag wins over the text
+    assert not documents_important([Document(page_content="penalty", metadata={"important": False})])
+    # Chunks ingested before tagging are matched live
+    assert documents_important([Document(page_content="penalty", metadata={})])
@@ -0,0 +1,89 @@
+import os
+
+from src.multimodel.pdf_ingestion import ingestion_manifest
+from src.multimodel.pdf_ingestion.ingestion_manifest import STAGES, IngestionManifest, entry_artifact, file_fingerprint
+
+
+RECORD = {"pdf_name": "report.pdf", "category": "bank", "path": "/raw/bank/report.pdf"}
+KEY = "bank/report.pdf"
+
+
+def _ingested(tmp_path, pdf):
+    manifest = IngestionManifest(tmp_path / "manifest.json")
+    manifest.start(KEY, RECORD, file_fingerprint(pdf))
+    for stage in STAGES:
+        manifest.mark_stage(KEY, stage)
+    manifest.add_vector_ids(KEY, ["a", "b"])
+    manifest.save()
+    return IngestionManifest(tmp_path / "manifest.json")
+
+
+def test_unchanged_pdf_is_complete_without_rehashing(tmp_path, monkeypatch):
+    pdf = tmp_path / "report.pdf"
+    pdf.write_bytes(b"%PDF-1.4 original")
+    manifest = _ingested(tmp_path, pdf)
+
+    monkeypatch.setattr(ingestion_manifest, "hash_file", _must_not_hash)
+    fingerprint = file_fingerprint(pdf, manifest.get(KEY))
+    assert manifest.is_unchanged(KEY, fingerprint)
+    assert manifest.is_complete(KEY)
+
+
+def _must_not_hash(path):
+    raise AssertionError("an unchanged file must not be re-read")
+
+
+def test_touched_but_identical_pdf_is_rehashed_and_still_unchanged(tmp_path):
+    pdf = tmp_path / "report.pdf"
+    pdf.write_bytes(b"%PDF-1.4 original")
+    manifest = _ingested(tmp_path, pdf)
+
+    stat = os.stat(pdf)
+    os.utime(pdf, (stat.st_atime, stat.st_mtime + 10))
+    fingerprint = file_fingerprint(pdf, manifest.get(KEY))
+    assert manifest.is_unchanged(KEY, fingerprint)
+
+
+def test_changed_pdf_restarts_every_stage(tmp_path):
+    pdf = tmp_path / "report.pdf"
+    pdf.write_bytes(b"%PDF-1.4 original")
+    manifest = _ingested(tmp_path, pdf)
+
+    pdf.write_bytes(b"%PDF-1.4 revised and longer")
+    fingerprint = file_fingerprint(pdf, manifest.get(KEY))
+    assert not manifest.is_unchanged(KEY, fingerprint)
+    assert manifest.get(KEY)["vector_ids"] == ["a", "b"]
+
+    manifest.start(KEY, RECORD, fingerprint)
+    assert not any(manifest.stage_done(KEY, stage) for stage in STAGES)
+    assert manifest.get(KEY)["vector_ids"] == []
+
+
+def test_interrupted_run_resumes_from_the_missing_stage(tmp_path):
+    pdf = tmp_path / "report.pdf"
+    pdf.write_bytes(b"%PDF-1.4 original")
+    manifest = IngestionManifest(tmp_path / "manifest.json")
+    manifest.start(KEY, RECORD, file_fingerprint(pdf))
+    manifest.mark_stage(KEY, "extract")
+    manifest.add_vector_ids(KEY, ["a", "b"])
+    manifest.add_vector_ids(KEY, ["b", "c"])
+    manifest.save()
+
+    reloaded = IngestionManifest(tmp_path / "manifest.json")
+    assert reloaded.stage_done(KEY, "extract")
+    assert not reloaded.stage_done(KEY, "chunk")
+    assert not reloaded.is_complete(KEY)
+    assert reloaded.get(KEY)["vector_ids"] == ["a", "b", "c"]
+    assert not (tmp_path / "manifest.tmp").exists()
+
+
+def test_artifact_names_are_unique_per_path_and_legacy_entries_keep_the_stem(tmp_path):
+    manifest = IngestionManifest(tmp_path / "manifest.json")
+    fingerprint = {"size": 1, "mtime": 0.0, "content_hash": "abc"}
+    manifest.start(KEY, RECORD, fingerprint)
+    manifest.start("hr/report.pdf", {**RECORD, "category": "hr"}, fingerprint)
+
+    bank, hr = entry_artifact(manifest.get(KEY)), entry_artifact(manifest.get("hr/report.pdf"))
+    assert bank.startswith("report-") and hr.startswith("report-")
+    assert bank != hr
+    assert entry_artifact({"pdf_name": "report.pdf"}) == "report"
@@ -0,0 +1,151 @@
+from src.multimodel.pdf_ingestion.ingestion_manifest import IngestionManifest
+from src.multimodel.pdf_ingestion.ingestion_pipeline import is_small_image
+from src.multimodel.pdf_ingestion.record_store import RECORD_SUFFIX, iter_artifact
+from src.multimodel.pdf_ingestion.synthetic_pdfs import generate_pdf
+
+
+def _artifact_files(pipeline, artifact):
+    return {
+        f"{directory.name}/{path.name}": path.read_bytes()
+        for directory in (pipeline.TEXT_DIR, pipeline.TABLE_DIR, pipeline.CHUNK_DIR)
+        for path in [directory / f"{artifact}{RECORD_SUFFIX}"]
+        if path.exists()
+    }
+
+
+def test_same_named_pdfs_in_different_categories_keep_separate_artifacts(pipeline_env):
+    pipeline = pipeline_env
+    bank_pdf = generate_pdf(pipeline.RAW_PDF_DIR / "bank" / "report.pdf", "text", pages=2, seed=1)
+    generate_pdf(pipeline.RAW_PDF_DIR / "hr" / "report.pdf", "text", pages=2, seed=2)
+
+    pipeline.run_pipeline(workers=1)
+    manifest = IngestionManifest(pipeline.MANIFEST_FILE)
+    bank, hr = manifest.get("bank/report.pdf"), manifest.get("hr/report.pdf")
+    assert bank["artifact"] != hr["artifact"]
+    hr_files = _artifact_files(pipeline, hr["artifact"])
+    assert len(hr_files) == 3
+    assert len(_artifact_files(pipeline, bank["artifact"])) == 3
+
+    # Re-ingesting the changed bank report leaves the HR report untouched
+    generate_pdf(bank_pdf, "text", pages=3, seed=3)
+    pipeline.run_pipeline(workers=1)
+    manifest = IngestionManifest(pipeline.MANIFEST_FILE)
+    assert manifest.get("bank/report.pdf")["stats"]["pages"] == 3
+    assert _artifact_files(pipeline, hr["artifact"]) == hr_files
+
+    # So does deleting it
+    bank_pdf.unlink()
+    pipeline.run_pipeline(workers=1)
+    manifest = IngestionManifest(pipeline.MANIFEST_FILE)
+    assert manifest.get("bank/report.pdf") is None
+    assert _artifact_files(pipeline, bank["artifact"]) == {}
+    assert _artifact_files(pipeline, hr["artifact"]) == hr_files
+    assert set(pipeline.get_vector_index().get(hr["vector_ids"])) == set(hr["vector_ids"])
+
+
+def test_tables_are_extracted_with_their_cells(pipeline_env):
+    pipeline = pipeline_env
+    pdf = generate_pdf(pipeline.RAW_PDF_DIR / "bank" / "tables.pdf", "table", pages=2)
+
+    tables = pipeline.extract_tables(pdf)
+    assert [t["table_id"] for t in tables] == ["table_1_0", "table_1_1", "table_2_0", "table_2_1"]
+    assert [t["page"] for t in tables] == [1, 1, 2, 2]
+    for table in tables:
+        assert len(table["rows"]) == 12
+        assert all(len(row) == 5 for row in table["rows"])
+        # Body cells are the generated amounts, one per cell
+        assert all(float(cell) >= 0 for row in table["rows"][1:] for cell in row[1:])
+
+
+def test_single_pass_extraction_writes_every_page_and_table(pipeline_env):
+    pipeline = pipeline_env
+    pdf = generate_pdf(pipeline.RAW_PDF_DIR / "bank" / "tables.pdf", "table", pages=3)
+    record = {"path": str(pdf), "artifact": "tables"}
+
+    pipeline.process_pdf(record)
+    assert (record["pages"], record["tables"], record["images"]) == (3, 6, 0)
+    assert [page["page"] for page in iter_artifact(pipeline.TEXT_DIR, "tables")] == [1, 2, 3]
+    assert list(iter_artifact(pipeline.TABLE_DIR, "tables")) == pipeline.extract_tables(pdf)
+
+    table_chunks = [c for c in pipeline.build_chunks("tables", "hash", "bank") if c["metadata"]["type"] == "table"]
+    assert len(table_chunks) == 6
+    assert all(c["document"].count("\n") == 11 and " | " in c["document"] for c in table_chunks)
+
+
+def test_long_documents_are_split_into_page_ranges(pipeline_env, monkeypatch):
+    pipeline = pipeline_env
+    pdf = generate_pdf(pipeline.RAW_PDF_DIR / "bank" / "long.pdf", "text", pages=5)
+
+    assert pipeline.plan_page_ranges(pdf) == [(0, 5)]
+    monkeypatch.setattr(pipeline, "PAGE_SPLIT_THRESHOLD", 4)
+    monkeypatch.setattr(pipeline, "PAGE_RANGE_SIZE", 2)
+    assert pipeline.plan_page_ranges(pdf) == [(0, 2), (2, 4), (4, 5)]
+
+
+def _extraction(pipeline, artifact):
+    images = [
+        {k: v for k, v in image.items() if k not in ("image_name", "path")}
+        for image in pipeline.load_image_index(artifact)
+    ]
+    return (
+        list(iter_artifact(pipeline.TEXT_DIR, artifact)),
+        list(iter_artifact(pipeline.TABLE_DIR, artifact)),
+        sorted(images, key=lambda image: image["image_id"]),
+    )
+
+
+def test_parallel_page_ranges_match_a_serial_pass(pipeline_env, monkeypatch):
+    pipeline = pipeline_env
+    monkeypatch.setattr(pipeline, "PAGE_SPLIT_THRESHOLD", 2)
+    monkeypatch.setattr(pipeline, "PAGE_RANGE_SIZE", 2)
+    pdfs = [
+        generate_pdf(pipeline.RAW_PDF_DIR / "bank" / "tables.pdf", "table", pages=5),
+        generate_pdf(pipeline.RAW_PDF_DIR / "bank" / "images.pdf", "image", pages=3),
+    ]
+
+    records = [{"path": str(pdf), "artifact": f"parallel-{pdf.stem}"} for pdf in pdfs]
+    extracted = list(pipeline.iter_parallel_extractions(records, workers=2))
+    # One result per page range, yielded in catalog order
+    assert [(record["artifact"], len(results)) for record, results in extracted] == [
+        ("parallel-tables", 3), ("parallel-images", 2)
+    ]
+    for record, results in extracted:
+        pipeline.write_extraction(record, results)
+
+    for pdf, record in zip(pdfs, records):
+        serial = {"path": str(pdf), "artifact": f"serial-{pdf.stem}"}
+        pipeline.process_pdf(serial)
+        assert {k: record[k] for k in ("pages", "tables", "images")} == {k: serial[k] for k in ("pages", "tables", "images")}
+        assert _extraction(pipeline, record["artifact"]) == _extraction(pipeline, serial["artifact"])
+
+
+def test_small_and_extreme_aspect_images_are_filtered():
+    assert is_small_image(32, 200)
+    assert is_small_image(2000, 60)
+    assert not is_small_image(300, 200)
+
+
+def test_repeated_images_are_stored_once_and_marked_decorative(pipeline_env, monkeypatch):
+    pipeline = pipeline_env
+    pdf = generate_pdf(pipeline.RAW_PDF_DIR / "bank" / "images.pdf", "image", pages=3)
+
+    # With the default byte floor the tiny header logo is dropped outright
+    assert all(len(image["pages"]) == 1 for image in pipeline.extract_images(pdf, "default"))
+
+    monkeypatch.setitem(pipeline.IMAGE_FILTER, "min_bytes", 0)
+    monkeypatch.setitem(pipeline.IMAGE_FILTER, "max_page_repeats", 2)
+    images = pipeline.extract_images(pdf, "images")
+
+    logo = [image for image in images if image["pages"] == [1, 2, 3]]
+    assert len(logo) == 1 and logo[0]["decorative"]
+    assert sum(not image["decorative"] for image in images) == 12
+    # One file per unique image, named after its content hash
+    files = sorted(path.name for path in pipeline.IMAGE_DIR.glob("images_img_*"))
+    assert files == sorted(image["image_name"] for image in images)
+    assert all(image["image_id"] in image["image_name"] for image in images)
+
+    # Decorative images are never captioned or embedded
+    monkeypatch.setattr(pipeline, "vision_agent_enrich", lambda docs: docs)
+    chunks = pipeline.build_image_chunks("images.pdf", "hash", "bank", "images")
+    assert len(chunks) == 12
+    assert logo[0]["image_id"] not in {chunk["metadata"]["image_id"] for chunk in chunks}
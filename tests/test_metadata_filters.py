@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from src.multimodel.retrieval_mode.retrieval import RetrievalFilters
+from src.multimodel.vector_index import NumpyIndex, matches_filter
+
+
+def _corpus(tmp_path, rows=200):
+    rng = np.random.default_rng(0)
+    index = NumpyIndex(tmp_path, quantization="none")
+    metadatas = []
+    for i in range(rows):
+        metadata = {"chunk_id": f"c-{i}", "category": ["bank", "legal", "hr"][i % 3], "type": ["text", "table"][i % 2]}
+        if i % 5:
+            metadata["page"] = i % 40 + 1
+        metadatas.append(metadata)
+    index.upsert(
+        [m["chunk_id"] for m in metadatas],
+        rng.normal(size=(rows, 8)).astype(np.float32),
+        [f"chunk {i}" for i in range(rows)],
+        metadatas,
+    )
+    return index, metadatas
+
+
+WHERES = [
+    {"category": "legal"},
+    {"category": {"$in": ["bank", "hr"]}, "type": {"$ne": "table"}},
+    {"page": {"$gte": 10, "$lte": 12}},
+    {"page": {"$lt": 3}},
+    {"$or": [{"category": "hr"}, {"page": {"$gt": 38}}]},
+    {"$and": [{"type": "text"}, {"category": {"$nin": ["bank"]}}]},
+    {"category": "missing"},
+]
+
+
+@pytest.mark.parametrize("where", WHERES)
+def test_index_filters_match_row_by_row_evaluation(tmp_path, where):
+    index, metadatas = _corpus(tmp_path)
+    expected = {m["chunk_id"] for m in metadatas if matches_filter(m, where)}
+
+    hits = index.search(np.zeros(8, dtype=np.float32), k=len(metadatas), filters=where)
+    assert {doc.metadata["chunk_id"] for doc, _ in hits} == expected
+
+
+def test_filtered_search_returns_the_nearest_matching_rows(tmp_path):
+    index, metadatas = _corpus(tmp_path)
+    query = np.ones(8, dtype=np.float32)
+    everything = index.search(query, k=len(metadatas))
+    nearest_legal = [doc.metadata["chunk_id"] for doc, _ in everything if doc.metadata["category"] == "legal"][:5]
+
+    hits = index.search(query, k=5, filters={"category": "legal"})
+    assert [doc.metadata["chunk_id"] for doc, _ in hits] == nearest_legal
+
+
+def test_request_filters_become_a_where_clause():
+    filters = RetrievalFilters(category=["bank"], pdf_name=["Report.PDF", "notes"], page_from=2)
+    assert filters.to_where() == {"$and": [
+        {"category": {"$in": ["bank"]}},
+        {"pdf_name": {"$in": ["Report", "notes"]}},
+        {"page": {"$gte": 2}},
+    ]}
+    assert RetrievalFilters(type=["table"]).to_where() == {"type": {"$in": ["table"]}}
+    assert RetrievalFilters().to_where() is None
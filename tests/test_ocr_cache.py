@@ -0,0 +1,47 @@
+import pytest
+from PIL import Image
+
+from src.multimodel.pdf_ingestion.vision import ocr_cache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE_PATH", tmp_path / "ocr.sqlite")
+    monkeypatch.setattr(ocr_cache, "_conn", None)
+    monkeypatch.setattr(ocr_cache, "_tesseract_version", "5.3.0")
+    calls = []
+    monkeypatch.setattr(
+        ocr_cache.pytesseract, "image_to_string",
+        lambda image, **kwargs: calls.append(kwargs) or f"text {image.getpixel((0, 0))}"
+    )
+    yield calls
+    if ocr_cache._conn is not None:
+        ocr_cache._conn.close()
+
+
+def test_same_pixels_are_only_ocred_once(cache):
+    image = Image.new("L", (8, 8), color=7)
+    assert ocr_cache.cached_image_to_string(image) == "text 7"
+    assert ocr_cache.cached_image_to_string(Image.new("L", (8, 8), color=7)) == "text 7"
+    assert len(cache) == 1
+
+
+def test_pixels_and_ocr_config_are_part_of_the_key(cache):
+    image = Image.new("L", (8, 8), color=7)
+    ocr_cache.cached_image_to_string(image)
+    ocr_cache.cached_image_to_string(Image.new("L", (8, 8), color=8))
+    ocr_cache.cached_image_to_string(image, lang="deu")
+    ocr_cache.cached_image_to_string(image, config="--psm 6")
+    assert len(cache) == 4
+
+
+def test_least_recently_used_entries_are_evicted(cache, monkeypatch):
+    monkeypatch.setattr(ocr_cache, "OCR_CACHE_MAX_BYTES", 30)
+    monkeypatch.setattr(ocr_cache, "EVICT_CHECK_EVERY", 1)
+    ocr_cache.put_cached_text("old", "x" * 10)
+    ocr_cache.put_cached_text("used", "x" * 10)
+    ocr_cache._connection().execute("UPDATE ocr_cache SET last_access = 0 WHERE key = 'old'")
+    ocr_cache.put_cached_text("new", "x" * 20)
+
+    assert ocr_cache.get_cached_text("old") is None
+    assert ocr_cache.get_cached_text("new") == "x" * 20
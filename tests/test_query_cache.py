@@ -0,0 +1,75 @@
+from src.multimodel.collection_version import bump_collection_version
+from src.multimodel.retrieval_mode.query_cache import QueryCache, TTLCache, normalize_query
+
+
+NEAR = [1.0, 0.0, 0.0, 0.0]
+
+
+def test_normalization_ignores_case_whitespace_and_trailing_punctuation():
+    assert normalize_query("  Operating   PROFIT? ") == normalize_query("operating profit") == "operating profit"
+
+
+def test_result_keys_separate_mode_top_k_filters_and_version():
+    key = QueryCache.result_key("q", 5, {"b": 1, "a": 2}, "v1")
+    assert key == QueryCache.result_key("q", 5, {"a": 2, "b": 1}, "v1")
+    assert len({
+        key,
+        QueryCache.result_key("q", 6, {"a": 2, "b": 1}, "v1"),
+        QueryCache.result_key("q", 5, None, "v1"),
+        QueryCache.result_key("q", 5, {"a": 2, "b": 1}, "v2"),
+        QueryCache.result_key("q", 5, {"a": 2, "b": 1}, "v1", mode="hybrid"),
+    }) == 5
+
+
+def test_results_expire_after_the_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("src.multimodel.retrieval_mode.query_cache.time.monotonic", lambda: clock[0])
+    cache = TTLCache(10, ttl=5)
+    cache.put("k", "v")
+    assert cache.get("k") == "v"
+    clock[0] += 6
+    assert cache.get("k") is None
+    assert cache.expired == 1
+
+
+def test_repeated_query_is_served_from_cache(retrieval_env, monkeypatch):
+    retrieval, add = retrieval_env
+    add("c-1", "operating profit rose", NEAR)
+    retrieval.embedding_model.get().vectors["operating profit"] = NEAR
+
+    first = retrieval.cached_similarity_search("Operating profit?", 1)
+    monkeypatch.setattr(retrieval.vector_store.get(), "search", lambda *a, **k: 1 / 0)
+    assert retrieval.cached_similarity_search("operating  PROFIT", 1) == first
+    assert retrieval.query_cache.stats()["result_hits"] == 1
+
+
+def test_new_collection_version_invalidates_cached_results(retrieval_env, monkeypatch):
+    retrieval, add = retrieval_env
+    monkeypatch.setattr("src.multimodel.collection_version.VERSION_CHECK_INTERVAL", 0)
+    add("c-1", "operating profit rose", NEAR)
+    retrieval.embedding_model.get().vectors["operating profit"] = NEAR
+    assert [doc.metadata["chunk_id"] for doc, _ in retrieval.cached_similarity_search("operating profit", 1)] == ["c-1"]
+
+    add("c-2", "operating profit fell", [1.0, 0.0, 0.0, 0.001])
+    retrieval.vector_store.get().delete(["c-1"])
+    # Without a version bump the stale result is still served
+    assert [doc.metadata["chunk_id"] for doc, _ in retrieval.cached_similarity_search("operating profit", 1)] == ["c-1"]
+
+    bump_collection_version(retrieval.VECTOR_INDEX_PATH)
+    assert [doc.metadata["chunk_id"] for doc, _ in retrieval.cached_similarity_search("operating profit", 1)] == ["c-2"]
+
+
+def test_service_reports_cache_counters(retrieval_env):
+    retrieval, add = retrieval_env
+    add("c-1", "operating profit rose", NEAR)
+    retrieval.embedding_model.get().vectors["operating profit"] = NEAR
+
+    before = retrieval.RetrievalService.stats()["query_cache"]
+    retrieval.cached_similarity_search("operating profit", 1)
+    retrieval.cached_similarity_search("Operating profit", 1)
+    after = retrieval.RetrievalService.stats()["query_cache"]
+
+    # Counters are per process; entries reflect the cleared cache
+    assert after["result_misses"] - before["result_misses"] == 1
+    assert after["result_hits"] - before["result_hits"] == 1
+    assert (after["result_entries"], after["embedding_entries"]) == (1, 1)
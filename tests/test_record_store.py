@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from src.multimodel.pdf_ingestion.record_store import (
+    RecordWriter, convert_json_dir, iter_artifact, iter_records, write_records
+)
+
+
+RECORDS = [{"page": 1, "text": "Überschrift"}, {"page": 2, "text": "", "tables": [[1, 2], [3, 4]]}]
+
+
+def test_records_round_trip(tmp_path):
+    path = tmp_path / "doc.mpk"
+    assert write_records(path, RECORDS) == 2
+    assert list(iter_records(path)) == RECORDS
+    assert write_records(tmp_path / "empty.mpk", []) == 0
+    assert list(iter_records(tmp_path / "empty.mpk")) == []
+
+
+def test_failed_write_leaves_no_file_behind(tmp_path):
+    path = tmp_path / "doc.mpk"
+    with pytest.raises(RuntimeError):
+        with RecordWriter(path) as writer:
+            writer.write(RECORDS[0])
+            raise RuntimeError("extraction failed")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_rejects_files_that_are_not_record_files(tmp_path):
+    path = tmp_path / "doc.mpk"
+    path.write_bytes(b"{not a record file}")
+    with pytest.raises(ValueError):
+        list(iter_records(path))
+
+
+def test_legacy_json_is_read_and_converted(tmp_path):
+    (tmp_path / "doc.json").write_text(json.dumps(RECORDS), encoding="utf-8")
+    assert list(iter_artifact(tmp_path, "doc")) == RECORDS
+
+    assert convert_json_dir(tmp_path) == 1
+    assert not (tmp_path / "doc.json").exists()
+    assert list(iter_artifact(tmp_path, "doc")) == RECORDS
+    assert list(iter_artifact(tmp_path, "missing")) == []
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+
+from src.multimodel.retrieval_mode.reranker import CrossEncoderReranker, rerank_candidates
+
+
+class FakeModel:
+    def __init__(self):
+        self.pairs = []
+
+    def predict(self, pairs, **kwargs):
+        self.pairs.extend(pairs)
+        return [float(len(text)) for _, text in pairs]
+
+
+def _reranker(pairs_in_budget=None):
+    reranker = CrossEncoderReranker(budget_ms=100)
+    reranker._model = FakeModel()
+    if pairs_in_budget is not None:
+        reranker.seconds_per_pair = 0.1 / pairs_in_budget
+    return reranker
+
+
+def test_candidate_count_over_fetches_until_the_cost_is_measured():
+    assert _reranker().candidate_count(3) == rerank_candidates(3)
+
+
+def test_candidate_count_shrinks_to_the_rerank_budget():
+    assert _reranker(pairs_in_budget=7).candidate_count(3) == 7
+    assert _reranker(pairs_in_budget=1).candidate_count(3) == 3
+    # The budget is shared by the queries of one batch
+    assert _reranker(pairs_in_budget=20).candidate_count(3, queries=4) == 5
+
+
+def test_search_params_fetch_only_what_the_budget_can_rerank(retrieval_env, monkeypatch):
+    retrieval, _ = retrieval_env
+    monkeypatch.setattr(retrieval, "reranker", _reranker(pairs_in_budget=1))
+    state = SimpleNamespace(query="q", top_k=3, rerank=True, mode="vector", filters=None)
+
+    assert retrieval._search_params(state)[3] == 3
+
+
+def test_cached_scores_are_reused():
+    reranker = _reranker()
+    docs = [Document(page_content="x" * n, metadata={"chunk_id": f"c-{n}"}) for n in (1, 3, 2)]
+
+    first = reranker.rerank("query", docs, top_k=2)
+    second = reranker.rerank("Query ", docs, top_k=2)
+
+    assert [doc.metadata["chunk_id"] for doc, _ in first] == ["c-3", "c-2"]
+    assert second == first
+    assert len(reranker._model.pairs) == 3
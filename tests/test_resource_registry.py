@@ -0,0 +1,38 @@
+import pytest
+
+from src.multimodel import resource_registry
+from src.multimodel.resource_registry import lazy_resource, loaded_resources, readiness, warm_up
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(resource_registry, "RESOURCES", {})
+    return resource_registry.RESOURCES
+
+
+def test_resources_load_once_on_first_get(registry):
+    calls = []
+    resource = lazy_resource("model", lambda: calls.append(1) or "loaded")
+
+    assert loaded_resources() == []
+    assert resource.get() == resource.get() == "loaded"
+    assert calls == [1]
+    assert loaded_resources() == ["model"]
+
+
+def test_warm_up_loads_required_resources_and_records_failures(registry):
+    def broken():
+        raise RuntimeError("no model file")
+
+    lazy_resource("store", lambda: "store")
+    lazy_resource("model", broken)
+    lazy_resource("tracking", lambda: "client", required=False)
+
+    status = warm_up()
+    assert status["ready"] is False
+    assert status["resources"]["store"]["loaded"] is True
+    assert status["resources"]["model"]["error"] == "RuntimeError: no model file"
+    assert status["resources"]["tracking"]["loaded"] is False
+
+    registry["model"].set("stub")
+    assert readiness()["ready"] is True
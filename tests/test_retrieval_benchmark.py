@@ -0,0 +1,29 @@
+from src.multimodel.retrieval_mode.benchmark import compare_to_baseline, recall_at_k, run_benchmark
+
+
+def _report(p95, qps, recall):
+    return {
+        "config": {"k": 10, "chunks": 1000, "cpu_count": 8},
+        "stages": {"retrieval_node": {"p50_ms": 1.0, "p95_ms": p95, "qps": qps, "recall@10": recall}},
+    }
+
+
+def test_recall_at_k_counts_only_the_first_k_outputs():
+    assert recall_at_k([["a", "b", "c"], ["x"]], [{"a", "c"}, {"y"}], k=2) == 0.25
+
+
+def test_regressions_beyond_tolerance_are_reported():
+    baseline = _report(p95=10.0, qps=100.0, recall=0.95)
+    assert compare_to_baseline(_report(11.0, 90.0, 0.945), baseline)["regressions"] == []
+
+    regressions = compare_to_baseline(_report(13.0, 70.0, 0.90), baseline)["regressions"]
+    assert regressions == ["retrieval_node.p95_ms", "retrieval_node.qps", "retrieval_node.recall@10"]
+
+
+def test_small_run_reports_every_requested_stage(tmp_path):
+    report = run_benchmark(chunks=400, dim=16, queries=12, k=5, concurrency=2,
+                           stages=("retrieval_node", "supervisor_arun"), workdir=tmp_path)
+
+    assert set(report["stages"]) == {"retrieval_node", "supervisor_arun"}
+    assert report["index_search"]["recall@5"] == 1.0
+    assert compare_to_baseline(report, report)["regressions"] == []
@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from src.mcp import server
+
+
+class FakeSupervisor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def arun(self, **kwargs):
+        return {"documents": self.documents, "important_info_detected": True, "images_present": False}
+
+
+def _client(monkeypatch, documents):
+    monkeypatch.setattr(server, "WARM_UP_ON_STARTUP", False)
+    monkeypatch.setattr(server, "supervisor", FakeSupervisor(documents))
+    return TestClient(server.app)
+
+
+def test_query_tool_returns_documents_without_printing(monkeypatch, capsys):
+    client = _client(monkeypatch, [Document(page_content="x" * 600), "plain text"])
+    response = client.post("/tools/query_enterprise_pdf", json={"query": "operating profit"})
+
+    assert response.status_code == 200
+    assert response.json()["documents"] == ["x" * 500, "plain text"]
+    assert response.json()["important_info_detected"] is True
+    assert capsys.readouterr().out == ""
+
+
+def test_query_tool_answers_when_nothing_is_relevant(monkeypatch):
+    client = _client(monkeypatch, [])
+    response = client.post("/tools/query_enterprise_pdf", json={"query": "weather"})
+
+    assert response.json()["important_info_detected"] is False
+    assert "do not contain relevant information" in response.json()["documents"][0]
+
+
+def test_stats_endpoint_reports_query_cache_counters(monkeypatch, retrieval_env):
+    retrieval, add = retrieval_env
+    add("c-1", "operating profit rose", [1.0, 0.0, 0.0, 0.0])
+    client = _client(monkeypatch, [])
+    hits = client.get("/stats").json()["query_cache"]["result_hits"]
+    retrieval.cached_similarity_search("operating profit", 1)
+    retrieval.cached_similarity_search("operating profit", 1)
+
+    response = client.get("/stats")
+    assert response.status_code == 200
+    assert response.json()["query_cache"]["result_hits"] == hits + 1
+    assert response.json()["query_cache"]["result_entries"] == 1
+    assert "pairs_scored" in response.json()["reranker"]
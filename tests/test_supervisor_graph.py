@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+from src.multimodel.retrieval_mode import supervisor_graph
+from src.multimodel.retrieval_mode.supervisor_graph import SupervisorService
+
+
+NEAR = [1.0, 0.0, 0.0, 0.0]
+
+
+@pytest.fixture
+def supervisor(retrieval_env, monkeypatch):
+    retrieval, add = retrieval_env
+    add("c-1", "The penalty for late payment is 2%", NEAR, pdf_name="terms")
+    add("i-1", "", [1.0, 0.0, 0.0, 0.01], type="image", image_id="img-1", pdf_name="terms")
+    retrieval.embedding_model.get().vectors["late payment penalty"] = NEAR
+
+    def caption(documents):
+        return [
+            Document(page_content="Revenue chart", metadata=doc.metadata) if doc.metadata.get("type") == "image" else doc
+            for doc in documents
+        ]
+
+    background = []
+    monkeypatch.setattr(supervisor_graph, "vision_agent_enrich", caption)
+    monkeypatch.setattr(supervisor_graph, "submit_background", lambda fn, *args: background.append((fn, args)))
+    return SupervisorService(), background
+
+
+def _check(result, background):
+    assert [doc.page_content for doc in result["documents"]] == ["The penalty for late payment is 2%", "Revenue chart"]
+    assert result["important_info_detected"] is True
+    assert result["images_present"] is True
+
+    # Audit and alert are handed off, not run on the request path
+    (fn, (state,)), = background
+    assert fn is supervisor_graph.audit_and_notify
+    audit, alert = supervisor_graph._audit_and_alert(state)
+    assert audit["retrieved_chunks"] == 2
+    assert alert["to_email"] == "ops@example.com"
+
+
+def test_branches_join_into_one_answer(supervisor):
+    service, background = supervisor
+    _check(service.run("late payment penalty", top_k=2, user_email="ops@example.com"), background)
+
+
+def test_async_graph_gives_the_same_answer(supervisor):
+    service, background = supervisor
+    result = asyncio.run(service.arun("late payment penalty", top_k=2, user_email="ops@example.com"))
+    _check(result, background)
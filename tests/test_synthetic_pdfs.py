@@ -0,0 +1,34 @@
+import fitz
+import pytest
+
+from src.multimodel.pdf_ingestion.synthetic_pdfs import PDF_KINDS, generate_corpus, generate_pdf
+
+
+def test_corpus_has_one_document_per_kind_with_the_requested_pages(tmp_path):
+    corpus = generate_corpus(tmp_path, pages=2)
+
+    assert [entry["kind"] for entry in corpus] == list(PDF_KINDS)
+    for entry in corpus:
+        with fitz.open(entry["path"]) as doc:
+            assert doc.page_count == 2
+
+
+def test_same_seed_gives_identical_bytes(tmp_path):
+    first = generate_pdf(tmp_path / "a.pdf", "table", pages=2, seed=3).read_bytes()
+    assert generate_pdf(tmp_path / "b.pdf", "table", pages=2, seed=3).read_bytes() == first
+    assert generate_pdf(tmp_path / "c.pdf", "table", pages=2, seed=4).read_bytes() != first
+
+
+def test_kinds_exercise_their_extraction_paths(tmp_path):
+    with fitz.open(generate_pdf(tmp_path / "text.pdf", "text", pages=1)) as doc:
+        assert doc[0].get_text().strip()
+    with fitz.open(generate_pdf(tmp_path / "scanned.pdf", "scanned", pages=1)) as doc:
+        assert not doc[0].get_text().strip()
+        assert doc[0].get_images()
+    with fitz.open(generate_pdf(tmp_path / "image.pdf", "image", pages=1)) as doc:
+        assert len(doc[0].get_images()) >= 2
+
+
+def test_unknown_kind_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        generate_pdf(tmp_path / "x.pdf", "video", pages=1)
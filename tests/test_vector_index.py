@@ -0,0 +1,105 @@
+import multiprocessing
+
+import numpy as np
+
+from src.multimodel.vector_index import NumpyIndex
+
+
+def _vector(i, dim=4):
+    vector = np.zeros(dim, dtype=np.float32)
+    vector[i % dim] = 1.0 + i // dim
+    return vector
+
+
+def _upsert(index, ids, **metadata):
+    index.upsert(
+        ids,
+        [_vector(int(chunk_id.split("-")[1])) for chunk_id in ids],
+        [f"text of {chunk_id}" for chunk_id in ids],
+        [{"chunk_id": chunk_id, **metadata} for chunk_id in ids],
+    )
+
+
+def test_documents_are_read_from_the_log_by_row(tmp_path):
+    index = NumpyIndex(tmp_path, quantization="none")
+    _upsert(index, ["c-0", "c-1"], pdf_name="a.pdf")
+
+    assert not hasattr(index, "documents")
+    docs = index.get(["c-1", "missing"])
+    assert list(docs) == ["c-1"]
+    assert docs["c-1"].page_content == "text of c-1"
+    assert docs["c-1"].metadata == {"chunk_id": "c-1", "pdf_name": "a.pdf"}
+
+
+def test_upsert_and_delete_tombstone_until_compaction(tmp_path):
+    index = NumpyIndex(tmp_path, quantization="none")
+    _upsert(index, ["c-0", "c-1", "c-2"])
+    index.upsert(["c-1"], [_vector(1)], ["rewritten"], [{"chunk_id": "c-1"}])
+    index.delete(["c-2"])
+
+    assert index.count() == 2
+    assert index._header["rows"] == 4
+    assert index.get(["c-1"])["c-1"].page_content == "rewritten"
+
+    index.persist()
+    assert index._header["rows"] == 2
+    batches = list(index.iter_batches())
+    assert sorted(batches[0]["ids"]) == ["c-0", "c-1"]
+    assert index.get(["c-1"])["c-1"].page_content == "rewritten"
+    assert not index.get(["c-2"])
+
+
+def test_other_instances_pick_up_commits(tmp_path):
+    writer = NumpyIndex(tmp_path, quantization="none")
+    reader = NumpyIndex(tmp_path, quantization="none")
+    _upsert(writer, ["c-0"])
+    assert reader.get(["c-0"])["c-0"].page_content == "text of c-0"
+
+    _upsert(writer, ["c-1"])
+    writer.persist()
+    hits = reader.search(_vector(1), k=1)
+    assert hits[0][0].metadata["chunk_id"] == "c-1"
+
+
+def test_filters_on_non_indexed_fields_read_metadata_by_row(tmp_path):
+    index = NumpyIndex(tmp_path, quantization="none")
+    _upsert(index, ["c-0", "c-1"], reviewer="ana")
+    _upsert(index, ["c-2", "c-3"], reviewer="bo")
+
+    hits = index.search(_vector(0), k=4, filters={"reviewer": "bo"})
+    assert {doc.metadata["chunk_id"] for doc, _ in hits} == {"c-2", "c-3"}
+
+
+def _write_rows(directory, start, count):
+    index = NumpyIndex(directory, quantization="none")
+    for i in range(start, start + count):
+        _upsert(index, [f"c-{i}"])
+
+
+def test_writers_in_different_processes_do_not_clobber_each_other(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_write_rows, args=(tmp_path, start, 25)) for start in (0, 100)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    index = NumpyIndex(tmp_path, quantization="none")
+    expected = [f"c-{i}" for i in [*range(25), *range(100, 125)]]
+    assert index.count() == len(expected)
+    docs = index.get(expected)
+    assert all(docs[chunk_id].page_content == f"text of {chunk_id}" for chunk_id in expected)
+
+
+def test_quantization_report_counts_resident_bytes_per_chunk(tmp_path):
+    from src.multimodel.vector_index import evaluate_quantization
+
+    index = NumpyIndex(tmp_path, quantization="none")
+    _upsert(index, [f"c-{i}" for i in range(64)], pdf_name="a.pdf")
+    report = evaluate_quantization(index, kinds=("int8",), num_queries=8, k=3)
+
+    overhead = report["row_overhead_bytes_per_chunk"]
+    assert overhead > 0
+    for kind in ("none", "int8"):
+        assert report[kind]["resident_bytes_per_chunk"] == round(report[kind]["vector_bytes_per_chunk"] + overhead, 1)
+    assert report["int8"]["memory_ratio"] > report["int8"]["vector_bytes_per_chunk"] / report["none"]["vector_bytes_per_chunk"]